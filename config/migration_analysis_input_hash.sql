@@ -0,0 +1,28 @@
+-- ================================================
+-- Migration: Input hash for Xray analyses
+-- Run at: https://supabase.com/dashboard/project/dkxydhuojaspmbpjfyoz/sql
+-- ================================================
+
+-- SHA-256 of what the analysis was generated from (headline, summary,
+-- research) plus the generator version. Related stories are not hashed:
+-- they come from a window relative to now. The engine skips generation
+-- and the rewrite when a story's inputs hash to the stored value.
+ALTER TABLE stories ADD COLUMN IF NOT EXISTS xray_analysis_input_hash TEXT;
+
+-- An analysis cleared by hand must be regenerated, so its hash goes with it
+CREATE OR REPLACE FUNCTION xray_clear_analysis_input_hash()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.xray_analysis IS NULL OR NEW.xray_analysis = '' THEN
+        NEW.xray_analysis_input_hash := NULL;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_clear_analysis_input_hash ON stories;
+CREATE TRIGGER trg_clear_analysis_input_hash
+    BEFORE UPDATE OF xray_analysis ON stories
+    FOR EACH ROW EXECUTE FUNCTION xray_clear_analysis_input_hash();
+
+COMMENT ON COLUMN stories.xray_analysis_input_hash IS 'Hash of the Xray analysis inputs and generator version; unchanged inputs skip regeneration';
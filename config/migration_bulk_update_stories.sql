@@ -0,0 +1,53 @@
+-- ================================================
+-- Migration: Bulk story updates for the Xray engine
+-- Run at: https://supabase.com/dashboard/project/dkxydhuojaspmbpjfyoz/sql
+-- ================================================
+
+-- Applies a batch of partial updates in one round trip:
+--   updates = [{"id": "<uuid>", "fields": {"xray_score": 72, ...}}, ...]
+-- Each row is updated on its own (a bad row does not abort the batch) and
+-- only the listed columns are touched. Returns the rows that failed as
+--   [{"id": "<uuid>", "error": "..."}]
+-- A plain upsert can't do this: INSERT ... ON CONFLICT checks NOT NULL
+-- columns such as headline before it ever reaches the conflict.
+CREATE OR REPLACE FUNCTION xray_bulk_update_stories(updates JSONB)
+RETURNS JSONB AS $$
+DECLARE
+    item       JSONB;
+    set_clause TEXT;
+    touched    INTEGER;
+    failed     JSONB := '[]'::jsonb;
+BEGIN
+    FOR item IN SELECT * FROM jsonb_array_elements(updates) LOOP
+        BEGIN
+            SELECT string_agg(format('%I = r.%I', k, k), ', ')
+              INTO set_clause
+              FROM jsonb_object_keys(item->'fields') AS k
+             WHERE k <> 'id';
+
+            IF set_clause IS NULL THEN
+                CONTINUE;
+            END IF;
+
+            EXECUTE format(
+                'UPDATE stories s SET %s FROM jsonb_populate_record(NULL::stories, $1) r WHERE s.id = $2',
+                set_clause
+            ) USING item->'fields', (item->>'id')::uuid;
+
+            GET DIAGNOSTICS touched = ROW_COUNT;
+            IF touched = 0 THEN
+                failed := failed || jsonb_build_object('id', item->>'id', 'error', 'story not found');
+            END IF;
+        EXCEPTION WHEN OTHERS THEN
+            failed := failed || jsonb_build_object('id', item->>'id', 'error', SQLERRM);
+        END;
+    END LOOP;
+    RETURN failed;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Engine only (service role); not callable with the anon key
+REVOKE EXECUTE ON FUNCTION xray_bulk_update_stories(JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION xray_bulk_update_stories(JSONB) TO service_role;
+
+COMMENT ON FUNCTION xray_bulk_update_stories(JSONB) IS 'Batched partial story updates from SupabaseClient.flush_updates; returns failed rows';
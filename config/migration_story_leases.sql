@@ -0,0 +1,76 @@
+-- ================================================
+-- Migration: Lease-based work claiming for Xray engine workers
+-- Run at: https://supabase.com/dashboard/project/dkxydhuojaspmbpjfyoz/sql
+-- ================================================
+
+-- A story claimed by a worker is invisible to other workers until the
+-- lease expires or is released, so any number of engine processes on any
+-- number of machines can pull disjoint batches.
+ALTER TABLE stories ADD COLUMN IF NOT EXISTS claimed_by TEXT;
+ALTER TABLE stories ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_stories_lease ON stories(lease_expires_at)
+WHERE lease_expires_at IS NOT NULL;
+
+-- Atomically claim up to batch_size stories needing a stage:
+--   'truth'    - unscored (xray_score null or 0)
+--   'analysis' - missing analysis, or one below min_version (the engine
+--                passes its ANALYSIS_VERSION)
+-- Free rows, rows with an expired lease and rows already held by the same
+-- worker are eligible, except exclude_ids (rows the worker already took
+-- for the current batch, so a top-up claim returns new ones); SKIP LOCKED
+-- keeps concurrent claims disjoint.
+DROP FUNCTION IF EXISTS xray_claim_stories(TEXT, TEXT, INTEGER, INTEGER);
+DROP FUNCTION IF EXISTS xray_claim_stories(TEXT, TEXT, INTEGER, INTEGER, UUID[]);
+CREATE OR REPLACE FUNCTION xray_claim_stories(
+    worker        TEXT,
+    stage         TEXT,
+    batch_size    INTEGER DEFAULT 20,
+    lease_seconds INTEGER DEFAULT 900,
+    exclude_ids   UUID[] DEFAULT '{}',
+    min_version   INTEGER DEFAULT 5
+)
+RETURNS SETOF stories AS $$
+    UPDATE stories s
+       SET claimed_by = worker,
+           lease_expires_at = NOW() + make_interval(secs => lease_seconds)
+     WHERE s.id IN (
+        SELECT c.id
+          FROM stories c
+         WHERE (c.lease_expires_at IS NULL OR c.lease_expires_at < NOW() OR c.claimed_by = worker)
+           AND NOT (c.id = ANY(exclude_ids))
+           AND CASE stage
+                 WHEN 'truth' THEN (c.xray_score IS NULL OR c.xray_score = 0)
+                 WHEN 'analysis' THEN (c.xray_analysis IS NULL OR c.xray_analysis = ''
+                                       OR COALESCE(c.xray_analysis_version, 0) < min_version)
+                 ELSE FALSE
+               END
+         ORDER BY c.created_at DESC
+         LIMIT batch_size
+           FOR UPDATE SKIP LOCKED
+     )
+    RETURNING s.*;
+$$ LANGUAGE sql;
+
+-- Hand stories back before their lease runs out (end of a run)
+CREATE OR REPLACE FUNCTION xray_release_stories(worker TEXT, story_ids UUID[])
+RETURNS INTEGER AS $$
+    WITH released AS (
+        UPDATE stories
+           SET claimed_by = NULL,
+               lease_expires_at = NULL
+         WHERE id = ANY(story_ids)
+           AND claimed_by = worker
+        RETURNING 1
+    )
+    SELECT COUNT(*)::INTEGER FROM released;
+$$ LANGUAGE sql;
+
+-- Engine only (service role)
+REVOKE EXECUTE ON FUNCTION xray_claim_stories(TEXT, TEXT, INTEGER, INTEGER, UUID[], INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION xray_release_stories(TEXT, UUID[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION xray_claim_stories(TEXT, TEXT, INTEGER, INTEGER, UUID[], INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION xray_release_stories(TEXT, UUID[]) TO service_role;
+
+COMMENT ON COLUMN stories.claimed_by IS 'Xray worker currently holding the story (host:pid or XRAY_WORKER_ID)';
+COMMENT ON COLUMN stories.lease_expires_at IS 'Claim expiry; expired claims are picked up by other workers';
@@ -0,0 +1,21 @@
+-- ================================================
+-- Migration: Per-story research artifacts
+-- Run at: https://supabase.com/dashboard/project/dkxydhuojaspmbpjfyoz/sql
+-- ================================================
+
+-- One research result per story, shared by the truth and analysis engines
+CREATE TABLE IF NOT EXISTS story_research (
+    story_id         UUID PRIMARY KEY REFERENCES stories(id) ON DELETE CASCADE,
+    research         JSONB NOT NULL,
+    source_count     INTEGER DEFAULT 0,
+    research_version INTEGER DEFAULT 1,
+    researched_at    TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_story_research_at ON story_research(researched_at DESC);
+
+-- Service role bypasses RLS; no public access to raw research
+ALTER TABLE story_research ENABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE story_research IS 'Research dict produced by ResearchEngine.research_story, reused across engine stages and reruns';
+COMMENT ON COLUMN story_research.research_version IS 'Bumped when the research dict shape changes; older rows are treated as stale';
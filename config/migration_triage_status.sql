@@ -0,0 +1,55 @@
+-- ================================================
+-- Migration: Triage status for junk stories
+-- Run at: https://supabase.com/dashboard/project/dkxydhuojaspmbpjfyoz/sql
+-- ================================================
+
+-- Stories rejected by the Xray triage stage (non-news posts, too-short
+-- headlines, social posts with no country) are marked once and excluded
+-- from the unscored/unanalyzed queries instead of being re-checked forever.
+ALTER TABLE stories ADD COLUMN IF NOT EXISTS triage_status TEXT;   -- NULL = not triaged, 'rejected'
+ALTER TABLE stories ADD COLUMN IF NOT EXISTS triage_reason TEXT;
+ALTER TABLE stories ADD COLUMN IF NOT EXISTS triaged_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_stories_unscored_untriaged ON stories(created_at DESC)
+WHERE (xray_score IS NULL OR xray_score = 0) AND triage_status IS DISTINCT FROM 'rejected';
+
+-- Lease claims (migration_story_leases.sql) skip rejected stories too
+DROP FUNCTION IF EXISTS xray_claim_stories(TEXT, TEXT, INTEGER, INTEGER);
+DROP FUNCTION IF EXISTS xray_claim_stories(TEXT, TEXT, INTEGER, INTEGER, UUID[]);
+CREATE OR REPLACE FUNCTION xray_claim_stories(
+    worker        TEXT,
+    stage         TEXT,
+    batch_size    INTEGER DEFAULT 20,
+    lease_seconds INTEGER DEFAULT 900,
+    exclude_ids   UUID[] DEFAULT '{}',
+    min_version   INTEGER DEFAULT 5
+)
+RETURNS SETOF stories AS $$
+    UPDATE stories s
+       SET claimed_by = worker,
+           lease_expires_at = NOW() + make_interval(secs => lease_seconds)
+     WHERE s.id IN (
+        SELECT c.id
+          FROM stories c
+         WHERE (c.lease_expires_at IS NULL OR c.lease_expires_at < NOW() OR c.claimed_by = worker)
+           AND NOT (c.id = ANY(exclude_ids))
+           AND c.triage_status IS DISTINCT FROM 'rejected'
+           AND CASE stage
+                 WHEN 'truth' THEN (c.xray_score IS NULL OR c.xray_score = 0)
+                 WHEN 'analysis' THEN (c.xray_analysis IS NULL OR c.xray_analysis = ''
+                                       OR COALESCE(c.xray_analysis_version, 0) < min_version)
+                 ELSE FALSE
+               END
+         ORDER BY c.created_at DESC
+         LIMIT batch_size
+           FOR UPDATE SKIP LOCKED
+     )
+    RETURNING s.*;
+$$ LANGUAGE sql;
+
+-- Re-created with a new signature, so grants are re-applied
+REVOKE EXECUTE ON FUNCTION xray_claim_stories(TEXT, TEXT, INTEGER, INTEGER, UUID[], INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION xray_claim_stories(TEXT, TEXT, INTEGER, INTEGER, UUID[], INTEGER) TO service_role;
+
+COMMENT ON COLUMN stories.triage_status IS 'Xray triage outcome: NULL (not triaged) or rejected (junk, never scored)';
+COMMENT ON COLUMN stories.triage_reason IS 'Why triage rejected the story (e.g. non-news, headline too short)';
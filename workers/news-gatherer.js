@@ -13,6 +13,8 @@
 // v5.12: Audit fixes (openStory modal, CSS glow, PostgREST filter)
 // ================================================
 
+import SOURCE_DATA from '../xray/data/source_domains.json';
+
 // SUPABASE_URL accessed via env parameter
 const MAX_STORIES_PER_RUN = 50;  // Reduced from 25
 const MAX_ITEMS_PER_SOURCE = 15; // Reduced from 25
@@ -145,17 +147,8 @@ const CATEGORY_MAP = [
 ];
 
 // ---- Source Reputation -------------------------------------------------
-const SOURCE_REPUTATION = {
-  'BBC News': 92, 'NPR World': 88, 'The Guardian': 85, 'WSJ World': 90,
-  'Al Jazeera': 78, 'DW News': 82, 'France24': 80,
-  'Sky News': 74, 'Euronews': 76, 'RFI': 74,
-  'Reddit WorldNews': 65, 'Reddit Geopolitics': 60, 'Reddit Ukraine': 55,
-  'Reddit Europe': 55, 'Reddit News': 60,
-  'Reddit UK': 55, 'Reddit Canada': 55, 'Reddit China': 50, 'Reddit MiddleEast': 50,
-  'Reddit IsraelPalestine': 45, 'Reddit Syria': 45,
-  'X Breaking News': 50, 'X World News': 45, 'X Conflict': 45,
-  'X Disasters': 50, 'X Elections': 50, 'X Protests': 45, 'X Health': 50,
-};
+// Shared with the Xray engine (xray/source_reputation.py); edit the JSON, not here
+const SOURCE_REPUTATION = SOURCE_DATA.feeds;
 
 // ---- Utilities ---------------------------------------------------------
 function parseXML(text) {
@@ -9,6 +9,9 @@ import json
 from datetime import datetime, timezone
 from typing import Dict, List, Optional
 
+from claim_index import verify_claims
+from text_doc import LEGACY_CLEANING, NormalizedDoc, clean_text, doc_for
+
 
 class ProfessionalAnalysisGenerator:
     """Generate human-like, engaging analysis that reads like real journalism"""
@@ -51,25 +54,25 @@ class ProfessionalAnalysisGenerator:
     }
     
     def generate_analysis(self, headline: str, summary: str, research: Dict,
-                          related_stories: List[Dict] = None) -> str:
+                          related_stories: List[Dict] = None, doc: NormalizedDoc = None) -> str:
         """Generate engaging, human-like analysis"""
         
-        # Clean inputs - remove HTML/image tags
-        headline = self._clean_text(headline)
-        summary = self._clean_text(summary)
+        # Clean inputs - remove HTML/image tags (once, shared with other stages)
+        doc = doc or doc_for(headline, summary, **LEGACY_CLEANING)
+        headline, summary = doc.headline, doc.summary
         
         entities = research.get('entities', {})
         sources = research.get('sources', [])
         
         # Extract and verify claims
-        claims = self.extract_claims_from_text(headline, summary)
+        claims = self.extract_claims_from_text(headline, summary, doc=doc)
         claims = self.verify_claims(claims, sources)
         
         # Calculate confidence
         confidence = self.calculate_confidence(research, claims)
         
         # Detect story type and context
-        story_context = self._detect_story_context(headline, summary, entities)
+        story_context = self._detect_story_context(headline, summary, entities, doc)
         
         # Build engaging analysis
         sections = []
@@ -104,28 +107,16 @@ class ProfessionalAnalysisGenerator:
     
     def _clean_text(self, text: str) -> str:
         """Remove HTML tags, image references, clean up text"""
-        if not text:
-            return ""
-        
-        # Remove HTML tags
-        text = re.sub(r'<[^>]+>', '', text)
-        
-        # Remove image URLs
-        text = re.sub(r'https?://[^\s]+\.(jpg|jpeg|png|gif|webp)', '', text, flags=re.IGNORECASE)
-        
-        # Remove Reddit-style image previews
-        text = re.sub(r'external-preview\.redd\.it[^\s]*', '', text)
-        
-        # Clean up whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        return text.strip()
+        return clean_text(text, **LEGACY_CLEANING)
     
-    def _detect_story_context(self, headline: str, summary: str, entities: Dict) -> Dict:
+    def _detect_story_context(self, headline: str, summary: str, entities: Dict,
+                              doc: NormalizedDoc = None) -> Dict:
         """Detect story type, key figures, and context"""
-        combined = f"{headline} {summary}".lower()
+        doc = doc or doc_for(headline, summary, **LEGACY_CLEANING)
+        combined = doc.lower
         
         context = {
+            'doc': doc,
             'type': 'general',
             'key_figure': None,
             'country': None,
@@ -279,7 +270,7 @@ class ProfessionalAnalysisGenerator:
             
             # US-specific context
             if country_code == 'US':
-                combined = f"{headline} {summary}".lower()
+                combined = context['doc'].lower
                 if 'ukraine' in combined or 'zelensky' in combined:
                     return f"**Background:** {name}'s administration is reshaping US policy on the Ukraine-Russia conflict, with significant implications for European security."
                 if 'iran' in combined:
@@ -308,7 +299,7 @@ class ProfessionalAnalysisGenerator:
         key_figure = context.get('key_figure')
         story_type = context.get('type', 'general')
         country_code = key_figure.get('country', '') if key_figure else None
-        combined = f"{headline} {summary}".lower()
+        combined = context['doc'].lower
         
         # US political story - check for specific contexts
         if country_code == 'US':
@@ -389,13 +380,16 @@ class ProfessionalAnalysisGenerator:
         
         return min(score, 100)
     
-    def extract_claims_from_text(self, headline: str, summary: str = '') -> List[Dict]:
+    def extract_claims_from_text(self, headline: str, summary: str = '',
+                                 doc: NormalizedDoc = None) -> List[Dict]:
         """Extract verifiable claims from the story"""
         claims = []
-        combined = f"{headline}. {summary}" if summary else headline
-        
-        # Clean first
-        combined = self._clean_text(combined)
+        if doc is not None:
+            # Already cleaned
+            combined = f"{doc.headline}. {doc.summary}" if doc.summary else doc.headline
+        else:
+            combined = f"{headline}. {summary}" if summary else headline
+            combined = self._clean_text(combined)
         
         # Split into sentences
         sentences = re.split(r'(?<=[.!?])\s+', combined)
@@ -406,6 +400,7 @@ class ProfessionalAnalysisGenerator:
                 continue
             
             worthiness = 0
+            sentence_lower = sentence.lower()
             
             if re.search(r'\d+', sentence):
                 worthiness += 2
@@ -414,7 +409,7 @@ class ProfessionalAnalysisGenerator:
                           'putin', 'zelenskyy', 'netanyahu', 'nato', 'un', 'eu', 'canada', 'carney',
                           'trudeau', 'premier', 'minister', 'prime minister']
             for word in entity_words:
-                if word in sentence.lower():
+                if word in sentence_lower:
                     worthiness += 2
                     break
             
@@ -422,7 +417,7 @@ class ProfessionalAnalysisGenerator:
                           'attacked', 'signed', 'agreed', 'rejected', 'approved', 'faces', 'warns',
                           'spoke', 'emerged']
             for verb in verify_verbs:
-                if verb in sentence.lower():
+                if verb in sentence_lower:
                     worthiness += 1
                     break
             
@@ -438,38 +433,8 @@ class ProfessionalAnalysisGenerator:
         return claims[:5]
     
     def verify_claims(self, claims: List[Dict], sources: List[Dict]) -> List[Dict]:
-        """Verify claims against found sources"""
-        for claim in claims:
-            claim_text = claim['text'].lower()
-            
-            supporting = []
-            
-            for source in sources:
-                snippet = source.get('snippet', '').lower()
-                title = source.get('title', '').lower()
-                combined = f"{title} {snippet}"
-                
-                claim_words = set(claim_text.split())
-                source_words = set(combined.split())
-                overlap = claim_words & source_words
-                
-                if len(overlap) >= 3:
-                    if source.get('tier', 4) <= 2:
-                        supporting.append(source)
-            
-            if len(supporting) >= 2:
-                claim['verified'] = True
-                claim['status'] = 'confirmed'
-                claim['sources'] = len(supporting)
-            elif len(supporting) == 1:
-                claim['verified'] = True
-                claim['status'] = 'partially_confirmed'
-                claim['sources'] = 1
-            else:
-                claim['verified'] = False
-                claim['status'] = 'unverified'
-        
-        return claims
+        """Verify claims against found sources (one source index per story)"""
+        return verify_claims(claims, sources)
     
     def _format_confidence_line(self, confidence: int, research: Dict) -> str:
         """Format the confidence score line"""
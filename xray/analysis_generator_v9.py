@@ -10,6 +10,16 @@ from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 from datetime import datetime, timezone
 
+from claim_index import verify_claims
+from text_doc import NormalizedDoc, clean_text, doc_for
+
+# Part of every analysis input hash (xray_analysis_input_hash): bump when
+# the same inputs should produce a different analysis. Pairs with
+# xray_engine_v5.ANALYSIS_VERSION, which only re-queues stories: a story
+# whose inputs and GENERATOR_VERSION are unchanged just gets its version
+# column rewritten, so a generator change must bump both.
+GENERATOR_VERSION = '9.0'
+
 
 @dataclass
 class StoryContext:
@@ -23,6 +33,7 @@ class StoryContext:
     is_canadian: bool = False
     is_breaking: bool = False
     urgency: str = 'normal'
+    doc: Optional[NormalizedDoc] = None
 
 
 @dataclass
@@ -93,18 +104,18 @@ class NarrativeAnalysisGenerator:
     }
     
     def generate_analysis(self, headline: str, summary: str, research: Dict,
-                          related_stories: List[Dict] = None) -> str:
+                          related_stories: List[Dict] = None, doc: NormalizedDoc = None) -> str:
         """Generate 4-6 paragraph narrative analysis"""
         
-        headline = self._clean_text(headline)
-        summary = self._clean_text(summary)
+        doc = doc or doc_for(headline, summary)
+        headline, summary = doc.headline, doc.summary
         entities = research.get('entities', {})
         sources = research.get('sources', [])
         
-        claims = self.extract_claims_from_text(headline, summary)
+        claims = self.extract_claims_from_text(headline, summary, doc=doc)
         claims = self.verify_claims(claims, sources)
         confidence = self.calculate_confidence(research, claims)
-        context = self._build_story_context(headline, summary, entities)
+        context = self._build_story_context(headline, summary, entities, doc)
         voice = VOICE_PROFILES.get(context.story_type, VOICE_PROFILES['general'])
         
         paragraphs = []
@@ -132,7 +143,7 @@ class NarrativeAnalysisGenerator:
         
         key_figure = context.key_figure
         secondary = context.secondary_figure
-        combined = f"{headline} {summary}".lower()
+        combined = context.doc.lower
         
         # Dual-figure story
         if key_figure and secondary:
@@ -172,8 +183,8 @@ class NarrativeAnalysisGenerator:
         return action
     
     def _extract_core_news(self, headline: str) -> str:
-        cleaned = re.sub(r'^(BREAKING|UPDATE|LIVE|JUST IN):?\s*', '', headline, flags=re.IGNORECASE)
-        cleaned = self._clean_text(cleaned)
+        # headline is already cleaned (NormalizedDoc)
+        cleaned = re.sub(r'^(BREAKING|UPDATE|LIVE|JUST IN):?\s*', '', headline, flags=re.IGNORECASE).strip()
         if len(cleaned) > 120:
             cleaned = cleaned[:120].rsplit(' ', 1)[0]
         return cleaned
@@ -184,7 +195,7 @@ class NarrativeAnalysisGenerator:
         
         key_figure = context.key_figure
         country_code = key_figure.get('country', '') if key_figure else None
-        combined = f"{headline} {summary}".lower()
+        combined = context.doc.lower
         
         if country_code == 'US':
             if 'ukraine' in combined or 'zelensky' in combined:
@@ -289,9 +300,8 @@ class NarrativeAnalysisGenerator:
         return " ".join(sentences)
     
     def _transform_to_narrative(self, text: str, context: StoryContext) -> str:
-        """Transform summary text into flowing narrative"""
+        """Transform summary text (already cleaned) into flowing narrative"""
         
-        text = self._clean_text(text)
         if not text or len(text) < 20:
             return ""
         
@@ -312,7 +322,7 @@ class NarrativeAnalysisGenerator:
         """Background context - country-specific"""
         
         key_figure = context.key_figure
-        combined = f"{headline} {summary}".lower()
+        combined = context.doc.lower
         
         if not key_figure:
             if 'ukraine' in combined:
@@ -348,7 +358,7 @@ class NarrativeAnalysisGenerator:
         
         key_figure = context.key_figure
         country_code = key_figure.get('country', '') if key_figure else None
-        combined = f"{headline} {summary}".lower()
+        combined = context.doc.lower
         
         if context.story_type == 'conflict':
             if country_code == 'UA' or 'ukraine' in combined:
@@ -374,16 +384,18 @@ class NarrativeAnalysisGenerator:
         
         return f"What happens next remains uncertain. {confidence_note}"
     
-    def _build_story_context(self, headline: str, summary: str, entities: Dict) -> StoryContext:
+    def _build_story_context(self, headline: str, summary: str, entities: Dict,
+                             doc: NormalizedDoc = None) -> StoryContext:
         """Build comprehensive story context"""
-        combined = f"{headline} {summary}".lower()
-        context = StoryContext()
+        doc = doc or doc_for(headline, summary)
+        combined = doc.lower
+        context = StoryContext(doc=doc)
         
         found_figures = []
         for key, data in self.POLITICAL_FIGURES.items():
             if len(key) <= 5:
-                pattern = r'\b' + re.escape(key) + r'\b'
-                if re.search(pattern, combined):
+                # Short names must be whole words
+                if key in doc.token_set:
                     found_figures.append(data)
             else:
                 if key in combined:
@@ -428,7 +440,7 @@ class NarrativeAnalysisGenerator:
         
         breaking_markers = ['breaking', 'just in', 'developing', 'urgent', 'live']
         for marker in breaking_markers:
-            if marker in headline.lower():
+            if marker in doc.headline_lower:
                 context.is_breaking = True
                 context.urgency = 'urgent'
                 break
@@ -439,22 +451,7 @@ class NarrativeAnalysisGenerator:
     
     def _clean_text(self, text: str) -> str:
         """Clean HTML and normalize text"""
-        if not text:
-            return ""
-        # Remove HTML tags
-        text = re.sub(r'<[^>]+>', '', text)
-        # Decode HTML entities
-        text = text.replace('&amp;', '&').replace('&lt;', '<').replace('&gt;', '>')
-        text = text.replace('&quot;', '"').replace('&#39;', "'")
-        # Remove robotic/boilerplate phrases
-        text = re.sub(r'\s*[-\|]?\s*Details are still emerging\.?$', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'\s*[-\|]?\s*This is a developing story\.?$', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'^Breaking:\s*', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'^Just in:\s*', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'\s*reports say$', '', text, flags=re.IGNORECASE)
-        # Normalize whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text
+        return clean_text(text)
 
     def calculate_confidence(self, research: Dict, claims: List[Dict]) -> int:
         score = 30
@@ -480,10 +477,15 @@ class NarrativeAnalysisGenerator:
         
         return min(score, 100)
     
-    def extract_claims_from_text(self, headline: str, summary: str = '') -> List[Dict]:
+    def extract_claims_from_text(self, headline: str, summary: str = '',
+                                 doc: NormalizedDoc = None) -> List[Dict]:
         claims = []
-        combined = f"{headline}. {summary}" if summary else headline
-        combined = self._clean_text(combined)
+        if doc is not None:
+            # Already cleaned
+            combined = f"{doc.headline}. {doc.summary}" if doc.summary else doc.headline
+        else:
+            combined = f"{headline}. {summary}" if summary else headline
+            combined = self._clean_text(combined)
         sentences = re.split(r'(?<=[.!?])\s+', combined)
         
         for sentence in sentences:
@@ -492,20 +494,21 @@ class NarrativeAnalysisGenerator:
                 continue
             
             worthiness = 0
+            sentence_lower = sentence.lower()
             if re.search(r'\d+', sentence):
                 worthiness += 2
             
             entity_words = ['iran', 'israel', 'russia', 'ukraine', 'china', 'us', 'trump', 'biden',
                           'putin', 'zelenskyy', 'netanyahu', 'nato', 'canada', 'carney', 'trudeau']
             for word in entity_words:
-                if word in sentence.lower():
+                if word in sentence_lower:
                     worthiness += 2
                     break
             
             verify_verbs = ['announced', 'confirmed', 'reported', 'stated', 'said', 'launched',
                           'attacked', 'signed', 'agreed', 'rejected', 'approved', 'spoke']
             for verb in verify_verbs:
-                if verb in sentence.lower():
+                if verb in sentence_lower:
                     worthiness += 1
                     break
             
@@ -516,34 +519,7 @@ class NarrativeAnalysisGenerator:
         return claims[:5]
     
     def verify_claims(self, claims: List[Dict], sources: List[Dict]) -> List[Dict]:
-        for claim in claims:
-            claim_text = claim['text'].lower()
-            supporting = []
-            
-            for source in sources:
-                snippet = source.get('snippet', '').lower()
-                title = source.get('title', '').lower()
-                combined = f"{title} {snippet}"
-                claim_words = set(claim_text.split())
-                source_words = set(combined.split())
-                overlap = claim_words & source_words
-                
-                if len(overlap) >= 3 and source.get('tier', 4) <= 2:
-                    supporting.append(source)
-            
-            if len(supporting) >= 2:
-                claim['verified'] = True
-                claim['status'] = 'confirmed'
-                claim['sources'] = len(supporting)
-            elif len(supporting) == 1:
-                claim['verified'] = True
-                claim['status'] = 'partially_confirmed'
-                claim['sources'] = 1
-            else:
-                claim['verified'] = False
-                claim['status'] = 'unverified'
-        
-        return claims
+        return verify_claims(claims, sources)
     
     def _format_related_stories(self, related_stories: List[Dict]) -> str:
         lines = ["---", "**Related:**"]
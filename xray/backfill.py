@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Xray Analysis Backfill
+Re-analyze the history after an ANALYSIS_VERSION bump
+
+Bumping ANALYSIS_VERSION makes every story in the table qualify for
+analysis again, and the cron engine would work through it 10 stories a
+run. The backfill streams the affected stories (xray_analysis_version
+below the current version) in keyset pages, newest first, and per batch:
+
+- prepares inputs in this process: research (or the stored research with
+  --skip-research, when only the generator changed), related stories and
+  the country correction
+- skips generation for stories whose inputs hash to their stored
+  xray_analysis_input_hash (only the version column is bumped). The hash
+  covers GENERATOR_VERSION, so a generator change must bump it along with
+  ANALYSIS_VERSION or nothing is regenerated
+- generates the analyses in a process pool, since the generator is pure
+  CPU (regex and string work) and a thread pool would serialize on the GIL
+- bulk-writes the updates (xray_bulk_update_stories)
+
+Generation of one batch overlaps preparation of the next. After every
+written batch the keyset cursor and counters go to a checkpoint file, so
+an interrupted backfill resumes where it stopped. Stories that failed are
+left for the regular engine (their version is still below the current one).
+
+Environment:
+  XRAY_CACHE_DIR               Directory for the checkpoint file (default: xray/cache)
+  XRAY_BACKFILL_BATCH          Stories per batch (default: 50)
+  XRAY_BACKFILL_PROCESSES      Generation processes (default: CPU count)
+
+Usage:
+  python backfill.py                      # Re-analyze every story below ANALYSIS_VERSION
+  python backfill.py --skip-research      # Generator-only change: reuse stored research
+  python backfill.py --processes 8        # Generation processes
+  python backfill.py --max-stories 1000   # Stop after this many (resume with the same command)
+  python backfill.py --reset              # Ignore the checkpoint and start from the newest story
+"""
+
+import os
+import json
+import time
+import fcntl
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+from xray_engine_v5 import (
+    ANALYSIS_VERSION, FETCH_PAGE_SIZE, RESEARCH_WORKERS, SERVICE_KEY, SUPABASE_URL,
+    AnalysisEngineV5, SupabaseClient, analysis_columns, analysis_input_hash, logger
+)
+from research_cache import CACHE_DIR
+from research_engine import ResearchEngine
+from research_store import ResearchArtifactStore
+from analysis_generator_v9 import NarrativeAnalysisGenerator
+
+BACKFILL_BATCH = int(os.environ.get('XRAY_BACKFILL_BATCH', '50'))
+BACKFILL_PROCESSES = int(os.environ.get('XRAY_BACKFILL_PROCESSES', str(os.cpu_count() or 2)))
+
+# Failed story ids kept in the checkpoint (the count is always exact)
+MAX_FAILED_IDS = 500
+
+OUTDATED = {'and': f'(xray_analysis_version.lt.{ANALYSIS_VERSION},'
+                   'or(triage_status.is.null,triage_status.neq.rejected))'}
+
+
+# One generator per worker process
+_GENERATOR = None
+
+
+def _init_worker():
+    global _GENERATOR
+    _GENERATOR = NarrativeAnalysisGenerator()
+
+
+def _generate(inputs: Dict) -> tuple:
+    """(analysis, CPU seconds) for one story's generate_analysis kwargs"""
+    start = time.process_time()
+    analysis = _GENERATOR.generate_analysis(**inputs)
+    return analysis, time.process_time() - start
+
+
+class Checkpoint:
+    """Resumable backfill progress in a JSON file, one per analysis version"""
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(CACHE_DIR, f'backfill_v{ANALYSIS_VERSION}.json')
+        self.state = {'version': ANALYSIS_VERSION, 'cursor': None, 'done': 0, 'unchanged': 0,
+                      'failed': 0, 'failed_ids': [], 'seconds': 0.0, 'started_at': None, 'updated_at': None}
+
+    def load(self) -> 'Checkpoint':
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return self
+        if state.get('version') == ANALYSIS_VERSION:
+            self.state.update(state)
+        return self
+
+    def save(self):
+        self.state['updated_at'] = datetime.now(timezone.utc).isoformat()
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def reset(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    @property
+    def cursor(self) -> Optional[tuple]:
+        cursor = self.state['cursor']
+        return tuple(cursor) if cursor else None
+
+    def advance(self, cursor: tuple, done: int, unchanged: int, failed: List[str], seconds: float):
+        self.state['cursor'] = list(cursor)
+        self.state['done'] += done
+        self.state['unchanged'] += unchanged
+        self.state['failed'] += len(failed)
+        self.state['failed_ids'] = (self.state['failed_ids'] + failed)[-MAX_FAILED_IDS:]
+        self.state['seconds'] += seconds
+        self.state['started_at'] = self.state['started_at'] or datetime.now(timezone.utc).isoformat()
+        self.save()
+
+
+class AnalysisBackfill:
+    """Checkpointed, process-parallel re-analysis of outdated stories"""
+
+    def __init__(self, checkpoint: Checkpoint, skip_research: bool = False,
+                 processes: int = BACKFILL_PROCESSES, batch_size: int = BACKFILL_BATCH):
+        self.db = SupabaseClient(SUPABASE_URL, SERVICE_KEY)
+        # Fresh research unless only the generator changed
+        store = ResearchArtifactStore(
+            SUPABASE_URL, SERVICE_KEY,
+            refresh_before=None if skip_research else datetime.now(timezone.utc)
+        )
+        research_engine = ResearchEngine(concurrent=True, max_workers=RESEARCH_WORKERS, store=store)
+        self.analysis_engine = AnalysisEngineV5(self.db, research_engine)
+        self.checkpoint = checkpoint
+        self.processes = max(1, processes)
+        self.batch_size = max(1, batch_size)
+        self.timings = {'prepare': 0.0, 'generate_cpu': 0.0, 'write': 0.0}
+        self._checkpointed = time.time()
+
+    def iter_outdated(self, page_size: int = FETCH_PAGE_SIZE) -> Iterator[Dict]:
+        """Stories analyzed by an older generator, newest first, after the checkpoint"""
+        return self.db.fetch_iter('stories', select=AnalysisEngineV5.SELECT, filters=OUTDATED,
+                                  page_size=page_size, start=self.checkpoint.cursor)
+
+    def prepare(self, batch: List[Dict]) -> tuple:
+        """Research the batch and gather generator inputs.
+        
+        Returns ([(story, update, inputs, input_hash)], unchanged count, failed ids);
+        unchanged stories carry their version bump and no inputs.
+        """
+        start = time.time()
+        research = self.analysis_engine.research_engine.research_batch(batch)
+        prepared, failed = [], []
+        unchanged = 0
+        for story in batch:
+            try:
+                update, inputs = self.analysis_engine.analysis_inputs(story, research.get(story['id']))
+                input_hash = analysis_input_hash(inputs)
+                kept = self.analysis_engine.unchanged_update(story, update, input_hash)
+                if kept is None:
+                    prepared.append((story, update, inputs, input_hash))
+                else:
+                    prepared.append((story, kept, None, input_hash))
+                    unchanged += 1
+            except Exception as e:
+                logger.error(f"Backfill prepare failed for {story['id']}: {e}")
+                failed.append(story['id'])
+        self.timings['prepare'] += time.time() - start
+        return prepared, unchanged, failed
+
+    def write(self, batch: List[Dict], prepared: List[tuple], futures: List,
+              unchanged: int, failed: List[str]) -> int:
+        """Collect the batch's analyses, bulk-write them and checkpoint"""
+        start = time.time()
+        failed = list(failed)
+        write_failed = []  # from flushes queue_update triggers once bulk_size rows are pending
+        for (story, update, inputs, input_hash), future in zip(prepared, futures):
+            if future is None:
+                if update:
+                    write_failed.extend(self.db.queue_update('stories', story['id'], update) or [])
+                continue
+            try:
+                analysis, cpu = future.result()
+            except Exception as e:
+                logger.error(f"Backfill generation failed for {story['id']}: {e}")
+                failed.append(story['id'])
+                continue
+            self.timings['generate_cpu'] += cpu
+            update.update(analysis_columns(analysis, input_hash, inputs['research'].get('partial')))
+            write_failed.extend(self.db.queue_update('stories', story['id'], update) or [])
+
+        for row in write_failed + self.db.flush_updates('stories'):
+            logger.error(f"Backfill write failed for {row['id']}: {row['error']}")
+            failed.append(row['id'])
+        self.timings['write'] += time.time() - start
+
+        done = len(batch) - len(failed)
+        last = batch[-1]
+        now = time.time()
+        self.checkpoint.advance((last['created_at'], last['id']), done, unchanged, failed,
+                                now - self._checkpointed)
+        self._checkpointed = now
+        self.analysis_engine.research_engine.forget([s['id'] for s in batch])
+        return done
+
+    def run(self, max_stories: int = None, page_size: int = FETCH_PAGE_SIZE) -> Dict:
+        state = self.checkpoint.state
+        print("=" * 60)
+        print(f"XRAY ANALYSIS BACKFILL -> v{ANALYSIS_VERSION}")
+        if self.checkpoint.cursor:
+            print(f"Resuming after {self.checkpoint.cursor[0]} ({state['done']} done, {state['failed']} failed)")
+        print(f"{self.processes} generation processes, batches of {self.batch_size}")
+        print("=" * 60)
+        logger.info(f"Backfill started - version={ANALYSIS_VERSION}, cursor={self.checkpoint.cursor}")
+
+        started = self._checkpointed = time.time()
+        processed = done = 0
+        pending = None  # previous batch, generating while the next one is prepared
+
+        with ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker) as pool:
+            batch = []
+            rows = self.iter_outdated(page_size)
+            while True:
+                story = next(rows, None)
+                if story is not None and (max_stories is None or processed < max_stories):
+                    batch.append(story)
+                    processed += 1
+                    if len(batch) < self.batch_size:
+                        continue
+                if not batch:
+                    break
+                prepared, unchanged, failed = self.prepare(batch)
+                futures = [pool.submit(_generate, inputs) if inputs else None
+                           for _, _, inputs, _ in prepared]
+                if pending:
+                    done += self.write(*pending)
+                    self.report(done, time.time() - started)
+                pending = (batch, prepared, futures, unchanged, failed)
+                batch = []
+            if pending:
+                done += self.write(*pending)
+
+        elapsed = time.time() - started
+        self.report(done, elapsed, final=True)
+        logger.info(f"Backfill stopped - done={done} in {elapsed:.0f}s, "
+                    f"total={state['done']}, failed={state['failed']}")
+        return {'done': done, 'seconds': round(elapsed, 1), 'total_done': state['done'],
+                'total_unchanged': state['unchanged'], 'total_failed': state['failed'],
+                **{k: round(v, 1) for k, v in self.timings.items()}}
+
+    def report(self, done: int, elapsed: float, final: bool = False):
+        """Throughput so far: stories/s plus where the time went"""
+        state = self.checkpoint.state
+        rate = done / elapsed if elapsed else 0.0
+        t = self.timings
+        line = (f"{done} analyzed in {elapsed:.0f}s ({rate:.1f} stories/s) | prepare {t['prepare']:.0f}s, "
+                f"generate {t['generate_cpu']:.0f}s CPU over {self.processes} processes, write {t['write']:.0f}s")
+        if final:
+            print(f"\n[BACKFILL] Done: {line}")
+            total_rate = state['done'] / state['seconds'] if state['seconds'] else 0.0
+            print(f"[BACKFILL] Overall: {state['done']} analyzed ({state['unchanged']} unchanged), "
+                  f"{state['failed']} failed, "
+                  f"{total_rate:.1f} stories/s across runs")
+        else:
+            print(f"[BACKFILL] {line} | {state['unchanged']} unchanged, {state['failed']} failed")
+
+
+def acquire_backfill_lock(path: str):
+    """One backfill per checkpoint file at a time"""
+    lock_file = open(path + '.lock', 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return lock_file
+    except IOError:
+        lock_file.close()
+        return None
+
+
+if __name__ == '__main__':
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Xray analysis backfill')
+    parser.add_argument('--skip-research', action='store_true',
+                        help='Reuse stored research (only the generator changed)')
+    parser.add_argument('--processes', type=int, default=BACKFILL_PROCESSES,
+                        help='Generation processes')
+    parser.add_argument('--batch', type=int, default=BACKFILL_BATCH, help='Stories per batch')
+    parser.add_argument('--page-size', type=int, default=FETCH_PAGE_SIZE, help='Rows per keyset page')
+    parser.add_argument('--max-stories', type=int, default=None,
+                        help='Stop after this many stories (resume later)')
+    parser.add_argument('--checkpoint', default=None, help='Checkpoint file path')
+    parser.add_argument('--reset', action='store_true', help='Ignore the checkpoint and start over')
+    args = parser.parse_args()
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    checkpoint = Checkpoint(args.checkpoint)
+    lock = acquire_backfill_lock(checkpoint.path)
+    if not lock:
+        print("Another backfill is already running. Exiting.")
+        sys.exit(1)
+    if args.reset:
+        checkpoint.reset()
+    checkpoint.load()
+
+    backfill = AnalysisBackfill(checkpoint, skip_research=args.skip_research,
+                                processes=args.processes, batch_size=args.batch)
+    try:
+        backfill.run(max_stories=args.max_stories, page_size=args.page_size)
+    except KeyboardInterrupt:
+        print(f"\n[BACKFILL] Interrupted; resume from {checkpoint.cursor}")
@@ -16,6 +16,8 @@ import re
 from datetime import datetime, timedelta, date
 from collections import Counter, defaultdict
 
+from text_doc import doc_for
+
 # Configuration
 SUPABASE_URL = os.environ.get('SUPABASE_URL', 'https://dkxydhuojaspmbpjfyoz.supabase.co')
 SERVICE_KEY = os.environ.get('SERVICE_ROLE_SUPABASE', '') or os.environ.get('SUPABASE_SERVICE_KEY', '')
@@ -61,6 +63,12 @@ THEME_PATTERNS = {
     ]
 }
 
+# Compiled once at import
+THEME_RES = {
+    theme: [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+    for theme, patterns in THEME_PATTERNS.items()
+}
+
 # Entities patterns for extraction
 ENTITY_PATTERNS = {
     'people': [
@@ -129,15 +137,22 @@ def get_read_headers():
         'Content-Type': 'application/json'
     }
 
-def classify_theme(text):
-    """Classify text into thematic categories."""
-    text_lower = text.lower()
+def classify_theme(text, doc=None):
+    """Classify text into thematic categories.
+    
+    Themes are computed once per NormalizedDoc (doc, or the shared doc for
+    text) and reused by later calls for the same headline.
+    """
+    doc = doc or doc_for(text)
+    return doc.derive('themes', lambda: _rank_themes(doc.lower))
+
+def _rank_themes(text_lower):
     scores = {}
     
-    for theme, patterns in THEME_PATTERNS.items():
+    for theme, patterns in THEME_RES.items():
         score = 0
         for pattern in patterns:
-            matches = len(re.findall(pattern, text_lower, re.IGNORECASE))
+            matches = len(pattern.findall(text_lower))
             score += matches
         if score > 0:
             scores[theme] = score
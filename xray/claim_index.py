@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Xray Claim Index
+Per-story inverted index of research sources for claim verification
+
+Built once per story: every normalized token of a source's title and
+snippet maps to the ids of the sources containing it. Only sources at or
+above the required tier are indexed, so a claim is verified by walking
+the posting lists of its own tokens instead of re-tokenizing every source
+for every claim.
+"""
+
+from collections import Counter
+from typing import Dict, List
+
+MIN_OVERLAP = 3     # distinct shared tokens for a source to support a claim
+MAX_TIER = 2        # tier 1-2 sources only
+
+
+def tokens(text: str) -> set:
+    """Distinct normalized tokens (lowercase, whitespace split)"""
+    return set((text or '').lower().split())
+
+
+class SourceIndex:
+    """token -> source ids for the sources that may support claims"""
+
+    def __init__(self, sources: List[Dict], max_tier: int = MAX_TIER):
+        self.sources = []
+        self.postings = {}
+        for source in sources:
+            if source.get('tier', 4) > max_tier:
+                continue
+            source_id = len(self.sources)
+            self.sources.append(source)
+            for token in tokens(f"{source.get('title', '')} {source.get('snippet', '')}"):
+                self.postings.setdefault(token, []).append(source_id)
+
+    def supporting(self, claim_text: str, min_overlap: int = MIN_OVERLAP) -> List[Dict]:
+        """Sources sharing at least min_overlap distinct tokens with the claim"""
+        if not self.sources:
+            return []
+        hits = Counter()
+        for token in tokens(claim_text):
+            hits.update(self.postings.get(token, ()))
+        return [self.sources[i] for i, n in sorted(hits.items()) if n >= min_overlap]
+
+
+def verify_claims(claims: List[Dict], sources: List[Dict]) -> List[Dict]:
+    """Mark each claim confirmed (2+ sources), partially confirmed (1) or unverified"""
+    index = SourceIndex(sources)
+    for claim in claims:
+        supporting = index.supporting(claim['text'])
+        if len(supporting) >= 2:
+            claim['verified'] = True
+            claim['status'] = 'confirmed'
+            claim['sources'] = len(supporting)
+        elif len(supporting) == 1:
+            claim['verified'] = True
+            claim['status'] = 'partially_confirmed'
+            claim['sources'] = 1
+        else:
+            claim['verified'] = False
+            claim['status'] = 'unverified'
+    return claims
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Xray Entity Knowledge Base
+Local snapshot of Wikipedia context for every known entity
+
+get_context_for_entity only ever runs for the COUNTRIES, WORLD_LEADERS
+and ORGANIZATIONS tables in EnhancedEntityExtractor. This module
+prefetches those summaries in bulk (multi-title API calls, 20 titles per
+request) into a compact JSON file that is loaded once at startup, so
+Wikipedia context costs no network round trips on the hot path. Unknown
+entities still go to the network.
+
+Usage:
+  python entity_kb.py --build               # Build/refresh the snapshot
+  python entity_kb.py --build --path kb.json
+  python entity_kb.py                       # Show snapshot stats
+"""
+
+import os
+import re
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+KB_PATH = os.environ.get(
+    'XRAY_ENTITY_KB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'entity_kb.json')
+)
+KB_VERSION = 1
+TITLES_PER_REQUEST = 20  # extracts API limit with exintro
+
+
+def normalize_key(query: str) -> str:
+    return re.sub(r'\s+', ' ', (query or '').strip().lower())
+
+
+class EntityKnowledgeBase:
+    """Context summaries keyed by the normalized get_context_for_entity query"""
+
+    def __init__(self, path: str = KB_PATH):
+        self.path = path
+        self.entries = {}
+        self.built_at = None
+        self._lock = threading.Lock()
+        self.load()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get('version') == KB_VERSION:
+                self.entries = data.get('entries', {})
+                self.built_at = data.get('built_at')
+        except (OSError, ValueError) as e:
+            print(f"  [KB ERROR] Could not load {self.path}: {e}")
+
+    def get(self, query: str) -> Optional[Dict]:
+        return self.entries.get(normalize_key(query))
+
+    def put(self, query: str, summary: Dict):
+        with self._lock:
+            self.entries[normalize_key(query)] = summary
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({
+                'version': KB_VERSION,
+                'built_at': self.built_at,
+                'entries': self.entries
+            }, f, separators=(',', ':'), sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+def known_entity_queries(wiki, extractor) -> List[Tuple[str, str]]:
+    """(entity, entity_type) for every entity the extractor can emit"""
+    entities = []
+    for data in extractor.COUNTRIES.values():
+        entities.append((data['name'], 'country'))
+    for data in extractor.WORLD_LEADERS.values():
+        entities.append((data['name'], 'person'))
+    for data in extractor.ORGANIZATIONS.values():
+        entities.append((data['name'], 'org'))
+    # Distinct queries, stable order
+    seen = set()
+    unique = []
+    for entity, entity_type in entities:
+        query = wiki.context_query(entity, entity_type)
+        if normalize_key(query) not in seen:
+            seen.add(normalize_key(query))
+            unique.append((entity, entity_type))
+    return unique
+
+
+def build_knowledge_base(wiki, extractor, path: str = KB_PATH) -> EntityKnowledgeBase:
+    """Prefetch summaries for every known entity and write the snapshot"""
+    kb = EntityKnowledgeBase(path)
+    queries = [wiki.context_query(e, t) for e, t in known_entity_queries(wiki, extractor)]
+    print(f"[KB] Fetching {len(queries)} entities in batches of {TITLES_PER_REQUEST}")
+
+    resolved = {}
+    for i in range(0, len(queries), TITLES_PER_REQUEST):
+        resolved.update(wiki.get_summaries(queries[i:i + TITLES_PER_REQUEST]))
+
+    for query in queries:
+        summary = resolved.get(query)
+        if not summary:
+            # Ambiguous or non-existent title: fall back to search + summary
+            results = wiki.search(query, limit=1)
+            summary = wiki.get_summary(results[0]['title']) if results else {}
+        if summary:
+            kb.put(query, summary)
+        else:
+            print(f"  [KB] No article for {query}")
+
+    kb.built_at = datetime.now(timezone.utc).isoformat()
+    kb.save()
+    print(f"[KB] Wrote {len(kb)} entries to {path}")
+    return kb
+
+
+_DEFAULT_KB = None
+_DEFAULT_KB_LOCK = threading.Lock()
+
+
+def get_default_kb() -> EntityKnowledgeBase:
+    """Process-wide snapshot, loaded once"""
+    global _DEFAULT_KB
+    with _DEFAULT_KB_LOCK:
+        if _DEFAULT_KB is None:
+            _DEFAULT_KB = EntityKnowledgeBase()
+        return _DEFAULT_KB
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Xray entity knowledge base')
+    parser.add_argument('--build', action='store_true', help='Fetch all known entities and write the snapshot')
+    parser.add_argument('--path', default=KB_PATH, help='Snapshot file')
+    args = parser.parse_args()
+
+    if args.build:
+        from research_engine import WikipediaAPI, EnhancedEntityExtractor
+        build_knowledge_base(WikipediaAPI(kb=EntityKnowledgeBase(args.path)), EnhancedEntityExtractor(), args.path)
+    else:
+        kb = EntityKnowledgeBase(args.path)
+        print(f"{args.path}: {len(kb)} entries, built {kb.built_at or 'never'}")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Xray Gazetteer
+Single-pass multi-pattern entity matcher
+
+All aliases are compiled once into one trie-shaped regex with word
+boundaries, so matching costs one scan of the text regardless of how many
+people, places and organizations the gazetteer holds, and short aliases
+('un', 'us', 'eu') no longer match inside ordinary words.
+
+Entries live in data/gazetteer.json:
+  {"people": {alias: {...}}, "organizations": {...}, "countries": {...}}
+An entry with "match_case": true only matches when written in capitals
+(e.g. "US" but not the pronoun "us").
+"""
+
+import os
+import re
+import json
+from typing import Dict, List, Tuple
+
+GAZETTEER_PATH = os.environ.get(
+    'XRAY_GAZETTEER',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'gazetteer.json')
+)
+
+
+def _trie_pattern(aliases: List[str]) -> str:
+    """Build a regex alternation shaped like a trie over the aliases"""
+    trie = {}
+    for alias in aliases:
+        node = trie
+        for ch in alias:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def walk(node: Dict) -> str:
+        ends_here = '' in node
+        branches = [re.escape(ch) + walk(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not ends_here:
+            return branches[0]
+        body = '(?:' + '|'.join(branches) + ')'
+        return body + '?' if ends_here else body
+
+    return walk(trie)
+
+
+class Gazetteer:
+    """Compiled alias matcher over categorized entity tables"""
+
+    def __init__(self, categories: Dict[str, Dict[str, Dict]]):
+        self.categories = categories
+        self._lookup = {}
+        for category, entries in categories.items():
+            for alias, data in entries.items():
+                self._lookup.setdefault(alias.lower(), []).append((category, data))
+        aliases = sorted(self._lookup)
+        if aliases:
+            self._pattern = re.compile(r'(?<!\w)' + _trie_pattern(aliases) + r'(?!\w)', re.IGNORECASE)
+        else:
+            self._pattern = re.compile(r'(?!x)x')
+
+    @classmethod
+    def from_file(cls, path: str = GAZETTEER_PATH) -> 'Gazetteer':
+        with open(path) as f:
+            data = json.load(f)
+        return cls({k: v for k, v in data.items() if not k.startswith('_')})
+
+    def __len__(self):
+        return len(self._lookup)
+
+    def find(self, text: str) -> List[Tuple[str, Dict]]:
+        """All (category, entry) hits in order of appearance"""
+        hits = []
+        for m in self._pattern.finditer(text or ''):
+            surface = m.group(0)
+            for category, data in self._lookup.get(surface.lower(), []):
+                if data.get('match_case') and surface != surface.upper():
+                    continue
+                hits.append((category, data))
+        return hits
+
+
+# Compiled once at import
+GAZETTEER = Gazetteer.from_file()
@@ -24,6 +24,9 @@ def get_service_key():
 
 SERVICE_KEY = get_service_key()
 
+# Countries whose stories get a pin bonus (also used by scheduler.py)
+HIGH_PRIORITY_COUNTRIES = ['IR', 'IL', 'UA', 'RU', 'US', 'CN']
+
 class PinCalculator:
     """Calculate pin scores for stories"""
     
@@ -68,8 +71,7 @@ class PinCalculator:
                 pass
         
         # Source tier (high priority countries get bonus)
-        high_priority = ['IR', 'IL', 'UA', 'RU', 'US', 'CN']
-        if story.get('country_code') in high_priority:
+        if story.get('country_code') in HIGH_PRIORITY_COUNTRIES:
             score += 10
         
         return score
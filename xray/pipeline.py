@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Xray Streaming Pipeline
+research -> score -> analyze -> write, connected by bounded queues
+
+Each story flows through the stages on its own instead of waiting for the
+whole batch to finish a stage. Research is planned in small chunks (so the
+query planner still merges lookups across neighbouring stories), travels
+with the story into scoring and analysis, and the score and analysis
+columns are merged into one update per story and written back in bulk
+through SupabaseClient.queue_update. The writer flushes whenever it has
+caught up, so a story is never held back waiting for a full bulk batch.
+"""
+
+import queue
+import threading
+from typing import Callable, Dict, List
+
+QUEUE_SIZE = 16      # items buffered between stages
+RESEARCH_CHUNK = 5   # stories planned together by the research stage
+
+_DONE = object()
+
+
+class StoryPipeline:
+    """Streams stories through the truth and analysis engines"""
+
+    def __init__(self, truth_engine, analysis_engine, with_retry: Callable,
+                 workers: int = 1, queue_size: int = QUEUE_SIZE, chunk: int = RESEARCH_CHUNK,
+                 retry_queue=None):
+        self.truth = truth_engine
+        self.analysis = analysis_engine
+        self.research_engine = truth_engine.research_engine
+        self.db = truth_engine.db
+        self.with_retry = with_retry
+        self.retry_queue = retry_queue
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.chunk = max(1, chunk)
+        self.counts = {}
+        self.failed_writes = []  # [{'id', 'headline', 'error'}]
+        self._counts_lock = threading.Lock()
+        self._unflushed = {}     # story id -> item buffered in the client
+        self._write_q = None
+
+    def _count(self, key: str):
+        with self._counts_lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def _research_stage(self, items: List[Dict], out: queue.Queue):
+        for i in range(0, len(items), self.chunk):
+            chunk = items[i:i + self.chunk]
+            # Junk and confidently pre-scored stories that only came in for
+            # scoring need no research
+            wanted = [item['story'] for item in chunk
+                      if item['analyze'] or self._needs_research(item['story'])]
+            try:
+                self.research_engine.research_batch(wanted)
+            except Exception as e:
+                # Stages fall back to per-story research
+                print(f"  [PIPELINE] Research chunk failed: {e}")
+            for item in chunk:
+                out.put(item)
+
+    def _needs_research(self, story: Dict) -> bool:
+        return self.truth.is_quality_story(story) and self.truth.quick_score(story) is None
+
+    def _score(self, item: Dict):
+        story = item['story']
+        headline = story.get('headline', '')
+        if not self.truth.is_quality_story(story):
+            print(f"[TRUTH] Skipping junk: {headline[:50]}")
+            return
+        print(f"[TRUTH] Scoring: {headline[:50]}...")
+        # Research the analysis stage needs anyway also backs the score
+        if item['analyze'] or self.truth.quick_score(story) is None:
+            item['research'] = self.research_engine.research_for_story(story)
+        update = self.with_retry(
+            lambda s: self.truth.build_score_update(s, item['research']), story, 'truth'
+        )
+        if update:
+            item['update'].update(update)
+            item['scored'] = True
+        elif update is None:
+            self._count('deferred')
+
+    def _analyze(self, item: Dict):
+        story = item['story']
+        print(f"[ANALYSIS] Analyzing: {story.get('headline', '')[:50]}...")
+        if item.get('research') is None:
+            item['research'] = self.research_engine.research_for_story(story)
+        update = self.with_retry(
+            lambda s: self.analysis.build_analysis_update(s, item['research']), story, 'analysis'
+        )
+        if update is False:
+            return
+        item['update'].update(update)
+        # Without xray_analysis the stored analysis was kept (inputs unchanged)
+        item['analyzed'] = 'xray_analysis' in update
+
+    def _write(self, item: Dict):
+        item['research'] = None  # done with it, don't hold it in the queue
+        if not item['update']:
+            return
+        self._unflushed[item['story']['id']] = item
+        failed = self.db.queue_update('stories', item['story']['id'], item['update'])
+        if failed is None and self._write_q.empty():
+            # Nothing else is ready to write: flush now instead of holding
+            # the story until bulk_size updates have piled up
+            failed = self.db.flush_updates('stories')
+        if failed is not None:
+            self._settle(failed)
+
+    def _settle(self, failed: List[Dict]):
+        """Count every buffered story as written except the failed rows"""
+        errors = {f.get('id'): f.get('error', '') for f in failed}
+        for story_id, item in self._unflushed.items():
+            stages = [stage for stage, key in (('truth', 'scored'), ('analysis', 'analyzed')) if item.get(key)]
+            if self.retry_queue:
+                for stage in stages:
+                    if story_id in errors:
+                        self.retry_queue.record_failure(
+                            story_id, stage, errors[story_id], item['story'].get('headline', '')
+                        )
+                    else:
+                        self.retry_queue.resolve(story_id, stage)
+            if story_id in errors:
+                self._count('write_failed')
+                self.failed_writes.append({
+                    'id': story_id,
+                    'headline': item['story'].get('headline', '')[:50],
+                    'error': errors[story_id]
+                })
+                print(f"  [WRITE FAILED] {item['story'].get('headline', '')[:50]}: {errors[story_id]}")
+                continue
+            if item.get('scored'):
+                self._count('scored')
+                self.truth.scheduler.record_verdict(item['story'])
+            if item.get('analyzed'):
+                self._count('analyzed')
+        self._unflushed = {}
+
+    def _worker(self, step: Callable, inbox: queue.Queue, route: Callable):
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                break
+            try:
+                step(item)
+            except Exception as e:
+                print(f"  [PIPELINE ERROR] {item['story'].get('headline', '')[:50]}: {e}")
+            target = route(item)
+            if target is not None:
+                target.put(item)
+
+    def run(self, to_score: List[Dict], to_analyze: List[Dict]) -> Dict[str, int]:
+        """Score to_score (and analyze those still missing analysis) and
+        analyze to_analyze; returns counts by outcome."""
+        self.counts = {'scored': 0, 'analyzed': 0}
+        self.failed_writes = []
+        items = []
+        seen = set()
+        for story in to_score:
+            if story['id'] not in seen:
+                seen.add(story['id'])
+                items.append({'story': story, 'update': {}, 'research': None, 'score': True,
+                              'analyze': self.analysis.is_outdated(story)})
+        for story in to_analyze:
+            if story['id'] not in seen:
+                seen.add(story['id'])
+                items.append({'story': story, 'update': {}, 'research': None, 'score': False,
+                              'analyze': True})
+        if not items:
+            return self.counts
+
+        score_q = queue.Queue(self.queue_size)
+        analyze_q = queue.Queue(self.queue_size)
+        write_q = self._write_q = queue.Queue(self.queue_size)
+
+        def after_research(item):
+            return score_q if item['score'] else analyze_q
+
+        def after_score(item):
+            return analyze_q if item['analyze'] else write_q
+
+        # Research feeds both score_q and analyze_q, so the score workers
+        # must drain before analyze_q can be closed
+        researcher = threading.Thread(
+            target=self._research_stage, args=(items, _RoutingQueue(after_research)), daemon=True
+        )
+        scorers = [threading.Thread(target=self._worker, args=(self._score, score_q, after_score), daemon=True)
+                   for _ in range(self.workers)]
+        analysts = [threading.Thread(target=self._worker, args=(self._analyze, analyze_q, lambda i: write_q),
+                                     daemon=True)
+                    for _ in range(self.workers)]
+        writer = threading.Thread(target=self._worker, args=(self._write, write_q, lambda i: None), daemon=True)
+
+        for t in [researcher, writer] + scorers + analysts:
+            t.start()
+
+        researcher.join()
+        for _ in scorers:
+            score_q.put(_DONE)
+        for t in scorers:
+            t.join()
+        for _ in analysts:
+            analyze_q.put(_DONE)
+        for t in analysts:
+            t.join()
+        write_q.put(_DONE)
+        writer.join()
+        self._settle(self.db.flush_updates('stories'))
+        return self.counts
+
+
+class _RoutingQueue:
+    """Put-only facade that sends each item to the queue chosen by route"""
+
+    def __init__(self, route: Callable):
+        self.route = route
+
+    def put(self, item):
+        self.route(item).put(item)
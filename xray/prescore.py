@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Xray Pre-Score
+Offline text-signal scoring that decides which stories need web research
+
+A port of the local scorer from deprecated/truth_engine_v2.py: source tier,
+source count, official / verification / red-flag signal counts, numbers,
+specific locations, is_breaking and confidence_score. No network calls.
+Each signal list is compiled into one word-bounded alternation, so a story
+costs one regex scan per list instead of one substring search per term.
+
+Only confident-high pre-scores (at or above the top of the ambiguous
+band) are written as they are; everything else goes through full research.
+A low pre-score mostly means the text lacks signals, not that the story is
+false, so it is never trusted on its own. Scores are floored at the research
+scorer's base (40), so the pre-score never produces a verdict research
+could not.
+
+Environment:
+  XRAY_PRESCORE=0            Disable (research every story)
+  XRAY_PRESCORE_BAND=45,70   Ambiguous band [low, high); only >= high skips research
+
+Usage:
+  python prescore.py                 # Score a few sample headlines
+  python prescore.py --evaluate 500  # Compare with research verdicts of stored stories
+"""
+
+import os
+import re
+from typing import Dict, List, Tuple
+
+from source_reputation import SOURCE_REPUTATION, SourceReputation
+
+PRESCORE_ENABLED = os.environ.get('XRAY_PRESCORE', '1') != '0'
+# TruthEngineV5.calculate_score's starting score
+RESEARCH_BASE = 40
+AMBIGUOUS_BAND = tuple(int(x) for x in os.environ.get('XRAY_PRESCORE_BAND', '45,70').split(','))
+
+SOURCE_HIGH = ["reuters", "associated press", "ap news", "bbc", "bbc news", "the guardian",
+               "npr", "al jazeera", "dw", "france24", "sky news", "wall street journal",
+               "wsj", "euronews", "rfi", "afp", "bloomberg"]
+SOURCE_MED = ["cnn", "nbc", "abc news", "cbs", "fox news", "politico", "the hill",
+              "axios", "the independent", "the telegraph"]
+
+OFFICIAL_SIGNALS = [
+    "pentagon", "white house", "state department", "department of defense",
+    "nato", "united nations", "un secretary", "european union",
+    "ministry of defense", "foreign ministry", "prime minister",
+    "president", "spokesperson said", "official statement",
+    "kremlin", "idf", "fbi", "cia", "dod", "government announced"
+]
+
+VERIF_SIGNALS = [
+    "confirmed", "announced", "declared", "signed", "approved", "passed",
+    "killed", "died", "arrested", "launched", "deployed", "struck",
+    "according to", "identified", "released", "published", "revealed"
+]
+
+REDFLAG_SIGNALS = [
+    "could", "might", "may", "possibly", "perhaps", "allegedly",
+    "reportedly", "sources say", "unconfirmed", "speculation",
+    "opinion", "analysis", "editorial", "rumored", "anonymous sources"
+]
+
+SPECIFIC_LOCS = [
+    "tehran", "washington", "moscow", "beijing", "kyiv", "tel aviv",
+    "london", "paris", "berlin", "tokyo", "damascus", "gaza",
+    "kabul", "baghdad", "riyadh", "ottawa", "new york", "jerusalem"
+]
+
+
+def compile_terms(terms: List[str]) -> 're.Pattern':
+    """One word-bounded alternation, longest terms first"""
+    ordered = sorted(set(terms), key=len, reverse=True)
+    return re.compile(r'\b(?:' + '|'.join(map(re.escape, ordered)) + r')\b')
+
+
+OFFICIAL_RE = compile_terms(OFFICIAL_SIGNALS)
+VERIF_RE = compile_terms(VERIF_SIGNALS)
+REDFLAG_RE = compile_terms(REDFLAG_SIGNALS)
+LOCATION_RE = compile_terms(SPECIFIC_LOCS)
+# "may" as the month ("in May", "May 3") is not hedging
+MONTH_MAY_RE = re.compile(r'\b(?:(?:in|on|since|until|by|from|of|early|late|mid|next|last|this)[\s-]+may\b'
+                          r'|may\s+\d)')
+SOURCE_HIGH_RE = compile_terms(SOURCE_HIGH)
+SOURCE_MED_RE = compile_terms(SOURCE_MED)
+NUMBER_RE = re.compile(r'\b\d+\b')
+
+
+def count_signals(pattern: 're.Pattern', text: str) -> int:
+    """Distinct signal terms present in text"""
+    return len(set(pattern.findall(text)))
+
+
+class PreScorer:
+    """Local truth pre-score with an ambiguous band that needs research"""
+
+    def __init__(self, band: Tuple[int, int] = AMBIGUOUS_BAND, reputation: SourceReputation = None):
+        self.band = band
+        self.reputation = reputation or SOURCE_REPUTATION
+
+    def source_tier(self, story: Dict) -> int:
+        """Bonus for the story's source: domain tier first, then the feed name"""
+        tier = self.reputation.tier(story.get('external_url') or '')
+        if tier == 1:
+            return 20
+        if tier == 2:
+            return 10
+        name = (story.get('source_name') or '').lower()
+        if SOURCE_HIGH_RE.search(name):
+            return 20
+        if SOURCE_MED_RE.search(name):
+            return 10
+        return 0
+
+    def score(self, story: Dict) -> Dict:
+        """Pre-score a story; returns score, verdict, status and signal counts"""
+        text = ' '.join(story.get(k) or '' for k in ('headline', 'summary', 'full_text')).lower()
+        source_count = story.get('source_count') or 1
+        confidence = story.get('confidence_score') or 40
+
+        score = 38
+        tier = self.source_tier(story)
+        score += tier
+
+        if source_count >= 5:
+            score += 12
+        elif source_count >= 3:
+            score += 7
+        elif source_count >= 2:
+            score += 3
+
+        official = count_signals(OFFICIAL_RE, text)
+        score += min(official * 4, 16)
+
+        verif = count_signals(VERIF_RE, text)
+        score += min(verif * 3, 12)
+
+        nums = len(NUMBER_RE.findall(text))
+        if nums >= 5:
+            score += 6
+        elif nums >= 2:
+            score += 3
+
+        score += min(count_signals(LOCATION_RE, text) * 2, 6)
+
+        redflags = count_signals(REDFLAG_RE, MONTH_MAY_RE.sub(' ', text))
+        score -= min(redflags * 5, 20)
+
+        if story.get('is_breaking') and tier >= 10:
+            score += 4
+        if confidence >= 75:
+            score += 6
+        elif confidence >= 55:
+            score += 3
+
+        # Research scoring starts at 40 and never goes below it
+        score = max(RESEARCH_BASE, min(99, score))
+
+        # Same labels and cut-offs as TruthEngineV5.calculate_score
+        if score >= 70:
+            verdict = "VERIFIED"
+        elif score >= 55:
+            verdict = "MOSTLY VERIFIED"
+        else:
+            verdict = "UNVERIFIED"
+
+        return {
+            'score': score,
+            'verdict': verdict,
+            'status': 'verified' if score >= 55 else 'unverified',
+            'signals': {'official': official, 'verification': verif, 'redflags': redflags, 'tier': tier}
+        }
+
+    def score_batch(self, stories: List[Dict]) -> Dict[str, Dict]:
+        """story id -> pre-score for a batch"""
+        return {story['id']: self.score(story) for story in stories}
+
+    def is_ambiguous(self, prescore: Dict) -> bool:
+        low, high = self.band
+        return low <= prescore['score'] < high
+
+    def is_confident(self, prescore: Dict) -> bool:
+        """High enough to stand without research"""
+        return prescore['score'] >= self.band[1]
+
+
+def evaluate(limit: int):
+    """Pre-score vs the research score of stories with stored research.
+
+    Uses the story_research artifacts, so no searches run. Reports how the
+    stories the pre-score would finalize compare with their research verdicts.
+    """
+    from xray_engine_v5 import SERVICE_KEY, SUPABASE_URL, SupabaseClient, TruthEngineV5
+    from research_store import ResearchArtifactStore
+
+    db = SupabaseClient(SUPABASE_URL, SERVICE_KEY)
+    store = ResearchArtifactStore(SUPABASE_URL, SERVICE_KEY)
+    truth = TruthEngineV5(db)
+    scorer = PreScorer()
+    stories = db.fetch('stories', select=TruthEngineV5.SELECT, filters={'xray_score': 'gt.0'},
+                       order='created_at.desc', limit=limit)
+    research = {}
+    for i in range(0, len(stories), 100):
+        research.update(store.load_many([s['id'] for s in stories[i:i + 100]]))
+
+    compared = confident = verdict_match = status_match = 0
+    diffs = []
+    for story in stories:
+        if story['id'] not in research:
+            continue
+        score, verdict, _ = truth.calculate_score(story, research[story['id']])
+        if score is None:
+            continue
+        compared += 1
+        pre = scorer.score(story)
+        if not scorer.is_confident(pre):
+            continue
+        confident += 1
+        verdict_match += pre['verdict'] == verdict
+        status_match += pre['status'] == ('verified' if score >= 55 else 'unverified')
+        diffs.append(abs(pre['score'] - score))
+
+    print(f"{compared} stories with stored research, {confident} would skip research")
+    if confident:
+        print(f"  verdict agreement: {verdict_match / confident:.1%}")
+        print(f"  status agreement:  {status_match / confident:.1%}")
+        print(f"  mean |score diff|: {sum(diffs) / confident:.1f}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Xray offline pre-score')
+    parser.add_argument('--evaluate', type=int, metavar='N', default=0,
+                        help='Compare with research scores of the N newest scored stories')
+    args = parser.parse_args()
+    if args.evaluate:
+        evaluate(args.evaluate)
+        raise SystemExit
+
+    scorer = PreScorer()
+    for headline in [
+        "Pentagon confirmed 3 strikes near Damascus, according to the defense ministry",
+        "Analysts say sanctions could possibly reshape the oil market",
+        "Prime minister announced new budget",
+    ]:
+        result = scorer.score({'id': headline, 'headline': headline, 'source_name': 'Reuters'})
+        band = 'final' if scorer.is_confident(result) else 'research'
+        print(f"{result['score']:>3} {result['verdict']:<16} {band:<8} {headline}")
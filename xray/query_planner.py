@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Xray Batch Query Planner
+Plans research for a whole batch of stories so shared queries run once
+
+Clustered news produces near-identical lookups: 20 stories about the same
+strike all ask DuckDuckGo and the fact-checkers the same thing. The planner
+normalizes every story's lookups, merges stories in the same
+story_thread_id (and headlines that overlap heavily) onto one set of
+site searches, runs each unique lookup once and fans the results back out
+into per-story research dicts identical in shape to research_story().
+"""
+
+import re
+import copy
+from typing import Dict, List, Tuple
+
+# Jaccard overlap above which two queries are treated as the same search
+MERGE_THRESHOLD = 0.75
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace"""
+    return re.sub(r'\s+', ' ', re.sub(r'[^\w\s:.]', ' ', (query or '').lower())).strip()
+
+
+def query_tokens(query: str) -> frozenset:
+    return frozenset(w for w in normalize_query(query).split() if not w.startswith('site:'))
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class QueryPlanner:
+    """Deduplicate and merge research lookups across a batch of stories"""
+
+    def __init__(self, research_engine, merge_threshold: float = MERGE_THRESHOLD):
+        self.engine = research_engine
+        self.merge_threshold = merge_threshold
+
+    def _canonical(self, kind: str, query: str, planned: Dict[str, List[Tuple[frozenset, tuple]]]) -> tuple:
+        """Map a lookup onto an already planned one when it overlaps heavily"""
+        if kind == 'wiki':
+            return (kind, (query,))
+        tokens = query_tokens(query)
+        site = query.split(' ', 1)[0] if query.startswith('site:') else ''
+        for other_tokens, lookup in planned.setdefault((kind, site), []):
+            if tokens == other_tokens or jaccard(tokens, other_tokens) >= self.merge_threshold:
+                return lookup
+        lookup = (kind, (query,))
+        planned[(kind, site)].append((tokens, lookup))
+        return lookup
+
+    def plan(self, stories: List[Dict]) -> Dict:
+        """Build the per-story lookup lists and the set of unique lookups.
+
+        Returns {'stories': {story_id: (entities, [lookup, ...])},
+                 'unique': [lookup, ...], 'requested': int}
+        """
+        planned = {}
+        thread_anchor = {}
+        per_story = {}
+        unique = []
+        seen = set()
+        requested = 0
+
+        for story in stories:
+            story_id = story['id']
+            headline = story.get('headline', '')
+            summary = story.get('summary', '') or ''
+
+            # Stories in the same thread share the first member's site searches
+            thread_id = story.get('story_thread_id')
+            site_headline = thread_anchor.setdefault(thread_id, headline) if thread_id else headline
+
+            entities, lookups = self.engine.plan_lookups(headline, summary)
+            story_lookups = []
+            for kind, args in lookups:
+                query = args[0]
+                if kind in ('fact_check', 'official') and site_headline != headline:
+                    query = query.split(' ', 1)[0] + ' ' + site_headline
+                lookup = self._canonical(kind, query, planned)
+                story_lookups.append((kind, args, lookup))
+                requested += 1
+                if lookup not in seen:
+                    seen.add(lookup)
+                    unique.append(lookup)
+            per_story[story_id] = (entities, story_lookups)
+
+        return {'stories': per_story, 'unique': unique, 'requested': requested}
+
+    def execute(self, plan: Dict) -> Dict[str, Dict]:
+        """Run every unique lookup once and assemble each story's research"""
+        unique = plan['unique']
+        outcomes = self.engine._run_calls([(self.engine.run_lookup, lookup) for lookup in unique])
+        by_lookup = dict(zip(unique, outcomes))
+
+        research = {}
+        for story_id, (entities, story_lookups) in plan['stories'].items():
+            pairs = []
+            for kind, args, lookup in story_lookups:
+                # Copies so per-story consumers can annotate results safely
+                pairs.append(((kind, args), copy.deepcopy(by_lookup.get(lookup))))
+            research[story_id] = self.engine.assemble_research(entities, pairs)
+        return research
+
+    def research_batch(self, stories: List[Dict]) -> Dict[str, Dict]:
+        """Plan and execute research for a batch, keyed by story id"""
+        if not stories:
+            return {}
+        plan = self.plan(stories)
+        print(f"[PLANNER] {len(stories)} stories: {plan['requested']} lookups -> "
+              f"{len(plan['unique'])} unique")
+        return self.execute(plan)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Xray Host Rate Limiter
+Per-host token buckets shared by every outbound fetcher
+
+Each host gets its own bucket (rate + burst) and an in-flight cap, so
+Wikipedia, DuckDuckGo and Supabase calls no longer wait on each other.
+A 429/403 response halves the host's effective rate (and honours
+Retry-After); successful responses recover it gradually.
+
+Limits can be overridden with XRAY_RATE_LIMITS, e.g.
+  XRAY_RATE_LIMITS="en.wikipedia.org=5:10:4,html.duckduckgo.com=1:3"
+(host=rate_per_second:burst[:max_in_flight]).
+
+Set XRAY_RATE_LIMIT_DIR to share bucket state between processes on the
+same machine (state files are guarded with fcntl locks).
+
+Requests go through one pooled requests.Session, so connections are kept
+alive across calls (and across runs in --daemon mode).
+"""
+
+import os
+import json
+import time
+import fcntl
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from typing import Dict, Optional, Tuple
+
+SUPABASE_HOST = urlparse(
+    os.environ.get('SUPABASE_URL', '') or 'https://dkxydhuojaspmbpjfyoz.supabase.co'
+).hostname
+
+# host -> (requests per second, burst, max in-flight)
+DEFAULT_HOST_LIMITS = {
+    'en.wikipedia.org': (5.0, 10, 4),
+    'html.duckduckgo.com': (1.0, 3, 3),
+    SUPABASE_HOST: (20.0, 40, 8),
+}
+DEFAULT_LIMIT = (2.0, 2, 2)
+
+# Adaptive slowdown
+THROTTLE_STATUSES = {403, 429}
+BACKOFF_FACTOR = 0.5       # multiply effective rate on every 429/403
+MIN_RATE_FACTOR = 0.05     # never slow below 5% of the configured rate
+RECOVERY_FACTOR = 1.1      # multiply back up on every success
+DEFAULT_PENALTY_SECONDS = 5.0
+
+# Keep-alive connections per host in the shared session
+POOL_SIZE = 16
+
+
+def parse_limits(spec: str) -> Dict[str, Tuple[float, int, int]]:
+    """Parse XRAY_RATE_LIMITS into {host: (rate, burst, max_in_flight)}"""
+    limits = {}
+    for item in (spec or '').split(','):
+        if '=' not in item:
+            continue
+        host, values = item.split('=', 1)
+        parts = values.split(':')
+        try:
+            rate = float(parts[0])
+            burst = int(parts[1]) if len(parts) > 1 else max(1, int(rate))
+            in_flight = int(parts[2]) if len(parts) > 2 else DEFAULT_LIMIT[2]
+        except ValueError:
+            print(f"  [RATE LIMIT] Ignoring bad spec: {item}")
+            continue
+        limits[host.strip()] = (rate, burst, in_flight)
+    return limits
+
+
+class TokenBucket:
+    """Token bucket with adaptive rate, optionally shared through a state file"""
+
+    def __init__(self, rate: float, burst: int, state_path: Optional[str] = None):
+        self.rate = rate
+        self.burst = burst
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self._state = {
+            'tokens': float(burst),
+            'updated': time.time(),
+            'factor': 1.0,
+            'blocked_until': 0.0
+        }
+
+    @contextmanager
+    def _locked_state(self):
+        """Yield the bucket state, loading/saving it from disk when shared"""
+        with self._lock:
+            if not self.state_path:
+                yield self._state
+                return
+            with open(self.state_path, 'a+') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0)
+                    raw = f.read()
+                    if raw:
+                        try:
+                            self._state = json.loads(raw)
+                        except ValueError:
+                            pass
+                    yield self._state
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps(self._state))
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refill(self, state: Dict, now: float):
+        elapsed = max(0.0, now - state['updated'])
+        rate = self.rate * state['factor']
+        state['tokens'] = min(float(self.burst), state['tokens'] + elapsed * rate)
+        state['updated'] = now
+
+    def try_acquire(self) -> float:
+        """Take a token; return 0 on success or the seconds to wait"""
+        with self._locked_state() as state:
+            now = time.time()
+            if now < state['blocked_until']:
+                return state['blocked_until'] - now
+            self._refill(state, now)
+            if state['tokens'] >= 1.0:
+                state['tokens'] -= 1.0
+                return 0.0
+            return (1.0 - state['tokens']) / (self.rate * state['factor'])
+
+    def acquire(self):
+        """Block until a token is available"""
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def penalize(self, retry_after: Optional[float] = None):
+        """Slow down after the host pushed back"""
+        with self._locked_state() as state:
+            now = time.time()
+            self._refill(state, now)
+            state['factor'] = max(MIN_RATE_FACTOR, state['factor'] * BACKOFF_FACTOR)
+            state['tokens'] = 0.0
+            pause = retry_after if retry_after is not None else DEFAULT_PENALTY_SECONDS / state['factor']
+            state['blocked_until'] = max(state['blocked_until'], now + pause)
+
+    def reward(self):
+        """Recover towards the configured rate after a good response"""
+        with self._locked_state() as state:
+            if state['factor'] < 1.0:
+                state['factor'] = min(1.0, state['factor'] * RECOVERY_FACTOR)
+
+    @property
+    def factor(self) -> float:
+        with self._locked_state() as state:
+            return state['factor']
+
+
+class HostRateLimiter:
+    """Rate limiter keyed by host"""
+
+    def __init__(self, limits: Dict[str, Tuple[float, int, int]] = None,
+                 state_dir: Optional[str] = None):
+        self.limits = dict(DEFAULT_HOST_LIMITS)
+        self.limits.update(limits or {})
+        self.state_dir = state_dir
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+        self._buckets = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _limit_for(self, host: str) -> Tuple[float, int, int]:
+        return self.limits.get(host, DEFAULT_LIMIT)
+
+    def bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                rate, burst, _ = self._limit_for(host)
+                state_path = os.path.join(self.state_dir, f"{host}.json") if self.state_dir else None
+                bucket = TokenBucket(rate, burst, state_path)
+                self._buckets[host] = bucket
+            return bucket
+
+    def _slot(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            slot = self._slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self._limit_for(host)[2])
+                self._slots[host] = slot
+            return slot
+
+    def acquire(self, url: str):
+        """Wait for the url's host bucket"""
+        self.bucket(urlparse(url).hostname or '').acquire()
+
+    def record(self, url: str, status_code: int, retry_after: Optional[str] = None):
+        """Feed a response status back so the host's rate adapts"""
+        host = urlparse(url).hostname or ''
+        bucket = self.bucket(host)
+        if status_code in THROTTLE_STATUSES:
+            delay = None
+            if retry_after:
+                try:
+                    delay = float(retry_after)
+                except ValueError:
+                    delay = None
+            bucket.penalize(delay)
+            print(f"  [RATE LIMIT] {host} returned {status_code}, slowing to {bucket.factor:.0%}")
+        elif 200 <= status_code < 400:
+            bucket.reward()
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Rate-limited request on the shared keep-alive session"""
+        host = urlparse(url).hostname or ''
+        with self._slot(host):
+            self.bucket(host).acquire()
+            resp = self.session.request(method, url, **kwargs)
+        self.record(url, resp.status_code, resp.headers.get('Retry-After'))
+        return resp
+
+
+# Shared process-wide limiter
+RATE_LIMITER = HostRateLimiter(
+    parse_limits(os.environ.get('XRAY_RATE_LIMITS', '')),
+    os.environ.get('XRAY_RATE_LIMIT_DIR') or None
+)
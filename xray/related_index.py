@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Xray Related Story Index
+Resident sliding-window index of recent stories
+
+Replaces the per-story PostgREST query in find_related_stories. Recent
+stories are loaded incrementally from the stories table (created_at
+cursor), indexed by country, extracted entities and headline keywords,
+and evicted once they fall out of the window. Lookups are answered
+locally and ranked by entity and keyword overlap rather than recency.
+
+Loading the window costs a full page-through of the last WINDOW_HOURS, so
+the index is only worth keeping in the long-running daemon. Until a refresh
+has loaded the window completely (see loaded), callers use the PostgREST
+query instead.
+"""
+
+import re
+import time
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional, Set
+
+from rate_limiter import RATE_LIMITER, HostRateLimiter
+
+WINDOW_HOURS = 72
+PAGE_SIZE = 1000
+REFRESH_INTERVAL = 60  # seconds between incremental loads
+
+# Ranking weights
+ENTITY_WEIGHT = 3.0
+COUNTRY_WEIGHT = 1.0
+KEYWORD_WEIGHT = 1.0
+
+STOP_WORDS = {
+    'this', 'that', 'with', 'from', 'have', 'been', 'will', 'would', 'could',
+    'about', 'after', 'before', 'into', 'through', 'during', 'over', 'says',
+    'said', 'amid', 'more', 'than', 'they', 'their', 'what', 'when', 'where',
+    'breaking', 'shocking', 'urgent', 'news', 'report', 'reports', 'latest'
+}
+
+
+def headline_keywords(text: str) -> Set[str]:
+    return {w for w in re.findall(r'\b[a-z]{4,}\b', (text or '').lower()) if w not in STOP_WORDS}
+
+
+def entity_terms(entities: Dict) -> Set[str]:
+    """Flatten extracted entities into index terms"""
+    terms = set()
+    for p in entities.get('people', []):
+        terms.add('person:' + p['name'])
+    for o in entities.get('organizations', []):
+        terms.add('org:' + o['name'])
+    for c in entities.get('countries', []):
+        terms.add('country:' + c['code'])
+    return terms
+
+
+def _parse_ts(value: str) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+
+
+class RelatedStoryIndex:
+    """In-memory index of stories from the last WINDOW_HOURS"""
+
+    def __init__(self, url: str, key: str, extractor, limiter: HostRateLimiter = None,
+                 window_hours: int = WINDOW_HOURS, refresh_interval: int = REFRESH_INTERVAL):
+        self.url = url
+        self.extractor = extractor
+        self.limiter = limiter or RATE_LIMITER
+        self.window = timedelta(hours=window_hours)
+        self.refresh_interval = refresh_interval
+        self.headers = {
+            'apikey': key,
+            'Authorization': f'Bearer {key}',
+            'Content-Type': 'application/json'
+        }
+        self.stories = {}                 # id -> row + '_terms', '_keywords', '_ts'
+        self.postings = defaultdict(set)  # term -> story ids
+        self.cursor = None                # newest created_at loaded
+        self.loaded = False               # a refresh has completed the window
+        self._last_refresh = 0.0
+        self._refreshing = False
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.stories)
+
+    def add(self, story: Dict):
+        """Index one story row"""
+        ts = _parse_ts(story.get('created_at', ''))
+        if ts is None or not story.get('id'):
+            return
+        text = f"{story.get('headline', '')} {story.get('summary', '') or ''}"
+        terms = entity_terms(self.extractor.extract(text))
+        if story.get('country_code'):
+            terms.add('country:' + story['country_code'])
+        keywords = headline_keywords(story.get('headline', ''))
+        with self._lock:
+            if story['id'] in self.stories:
+                self._remove(story['id'])
+            self.stories[story['id']] = dict(story, _terms=terms, _keywords=keywords, _ts=ts)
+            for term in terms | {'kw:' + k for k in keywords}:
+                self.postings[term].add(story['id'])
+            if self.cursor is None or ts > self.cursor:
+                self.cursor = ts
+
+    def _remove(self, story_id: str):
+        row = self.stories.pop(story_id, None)
+        if not row:
+            return
+        for term in row['_terms'] | {'kw:' + k for k in row['_keywords']}:
+            ids = self.postings.get(term)
+            if ids:
+                ids.discard(story_id)
+                if not ids:
+                    del self.postings[term]
+
+    def evict(self, now: datetime = None) -> int:
+        """Drop stories older than the window"""
+        cutoff = (now or datetime.now(timezone.utc)) - self.window
+        with self._lock:
+            stale = [sid for sid, row in self.stories.items() if row['_ts'] < cutoff]
+            for sid in stale:
+                self._remove(sid)
+        return len(stale)
+
+    def refresh(self, force: bool = False) -> int:
+        """Incrementally load stories newer than the cursor.
+        
+        Sets loaded once a refresh pages through to the newest story; a
+        failed refresh keeps what it had and resumes from the cursor. Only
+        one refresh runs at a time; concurrent callers return 0 at once.
+        """
+        with self._lock:
+            due = force or time.time() - self._last_refresh >= self.refresh_interval
+            if self._refreshing or not due:
+                return 0
+            self._last_refresh = time.time()
+            self._refreshing = True
+        try:
+            return self._load()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _load(self) -> int:
+        """Page stories newer than the cursor into the index"""
+        self.evict()
+
+        start = self.cursor or (datetime.now(timezone.utc) - self.window)
+        loaded = 0
+        while True:
+            try:
+                resp = self.limiter.request(
+                    'GET',
+                    f"{self.url}/rest/v1/stories",
+                    headers=self.headers,
+                    params={
+                        'select': 'id,headline,summary,created_at,country_name,country_code',
+                        'created_at': f'gte.{start.isoformat()}',
+                        'order': 'created_at.asc,id.asc',
+                        'limit': PAGE_SIZE
+                    },
+                    timeout=30
+                )
+            except Exception as e:
+                print(f"  [RELATED INDEX ERROR] {e}")
+                break
+            if resp.status_code != 200:
+                print(f"  [RELATED INDEX ERROR] {resp.status_code} {resp.text[:100]}")
+                break
+            page = resp.json()
+            rows = [r for r in page if r.get('id') not in self.stories]
+            for row in rows:
+                self.add(row)
+            loaded += len(rows)
+            if len(page) < PAGE_SIZE:
+                self.loaded = True
+                break
+            newest = _parse_ts(page[-1].get('created_at', ''))
+            if newest is None or newest <= start:
+                self.loaded = True
+                break
+            start = newest
+        return loaded
+
+    def find_related(self, story_id: str, entities: Dict, headline: str = '',
+                     limit: int = 5, hours: int = None) -> List[Dict]:
+        """Rank indexed stories from the last hours (default: the whole
+        window) by entity, country and keyword overlap"""
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=hours) if hours else None
+        terms = entity_terms(entities)
+        keywords = headline_keywords(headline)
+        if not terms and not keywords:
+            return []
+
+        scores = defaultdict(float)
+        shared_entities = defaultdict(int)
+        shared_keywords = defaultdict(int)
+        with self._lock:
+            for term in terms:
+                weight = COUNTRY_WEIGHT if term.startswith('country:') else ENTITY_WEIGHT
+                for sid in self.postings.get(term, ()):
+                    scores[sid] += weight
+                    shared_entities[sid] += 1
+            for kw in keywords:
+                for sid in self.postings.get('kw:' + kw, ()):
+                    scores[sid] += KEYWORD_WEIGHT
+                    shared_keywords[sid] += 1
+            scores.pop(story_id, None)
+            # A single shared common word is not enough to call stories related
+            candidates = [
+                (sid, score) for sid, score in scores.items()
+                if (shared_entities[sid] or shared_keywords[sid] >= 2)
+                and (cutoff is None or self.stories[sid]['_ts'] >= cutoff)
+            ]
+            ranked = sorted(
+                candidates,
+                key=lambda item: (item[1], self.stories[item[0]]['_ts']),
+                reverse=True
+            )[:limit]
+            return [
+                {k: self.stories[sid].get(k) for k in ('id', 'headline', 'created_at', 'country_name')}
+                for sid, _ in ranked
+            ]
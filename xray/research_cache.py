@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Xray Research Cache
+Persistent SQLite cache for Wikipedia and search lookups
+
+Entries are keyed by (source, normalized query) and expire on a
+per-source TTL: Wikipedia articles change slowly, search results do not.
+The table is bounded by entry count and evicts least-recently-used rows.
+
+Environment:
+  XRAY_CACHE_DIR          Cache directory (default: xray/cache)
+  XRAY_RESEARCH_CACHE=0   Disable the cache entirely
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+CACHE_DIR = os.environ.get(
+    'XRAY_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+)
+CACHE_FILE = 'research_cache.sqlite3'
+
+# TTL in seconds per source
+SOURCE_TTLS = {
+    'wiki_search': 7 * 24 * 3600,
+    'wiki_summary': 7 * 24 * 3600,
+    'ddg': 2 * 3600,
+}
+DEFAULT_TTL = 3600
+
+MAX_ENTRIES = 50000
+EVICT_CHECK_EVERY = 200  # writes between size checks
+
+
+class ResearchCache:
+    """Size-bounded LRU cache with per-source TTL, backed by SQLite"""
+
+    def __init__(self, path: str = None, ttls: Dict[str, int] = None,
+                 max_entries: int = MAX_ENTRIES):
+        if path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            path = os.path.join(CACHE_DIR, CACHE_FILE)
+        self.path = path
+        self.ttls = dict(SOURCE_TTLS)
+        self.ttls.update(ttls or {})
+        self.max_entries = max_entries
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                source      TEXT NOT NULL,
+                key         TEXT NOT NULL,
+                value       TEXT NOT NULL,
+                created_at  REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (source, key)
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed_at)')
+        self._conn.commit()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Normalize a query so trivially different spellings share an entry"""
+        return re.sub(r'\s+', ' ', (query or '').strip().lower())
+
+    def get(self, source: str, query: str) -> Optional[Any]:
+        """Return the cached value or None on miss/expiry"""
+        key = self.normalize(query)
+        now = time.time()
+        ttl = self.ttls.get(source, DEFAULT_TTL)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, created_at FROM entries WHERE source = ? AND key = ?',
+                (source, key)
+            ).fetchone()
+            if row and now - row[1] <= ttl:
+                self._conn.execute(
+                    'UPDATE entries SET accessed_at = ? WHERE source = ? AND key = ?',
+                    (now, source, key)
+                )
+                self._conn.commit()
+                self.hits[source] += 1
+                return json.loads(row[0])
+            if row:
+                self._conn.execute('DELETE FROM entries WHERE source = ? AND key = ?', (source, key))
+                self._conn.commit()
+            self.misses[source] += 1
+            return None
+
+    def set(self, source: str, query: str, value: Any):
+        """Store a value, evicting LRU entries when over capacity"""
+        key = self.normalize(query)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO entries (source, key, value, created_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (source, key, json.dumps(value), now, now)
+            )
+            self._writes += 1
+            if self._writes % EVICT_CHECK_EVERY == 0:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        count = self._conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                'DELETE FROM entries WHERE rowid IN '
+                '(SELECT rowid FROM entries ORDER BY accessed_at ASC LIMIT ?)',
+                (overflow,)
+            )
+
+    def purge_expired(self) -> int:
+        """Drop every expired entry, returns rows removed"""
+        now = time.time()
+        removed = 0
+        with self._lock:
+            sources = [r[0] for r in self._conn.execute('SELECT DISTINCT source FROM entries')]
+            for source in sources:
+                cur = self._conn.execute(
+                    'DELETE FROM entries WHERE source = ? AND created_at < ?',
+                    (source, now - self.ttls.get(source, DEFAULT_TTL))
+                )
+                removed += cur.rowcount
+            self._conn.commit()
+        return removed
+
+    def stats(self) -> Dict:
+        """Hit/miss counters per source plus totals"""
+        sources = sorted(set(self.hits) | set(self.misses))
+        hits = sum(self.hits.values())
+        misses = sum(self.misses.values())
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'entries': entries,
+            'by_source': {s: {'hits': self.hits[s], 'misses': self.misses[s]} for s in sources}
+        }
+
+
+_DEFAULT_CACHE = None
+_DEFAULT_CACHE_LOCK = threading.Lock()
+
+
+def get_default_cache() -> Optional[ResearchCache]:
+    """Shared process-wide cache, or None when disabled"""
+    global _DEFAULT_CACHE
+    if os.environ.get('XRAY_RESEARCH_CACHE', '1') == '0':
+        return None
+    with _DEFAULT_CACHE_LOCK:
+        if _DEFAULT_CACHE is None:
+            try:
+                _DEFAULT_CACHE = ResearchCache()
+            except (OSError, sqlite3.Error) as e:
+                print(f"  [CACHE ERROR] {e}")
+                return None
+        return _DEFAULT_CACHE
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Xray research cache maintenance')
+    parser.add_argument('--purge', action='store_true', help='Remove expired entries')
+    args = parser.parse_args()
+
+    cache = ResearchCache()
+    if args.purge:
+        print(f"Purged {cache.purge_expired()} expired entries")
+    print(json.dumps(cache.stats(), indent=2))
@@ -8,20 +8,20 @@ import os
 import time
 import re
 import json
-import requests
-# Rate limiting for external APIs
-LAST_API_CALL = 0
-MIN_API_INTERVAL = 0.5  # 500ms between calls to avoid IP bans
-
-def rate_limit():
-    global LAST_API_CALL
-    elapsed = time.time() - LAST_API_CALL
-    if elapsed < MIN_API_INTERVAL:
-        time.sleep(MIN_API_INTERVAL - elapsed)
-    LAST_API_CALL = time.time()
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from rate_limiter import RATE_LIMITER, HostRateLimiter
+from research_cache import ResearchCache, get_default_cache
+from entity_kb import EntityKnowledgeBase, get_default_kb
+from gazetteer import GAZETTEER
+from source_reputation import SOURCE_REPUTATION, SourceReputation
+from research_store import ResearchArtifactStore
+from query_planner import QueryPlanner
+from thread_research import ThreadResearchPlanner, ThreadResearchStore
+from text_doc import NormalizedDoc, doc_for
 
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from collections import defaultdict
 
 # Load environment
@@ -38,6 +38,94 @@ def get_service_key():
 
 SERVICE_KEY = get_service_key()
 
+# Circuit breaker: consecutive failures before a backend is skipped, and how
+# long it stays skipped before a single probe request is let through
+BREAKER_THRESHOLD = int(os.environ.get('XRAY_BREAKER_THRESHOLD', '3'))
+BREAKER_COOLDOWN = float(os.environ.get('XRAY_BREAKER_COOLDOWN', '300'))
+
+
+class BackendUnavailable(Exception):
+    """A search backend failed or its circuit breaker is open"""
+    
+    def __init__(self, backend: str, reason: str = 'circuit open'):
+        super().__init__(f"{backend}: {reason}")
+        self.backend = backend
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one backend"""
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, name: str, failure_threshold: int = BREAKER_THRESHOLD,
+                 cooldown: float = BREAKER_COOLDOWN):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = 0.0
+        self._state = self.CLOSED
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.time() - self.opened_at >= self.cooldown:
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            return self._state
+    
+    def allow(self) -> bool:
+        """Whether a request may go out now (half-open lets one probe through)"""
+        state = self.state
+        with self._lock:
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                print(f"  [BREAKER] {self.name} recovered, closing")
+            self._state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or (
+                    self._state == self.CLOSED and self.failures >= self.failure_threshold):
+                self._state = self.OPEN
+                self.opened_at = time.time()
+                print(f"  [BREAKER] {self.name} open for {self.cooldown:.0f}s "
+                      f"after {self.failures} failures")
+
+
+# One breaker per backend, shared by every engine in the process
+BREAKERS = {}
+_BREAKERS_LOCK = threading.Lock()
+
+def get_breaker(backend: str) -> CircuitBreaker:
+    with _BREAKERS_LOCK:
+        if backend not in BREAKERS:
+            BREAKERS[backend] = CircuitBreaker(backend)
+        return BREAKERS[backend]
+
+
+class SkippedLookup:
+    """Outcome of a lookup that could not run because its backend was down"""
+    
+    def __init__(self, backend: str):
+        self.backend = backend
+
 
 class WikipediaAPI:
     """Wikipedia API for background research"""
@@ -45,8 +133,44 @@ class WikipediaAPI:
     BASE_URL = "https://en.wikipedia.org/api/rest_v1"
     API_URL = "https://en.wikipedia.org/w/api.php"
     
+    # Search prefixes per entity type for context lookups
+    CONTEXT_PREFIXES = {
+        'place': '',
+        'person': '',
+        'org': '',
+        'country': 'Politics of ',
+        'conflict': ''
+    }
+    
+    def __init__(self, limiter: HostRateLimiter = None, cache: ResearchCache = None,
+                 kb: EntityKnowledgeBase = None):
+        self.limiter = limiter or RATE_LIMITER
+        self.cache = cache or get_default_cache()
+        self.kb = kb if kb is not None else get_default_kb()
+        self.breaker = get_breaker('wikipedia')
+    
+    def _request(self, url: str, **kwargs):
+        """Rate-limited GET guarded by the Wikipedia circuit breaker"""
+        if not self.breaker.allow():
+            raise BackendUnavailable('wikipedia')
+        try:
+            resp = self.limiter.request('GET', url, **kwargs)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        if resp.status_code >= 500 or resp.status_code in (403, 429):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return resp
+    
     def search(self, query: str, limit: int = 3) -> List[Dict]:
         """Search Wikipedia for articles"""
+        cache_key = f"{limit}:{query}"
+        if self.cache:
+            cached = self.cache.get('wiki_search', cache_key)
+            if cached is not None:
+                return cached
         try:
             params = {
                 'action': 'opensearch',
@@ -54,8 +178,7 @@ class WikipediaAPI:
                 'limit': limit,
                 'format': 'json'
             }
-            rate_limit()
-            resp = requests.get(self.API_URL, params=params, timeout=10)
+            resp = self._request(self.API_URL, params=params, timeout=10)
             if resp.status_code == 200:
                 data = resp.json()
                 results = []
@@ -66,43 +189,107 @@ class WikipediaAPI:
                             'url': data[3][i] if i < len(data[3]) else '',
                             'source': 'wikipedia'
                         })
+                if self.cache:
+                    self.cache.set('wiki_search', cache_key, results)
                 return results
+        except BackendUnavailable:
+            pass
         except Exception as e:
             print(f"  [WIKI ERROR] {e}")
         return []
     
     def get_summary(self, title: str) -> Dict:
         """Get summary of a Wikipedia article"""
+        if self.cache:
+            cached = self.cache.get('wiki_summary', title)
+            if cached is not None:
+                return cached
         try:
             # Use REST API for summary
             url = f"{self.BASE_URL}/page/summary/{title.replace(' ', '_')}"
-            rate_limit()
-            resp = requests.get(url, timeout=10)
+            resp = self._request(url, timeout=10)
             if resp.status_code == 200:
                 data = resp.json()
-                return {
+                summary = {
                     'title': data.get('title', ''),
                     'extract': data.get('extract', '')[:500],
                     'url': data.get('content_urls', {}).get('desktop', {}).get('page', ''),
                     'thumbnail': data.get('thumbnail', {}).get('source', ''),
                     'source': 'wikipedia'
                 }
+                if self.cache:
+                    self.cache.set('wiki_summary', title, summary)
+                return summary
+        except BackendUnavailable:
+            pass
         except Exception as e:
             print(f"  [WIKI ERROR] {e}")
         return {}
     
+    def get_summaries(self, titles: List[str]) -> Dict[str, Dict]:
+        """Get intro summaries for up to 20 titles in one API call.
+        
+        Returns {requested title: summary}, following normalization and
+        redirects; missing pages are omitted.
+        """
+        summaries = {}
+        if not titles:
+            return summaries
+        try:
+            params = {
+                'action': 'query',
+                'prop': 'extracts|info|pageimages',
+                'exintro': 1,
+                'explaintext': 1,
+                'exlimit': 'max',
+                'inprop': 'url',
+                'piprop': 'thumbnail',
+                'pithumbsize': 320,
+                'redirects': 1,
+                'titles': '|'.join(titles),
+                'format': 'json',
+                'formatversion': 2
+            }
+            resp = self._request(self.API_URL, params=params, timeout=20)
+            if resp.status_code == 200:
+                query = resp.json().get('query', {})
+                # requested title -> final title
+                final = {t: t for t in titles}
+                for mapping in query.get('normalized', []) + query.get('redirects', []):
+                    for requested, current in final.items():
+                        if current == mapping.get('from'):
+                            final[requested] = mapping.get('to')
+                pages = {p.get('title'): p for p in query.get('pages', []) if not p.get('missing')}
+                for requested, title in final.items():
+                    page = pages.get(title)
+                    if page and page.get('extract'):
+                        summaries[requested] = {
+                            'title': page.get('title', ''),
+                            'extract': page.get('extract', '')[:500],
+                            'url': page.get('fullurl', ''),
+                            'thumbnail': page.get('thumbnail', {}).get('source', ''),
+                            'source': 'wikipedia'
+                        }
+        except BackendUnavailable:
+            pass
+        except Exception as e:
+            print(f"  [WIKI ERROR] {e}")
+        return summaries
+    
+    def context_query(self, entity: str, entity_type: str = 'place') -> str:
+        """Search query used to find context for an entity"""
+        return self.CONTEXT_PREFIXES.get(entity_type, '') + entity
+    
     def get_context_for_entity(self, entity: str, entity_type: str = 'place') -> Dict:
         """Get contextual information for an entity"""
-        # Map entity types to search prefixes
-        prefixes = {
-            'place': '',
-            'person': '',
-            'org': '',
-            'country': 'Politics of ',
-            'conflict': ''
-        }
+        query = self.context_query(entity, entity_type)
+        
+        # Known entities come from the local knowledge base snapshot
+        if self.kb is not None:
+            known = self.kb.get(query)
+            if known is not None:
+                return dict(known)
         
-        query = prefixes.get(entity_type, '') + entity
         results = self.search(query, limit=1)
         if results:
             return self.get_summary(results[0]['title'])
@@ -112,60 +299,18 @@ class WikipediaAPI:
 class EnhancedEntityExtractor:
     """Advanced entity extraction with NLP-like features"""
     
-    # Known entities database
-    WORLD_LEADERS = {
-        'putin': {'name': 'Vladimir Putin', 'role': 'President of Russia', 'country': 'RU'},
-        'biden': {'name': 'Joe Biden', 'role': 'US President', 'country': 'US'},
-        'trump': {'name': 'Donald Trump', 'role': 'US President-elect', 'country': 'US'},
-        'zelenskyy': {'name': 'Volodymyr Zelenskyy', 'role': 'President of Ukraine', 'country': 'UA'},
-        'zelensky': {'name': 'Volodymyr Zelenskyy', 'role': 'President of Ukraine', 'country': 'UA'},
-        'netanyahu': {'name': 'Benjamin Netanyahu', 'role': 'Prime Minister of Israel', 'country': 'IL'},
-        'xi jinping': {'name': 'Xi Jinping', 'role': 'President of China', 'country': 'CN'},
-        'erdogan': {'name': 'Recep Tayyip Erdogan', 'role': 'President of Turkey', 'country': 'TR'},
-        'khamenei': {'name': 'Ali Khamenei', 'role': 'Supreme Leader of Iran', 'country': 'IR'},
-        'modi': {'name': 'Narendra Modi', 'role': 'Prime Minister of India', 'country': 'IN'},
-        'macron': {'name': 'Emmanuel Macron', 'role': 'President of France', 'country': 'FR'},
-        'scholz': {'name': 'Olaf Scholz', 'role': 'Chancellor of Germany', 'country': 'DE'},
-        'sunak': {'name': 'Rishi Sunak', 'role': 'PM of UK', 'country': 'GB'},
-        'starmer': {'name': 'Keir Starmer', 'role': 'PM of UK', 'country': 'GB'},
-        'harris': {'name': 'Kamala Harris', 'role': 'US Vice President', 'country': 'US'},
-    }
-    
-    ORGANIZATIONS = {
-        'nato': {'name': 'NATO', 'full': 'North Atlantic Treaty Organization'},
-        'un': {'name': 'UN', 'full': 'United Nations'},
-        'eu': {'name': 'EU', 'full': 'European Union'},
-        'idf': {'name': 'IDF', 'full': 'Israel Defense Forces'},
-        'hamas': {'name': 'Hamas', 'full': 'Hamas militant group'},
-        'hezbollah': {'name': 'Hezbollah', 'full': 'Hezbollah militant group'},
-        'pentagon': {'name': 'Pentagon', 'full': 'US Department of Defense'},
-        'kremlin': {'name': 'Kremlin', 'full': 'Russian presidential administration'},
-        'white house': {'name': 'White House', 'full': 'US presidential administration'},
-    }
-    
-    COUNTRIES = {
-        'iran': {'code': 'IR', 'name': 'Iran', 'region': 'Middle East'},
-        'israel': {'code': 'IL', 'name': 'Israel', 'region': 'Middle East'},
-        'ukraine': {'code': 'UA', 'name': 'Ukraine', 'region': 'Europe'},
-        'russia': {'code': 'RU', 'name': 'Russia', 'region': 'Europe/Asia'},
-        'china': {'code': 'CN', 'name': 'China', 'region': 'Asia'},
-        'gaza': {'code': 'PS', 'name': 'Gaza', 'region': 'Middle East'},
-        'palestine': {'code': 'PS', 'name': 'Palestine', 'region': 'Middle East'},
-        'syria': {'code': 'SY', 'name': 'Syria', 'region': 'Middle East'},
-        'iraq': {'code': 'IQ', 'name': 'Iraq', 'region': 'Middle East'},
-        'lebanon': {'code': 'LB', 'name': 'Lebanon', 'region': 'Middle East'},
-        'yemen': {'code': 'YE', 'name': 'Yemen', 'region': 'Middle East'},
-        'taiwan': {'code': 'TW', 'name': 'Taiwan', 'region': 'Asia'},
-        'north korea': {'code': 'KP', 'name': 'North Korea', 'region': 'Asia'},
-        'us': {'code': 'US', 'name': 'United States', 'region': 'North America'},
-        'uk': {'code': 'GB', 'name': 'United Kingdom', 'region': 'Europe'},
-        'germany': {'code': 'DE', 'name': 'Germany', 'region': 'Europe'},
-        'france': {'code': 'FR', 'name': 'France', 'region': 'Europe'},
-    }
+    # Known entities database (data/gazetteer.json, compiled once at import)
+    GAZETTEER = GAZETTEER
+    WORLD_LEADERS = GAZETTEER.categories.get('people', {})
+    ORGANIZATIONS = GAZETTEER.categories.get('organizations', {})
+    COUNTRIES = GAZETTEER.categories.get('countries', {})
     
-    def extract(self, text: str) -> Dict:
-        """Extract all entities from text"""
-        text_lower = text.lower()
+    def extract(self, text: str, doc: NormalizedDoc = None) -> Dict:
+        """Extract all entities from text (or from its NormalizedDoc)"""
+        if doc is not None:
+            text, text_lower, hits = doc.text, doc.lower, doc.entity_hits
+        else:
+            text_lower, hits = text.lower(), self.GAZETTEER.find(text)
         
         entities = {
             'people': [],
@@ -175,26 +320,20 @@ class EnhancedEntityExtractor:
             'dates': []
         }
         
-        # Extract leaders
-        for key, data in self.WORLD_LEADERS.items():
-            if key in text_lower:
+        # Single pass over the text for leaders, organizations and countries
+        for category, data in hits:
+            if category == 'people':
                 entities['people'].append({
                     'name': data['name'],
                     'role': data['role'],
                     'country': data['country']
                 })
-        
-        # Extract organizations
-        for key, data in self.ORGANIZATIONS.items():
-            if key in text_lower:
+            elif category == 'organizations':
                 entities['organizations'].append({
                     'name': data['name'],
                     'full': data['full']
                 })
-        
-        # Extract countries
-        for key, data in self.COUNTRIES.items():
-            if key in text_lower:
+            elif category == 'countries':
                 entities['countries'].append({
                     'code': data['code'],
                     'name': data['name'],
@@ -228,147 +367,223 @@ class EnhancedEntityExtractor:
 class MultiSourceSearcher:
     """Search multiple sources for verification"""
     
-    # Source tiers with reliability scores
-    SOURCE_TIERS = {
-        1: ['reuters.com', 'apnews.com', 'bbc.com', 'bbc.co.uk', 'npr.org', 'economist.com', 'ft.com'],
-        2: ['guardian.com', 'theguardian.com', 'aljazeera.com', 'dw.com', 'france24.com', 'cnn.com', 'axios.com', 'wsj.com', 'nytimes.com'],
-        3: ['foxnews.com', 'msnbc.com', 'dailymail.co.uk', 'nypost.com'],
-        4: []  # Unknown sources
-    }
+    FACT_CHECKERS = [
+        'site:snopes.com',
+        'site:politifact.com',
+        'site:factcheck.org',
+        'site:fullfact.org'
+    ]
+    
+    OFFICIAL_SITES = [
+        'site:gov',
+        'site:gov.uk',
+        'site:europa.eu',
+        'site:un.org'
+    ]
     
-    def __init__(self):
+    def __init__(self, limiter: HostRateLimiter = None, cache: ResearchCache = None,
+                 reputation: SourceReputation = None):
         self.ddg_url = "https://html.duckduckgo.com/html/"
+        self.limiter = limiter or RATE_LIMITER
+        self.cache = cache or get_default_cache()
+        # Source tiers with reliability scores (data/source_domains.json)
+        self.reputation = reputation or SOURCE_REPUTATION
+        self.breaker = get_breaker('duckduckgo')
     
     def get_source_tier(self, url: str) -> int:
         """Get reliability tier for a source"""
-        for tier, domains in self.SOURCE_TIERS.items():
-            for domain in domains:
-                if domain in url:
-                    return tier
-        return 4
+        return self.reputation.tier(url)
     
-    def search_duckduckgo(self, query: str, max_results: int = 10) -> List[Dict]:
-        """Search DuckDuckGo for results"""
-        results = []
+    def _fetch_duckduckgo(self, query: str) -> List[Dict]:
+        """Fetch and parse raw DuckDuckGo hits.
+        
+        Raises BackendUnavailable when the request fails or the breaker is
+        open, so callers can tell "no results" from "not searched".
+        """
+        cached = self.cache.get('ddg', query) if self.cache else None
+        if cached is not None:
+            return cached
+        if not self.breaker.allow():
+            raise BackendUnavailable('duckduckgo')
         try:
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             }
             params = {'q': query}
-            rate_limit()
-            resp = requests.post(self.ddg_url, headers=headers, data=params, timeout=15)
-            
-            if resp.status_code == 200:
-                # Parse results
-                titles = re.findall(r'<a[^>]*class="result__a"[^>]*>([^<]+)</a>', resp.text)
-                urls = re.findall(r'<a[^>]*class="result__url"[^>]*>([^<]+)</a>', resp.text)
-                snippets = re.findall(r'<a[^>]*class="result__snippet"[^>]*>([^<]+)</a>', resp.text)
-                
-                for i in range(min(len(titles), max_results)):
-                    url = urls[i].strip() if i < len(urls) else ''
-                    results.append({
-                        'title': titles[i].strip(),
-                        'url': 'https://' + url if url and not url.startswith('http') else url,
-                        'snippet': snippets[i].strip() if i < len(snippets) else '',
-                        'tier': self.get_source_tier(url),
-                        'source': 'search'
-                    })
+            resp = self.limiter.request('POST', self.ddg_url, headers=headers, data=params, timeout=15)
         except Exception as e:
             print(f"  [SEARCH ERROR] {e}")
-        
+            self.breaker.record_failure()
+            raise BackendUnavailable('duckduckgo', str(e))
+        
+        # Anything but a 200 (202 challenge page, 403, 429) means we are blocked
+        if resp.status_code != 200:
+            print(f"  [SEARCH ERROR] DuckDuckGo returned {resp.status_code}")
+            self.breaker.record_failure()
+            raise BackendUnavailable('duckduckgo', f"HTTP {resp.status_code}")
+        self.breaker.record_success()
+        
+        # Parse results
+        titles = re.findall(r'<a[^>]*class="result__a"[^>]*>([^<]+)</a>', resp.text)
+        urls = re.findall(r'<a[^>]*class="result__url"[^>]*>([^<]+)</a>', resp.text)
+        snippets = re.findall(r'<a[^>]*class="result__snippet"[^>]*>([^<]+)</a>', resp.text)
+        
+        hits = []
+        for i in range(len(titles)):
+            hits.append({
+                'title': titles[i].strip(),
+                'url': urls[i].strip() if i < len(urls) else '',
+                'snippet': snippets[i].strip() if i < len(snippets) else ''
+            })
+        if self.cache:
+            self.cache.set('ddg', query, hits)
+        return hits
+    
+    def search_duckduckgo(self, query: str, max_results: int = 10) -> List[Dict]:
+        """Search DuckDuckGo for results (raises BackendUnavailable)"""
+        results = []
+        for hit in self._fetch_duckduckgo(query)[:max_results]:
+            url = hit['url']
+            results.append({
+                'title': hit['title'],
+                'url': 'https://' + url if url and not url.startswith('http') else url,
+                'snippet': hit['snippet'],
+                'tier': self.get_source_tier(url),
+                'source': 'search'
+            })
+        return results
+    
+    def site_queries(self, sites: List[str], query: str) -> List[str]:
+        """Build site-restricted queries, one per site"""
+        return [f"{site} {query}" for site in sites]
+    
+    def search_typed(self, query: str, result_type: str, max_results: int = 2) -> List[Dict]:
+        """Search and tag every result with a source type"""
+        results = self.search_duckduckgo(query, max_results=max_results)
+        for r in results:
+            r['type'] = result_type
         return results
     
     def search_fact_checkers(self, query: str) -> List[Dict]:
         """Search fact-checking sites"""
         results = []
-        fact_checkers = [
-            'site:snopes.com',
-            'site:politifact.com',
-            'site:factcheck.org',
-            'site:fullfact.org'
-        ]
-        
-        for fc in fact_checkers:
-            fc_query = f"{fc} {query}"
-            fc_results = self.search_duckduckgo(fc_query, max_results=2)
-            for r in fc_results:
-                r['type'] = 'fact_check'
-            results.extend(fc_results)
-        
+        for fc_query in self.site_queries(self.FACT_CHECKERS, query):
+            try:
+                results.extend(self.search_typed(fc_query, 'fact_check'))
+            except BackendUnavailable:
+                break
         return results
     
     def search_official_sources(self, query: str) -> List[Dict]:
         """Search official government sources"""
         results = []
-        official_sites = [
-            'site:gov',
-            'site:gov.uk',
-            'site:europa.eu',
-            'site:un.org'
-        ]
-        
-        for os in official_sites:
-            os_query = f"{os} {query}"
-            os_results = self.search_duckduckgo(os_query, max_results=2)
-            for r in os_results:
-                r['type'] = 'official'
-            results.extend(os_results)
-        
+        for os_query in self.site_queries(self.OFFICIAL_SITES, query):
+            try:
+                results.extend(self.search_typed(os_query, 'official'))
+            except BackendUnavailable:
+                break
         return results
 
 
 class ResearchEngine:
     """Main research engine combining all components"""
     
-    def __init__(self):
-        self.wiki = WikipediaAPI()
+    def __init__(self, concurrent: bool = False, max_workers: int = 8,
+                 limiter: HostRateLimiter = None, cache: ResearchCache = None,
+                 store: ResearchArtifactStore = None, related_index=None,
+                 thread_store: ThreadResearchStore = None):
+        self.limiter = limiter or RATE_LIMITER
+        self.cache = cache or get_default_cache()
+        self.store = store
+        self.thread_store = thread_store
+        self.related_index = related_index
+        self._prefetched = {}
+        self.wiki = WikipediaAPI(self.limiter, self.cache)
         self.entity_extractor = EnhancedEntityExtractor()
-        self.searcher = MultiSourceSearcher()
+        self.searcher = MultiSourceSearcher(self.limiter, self.cache)
+        self.concurrent = concurrent
+        self.max_workers = max_workers
         self.headers = {
             'apikey': SERVICE_KEY,
             'Authorization': f'Bearer {SERVICE_KEY}',
             'Content-Type': 'application/json'
         }
     
-    def research_story(self, headline: str, summary: str = '') -> Dict:
-        """Perform comprehensive research on a story"""
-        print(f"\n[RESEARCH] {headline[:60]}...")
+    def _run_calls(self, calls: List[Tuple[Callable, tuple]]) -> List:
+        """Run independent lookups, in parallel when concurrent mode is on.
+        
+        Results come back in the same order as calls so the research dict
+        is identical to a sequential run.
+        """
+        if not self.concurrent or len(calls) < 2:
+            return [fn(*args) for fn, args in calls]
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(calls))) as pool:
+            futures = [pool.submit(fn, *args) for fn, args in calls]
+            return [f.result() for f in futures]
+    
+    def plan_lookups(self, headline: str, summary: str = '') -> Tuple[Dict, List[Tuple[str, tuple]]]:
+        """Extract entities and list the independent lookups a story needs.
         
-        combined = f"{headline} {summary}"
+        Each lookup is (kind, args): Wikipedia context per country, keyword
+        searches, then fact-checker and official site searches.
+        """
+        # Normalized once; generation reuses the same document
+        doc = doc_for(headline, summary)
         
         # Extract entities
-        entities = self.entity_extractor.extract(combined)
+        entities = self.entity_extractor.extract(doc.text, doc=doc)
         print(f"  Entities: {len(entities.get('people', []))} people, {len(entities.get('countries', []))} countries")
         
-        # Get Wikipedia context
-        context = {}
-        if entities.get('countries'):
-            for country in entities['countries'][:2]:
-                wiki_data = self.wiki.get_context_for_entity(country['name'], 'country')
-                if wiki_data:
-                    context[country['name']] = wiki_data
-                    print(f"  [WIKI] Got context for {country['name']}")
-        
-        # Multi-source search
-        keywords = self._extract_keywords(combined)
-        all_results = []
+        lookups = [('wiki', (c['name'],)) for c in entities.get('countries', [])[:2]]
+        for keyword_set in self._extract_keywords(doc.text, doc=doc)[:2]:
+            lookups.append(('search', (keyword_set,)))
+        for q in self.searcher.site_queries(self.searcher.FACT_CHECKERS, headline):
+            lookups.append(('fact_check', (q,)))
+        for q in self.searcher.site_queries(self.searcher.OFFICIAL_SITES, headline):
+            lookups.append(('official', (q,)))
         
-        for keyword_set in keywords[:2]:
-            print(f"  [SEARCH] {keyword_set[:40]}...")
-            results = self.searcher.search_duckduckgo(keyword_set)
-            all_results.extend(results)
-        
-        # Fact-checker search
-        print("  [FACT-CHECK] Searching...")
-        fc_results = self.searcher.search_fact_checkers(headline)
-        all_results.extend(fc_results)
-        
-        # Official source search
-        print("  [OFFICIAL] Searching...")
-        official_results = self.searcher.search_official_sources(headline)
-        all_results.extend(official_results)
+        return entities, lookups
+    
+    def run_lookup(self, kind: str, args: tuple):
+        """Execute one planned lookup; SkippedLookup when its backend is down"""
+        if kind == 'wiki':
+            context = self.wiki.get_context_for_entity(args[0], 'country')
+            if not context and self.wiki.breaker.state != CircuitBreaker.CLOSED:
+                return SkippedLookup('wikipedia')
+            return context
+        try:
+            if kind == 'search':
+                print(f"  [SEARCH] {args[0][:40]}...")
+                return self.searcher.search_duckduckgo(args[0])
+            return self.searcher.search_typed(args[0], kind)
+        except BackendUnavailable as e:
+            return SkippedLookup(e.backend)
+    
+    def assemble_research(self, entities: Dict, outcomes: List[Tuple[Tuple[str, tuple], object]]) -> Dict:
+        """Build the research dict from (lookup, outcome) pairs in plan order.
         
-        print(f"  [TOTAL] {len(all_results)} sources found")
+        Lookups skipped because a backend was down are counted in 'skipped'
+        and flag the research as partial; 'search_coverage' is the share of
+        web searches that actually ran.
+        """
+        context = {}
+        all_results = []
+        skipped = defaultdict(int)
+        searches = searches_run = 0
+        for (kind, args), outcome in outcomes:
+            if kind != 'wiki':
+                searches += 1
+            if isinstance(outcome, SkippedLookup):
+                skipped[outcome.backend] += 1
+                continue
+            if kind != 'wiki':
+                searches_run += 1
+            if kind == 'wiki':
+                if outcome:
+                    context[args[0]] = outcome
+            else:
+                all_results.extend(outcome or [])
         
         return {
             'entities': entities,
@@ -377,17 +592,87 @@ class ResearchEngine:
             'source_count': len(all_results),
             'tier1_count': sum(1 for r in all_results if r.get('tier') == 1),
             'fact_check_count': sum(1 for r in all_results if r.get('type') == 'fact_check'),
-            'official_count': sum(1 for r in all_results if r.get('type') == 'official')
+            'official_count': sum(1 for r in all_results if r.get('type') == 'official'),
+            'partial': bool(skipped),
+            'skipped': dict(skipped),
+            'search_coverage': round(searches_run / searches, 3) if searches else 1.0
         }
     
-    def _extract_keywords(self, text: str) -> List[str]:
+    def research_story(self, headline: str, summary: str = '') -> Dict:
+        """Perform comprehensive research on a story"""
+        print(f"\n[RESEARCH] {headline[:60]}...")
+        
+        entities, lookups = self.plan_lookups(headline, summary)
+        outcomes = self._run_calls([(self.run_lookup, lookup) for lookup in lookups])
+        research = self.assemble_research(entities, list(zip(lookups, outcomes)))
+        
+        for name in research['context']:
+            print(f"  [WIKI] Got context for {name}")
+        print(f"  [TOTAL] {research['source_count']} sources found")
+        if research['partial']:
+            print(f"  [PARTIAL] Skipped {research['skipped']} "
+                  f"(search coverage {research['search_coverage']:.0%})")
+        
+        return research
+    
+    def research_batch(self, stories: List[Dict]) -> Dict[str, Dict]:
+        """Research a batch of stories with shared, deduplicated queries.
+        
+        Results are kept for research_for_story() and persisted when a
+        store is configured (partial research is not persisted). With a
+        thread store, threaded stories are researched from their thread's
+        shared research instead.
+        """
+        results = {}
+        if self.store:
+            results.update(self.store.load_many([s['id'] for s in stories if s.get('id')]))
+        pending = [s for s in stories if s.get('id') and s['id'] not in results]
+        
+        threaded = [s for s in pending if self.thread_store and s.get('story_thread_id')]
+        threaded_ids = {s['id'] for s in threaded}
+        fresh = QueryPlanner(self).research_batch([s for s in pending if s['id'] not in threaded_ids])
+        fresh.update(ThreadResearchPlanner(self, self.thread_store).research_batch(threaded))
+        for story_id, research in fresh.items():
+            self._prefetched[story_id] = research
+            if self.store and not research['partial']:
+                self.store.save(story_id, research)
+        results.update(fresh)
+        return results
+    
+    def research_for_story(self, story: Dict) -> Dict:
+        """Research a stored story, reusing its persisted artifact when fresh"""
+        story_id = story.get('id')
+        if story_id in self._prefetched:
+            return self._prefetched.pop(story_id)
+        if story_id and self.store:
+            research = self.store.load(story_id)
+            if research is not None:
+                print(f"\n[RESEARCH] Reusing stored research for {story.get('headline', '')[:50]}...")
+                return research
+        
+        if story_id and self.thread_store and story.get('story_thread_id'):
+            research = ThreadResearchPlanner(self, self.thread_store).research_batch([story])[story_id]
+        else:
+            research = self.research_story(story.get('headline', ''), story.get('summary', '') or '')
+        if story_id and self.store and not research['partial']:
+            self.store.save(story_id, research)
+        return research
+    
+    def forget(self, story_ids: List[str]):
+        """Drop research held in memory for these stories once they are written"""
+        for story_id in story_ids:
+            self._prefetched.pop(story_id, None)
+        if self.store:
+            self.store.forget(story_ids)
+    
+    def _extract_keywords(self, text: str, doc: NormalizedDoc = None) -> List[str]:
         """Extract keyword sets for searching"""
         # Remove common words
         stop_words = {'this', 'that', 'with', 'from', 'have', 'been', 'will', 'would', 
                      'could', 'about', 'after', 'before', 'into', 'through', 'during',
                      'breaking', 'shocking', 'urgent', 'news', 'report', 'reports'}
         
-        words = re.findall(r'\b[a-z]{4,}\b', text.lower())
+        words = doc.words(4) if doc is not None else re.findall(r'\b[a-z]{4,}\b', text.lower())
         keywords = [w for w in words if w not in stop_words]
         
         # Create search queries
@@ -403,10 +688,18 @@ class ResearchEngine:
         
         return queries
     
-    def find_related_stories(self, story_id: str, entities: Dict, hours: int = 72) -> List[Dict]:
+    def find_related_stories(self, story_id: str, entities: Dict, hours: int = 72,
+                             headline: str = '') -> List[Dict]:
         """Find related stories in database"""
         related = []
         
+        # Answer locally from the resident index (daemon mode) once it has
+        # loaded its window; until then, or if loading fails, query below
+        if self.related_index is not None:
+            self.related_index.refresh()
+            if self.related_index.loaded:
+                return self.related_index.find_related(story_id, entities, headline, hours=hours)
+        
         # Get country codes from entities
         country_codes = [c['code'] for c in entities.get('countries', [])]
         if not country_codes:
@@ -415,7 +708,8 @@ class ResearchEngine:
         cutoff = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
         
         try:
-            resp = requests.get(
+            resp = self.limiter.request(
+                'GET',
                 f"{SUPABASE_URL}/rest/v1/stories",
                 headers=self.headers,
                 params={
@@ -425,7 +719,8 @@ class ResearchEngine:
                     'id': f'neq.{story_id}',
                     'order': 'created_at.desc',
                     'limit': 5
-                }
+                },
+                timeout=15
             )
             
             if resp.status_code == 200:
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Xray Research Artifact Store
+Persists one research result per story in the story_research table
+
+The truth and analysis stages (and later reruns) load the stored research
+instead of searching again. Artifacts are reused indefinitely unless a
+refresh policy says otherwise: a max age in hours, an explicit refresh
+cutoff (anything researched before it is redone, e.g. the start of a
+--refresh-research run), or a RESEARCH_VERSION bump.
+"""
+
+import json
+import threading
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional
+
+from rate_limiter import RATE_LIMITER, HostRateLimiter
+
+# Bump when the research dict shape changes
+# 2: partial, skipped and search_coverage (circuit-breaker coverage)
+RESEARCH_VERSION = 2
+
+
+class ResearchArtifactStore:
+    """Per-story research artifacts with an in-process memo"""
+
+    TABLE = 'story_research'
+
+    def __init__(self, url: str, key: str, limiter: HostRateLimiter = None,
+                 max_age_hours: Optional[float] = None,
+                 refresh_before: Optional[datetime] = None):
+        self.url = url
+        self.limiter = limiter or RATE_LIMITER
+        self.max_age_hours = max_age_hours
+        self.refresh_before = refresh_before
+        self.headers = {
+            'apikey': key,
+            'Authorization': f'Bearer {key}',
+            'Content-Type': 'application/json'
+        }
+        self._memo = {}
+        self._lock = threading.Lock()
+        self._db_enabled = True
+
+    def _is_fresh(self, researched_at: str, version: int) -> bool:
+        if version != RESEARCH_VERSION:
+            return False
+        if self.max_age_hours is None and self.refresh_before is None:
+            return True
+        try:
+            ts = datetime.fromisoformat(researched_at.replace('Z', '+00:00'))
+        except (AttributeError, ValueError):
+            return False
+        if self.refresh_before and ts < self.refresh_before:
+            return False
+        if self.max_age_hours is not None:
+            return datetime.now(timezone.utc) - ts <= timedelta(hours=self.max_age_hours)
+        return True
+
+    def _disable_db(self, reason: str):
+        if self._db_enabled:
+            print(f"  [RESEARCH STORE] Disabled DB persistence: {reason}")
+        self._db_enabled = False
+
+    def _remember(self, row: Dict):
+        with self._lock:
+            self._memo[row['story_id']] = row
+
+    def forget(self, story_ids: List[str]):
+        """Drop memoized artifacts (long sweeps such as backfill.py)"""
+        with self._lock:
+            for story_id in story_ids:
+                self._memo.pop(story_id, None)
+
+    def load(self, story_id: str) -> Optional[Dict]:
+        """Return fresh stored research for a story, or None"""
+        with self._lock:
+            row = self._memo.get(story_id)
+        if row is None and self._db_enabled:
+            rows = self._fetch_rows([story_id])
+            row = rows.get(story_id)
+        if row and self._is_fresh(row.get('researched_at'), row.get('research_version')):
+            return row['research']
+        return None
+
+    def load_many(self, story_ids: List[str]) -> Dict[str, Dict]:
+        """Warm the memo for a batch in one round trip; returns fresh artifacts"""
+        with self._lock:
+            missing = [sid for sid in story_ids if sid not in self._memo]
+        if missing and self._db_enabled:
+            self._fetch_rows(missing)
+        fresh = {}
+        with self._lock:
+            for sid in story_ids:
+                row = self._memo.get(sid)
+                if row and self._is_fresh(row.get('researched_at'), row.get('research_version')):
+                    fresh[sid] = row['research']
+        return fresh
+
+    def _fetch_rows(self, story_ids: List[str]) -> Dict[str, Dict]:
+        rows = {}
+        try:
+            resp = self.limiter.request(
+                'GET',
+                f"{self.url}/rest/v1/{self.TABLE}",
+                headers=self.headers,
+                params={
+                    'select': 'story_id,research,research_version,researched_at',
+                    'story_id': f'in.({",".join(story_ids)})'
+                },
+                timeout=15
+            )
+            if resp.status_code == 200:
+                for row in resp.json():
+                    self._remember(row)
+                    rows[row['story_id']] = row
+            elif resp.status_code == 404:
+                self._disable_db(f"{resp.status_code} {resp.text[:100]}")
+        except Exception as e:
+            print(f"  [RESEARCH STORE ERROR] {e}")
+        return rows
+
+    def save(self, story_id: str, research: Dict) -> bool:
+        """Upsert the research artifact for a story"""
+        row = {
+            'story_id': story_id,
+            'research': research,
+            'source_count': research.get('source_count', 0),
+            'research_version': RESEARCH_VERSION,
+            'researched_at': datetime.now(timezone.utc).isoformat()
+        }
+        self._remember(row)
+        if not self._db_enabled:
+            return False
+        try:
+            resp = self.limiter.request(
+                'POST',
+                f"{self.url}/rest/v1/{self.TABLE}",
+                headers=dict(self.headers, Prefer='resolution=merge-duplicates,return=minimal'),
+                params={'on_conflict': 'story_id'},
+                data=json.dumps(row),
+                timeout=15
+            )
+            if resp.status_code == 404:
+                self._disable_db(f"{resp.status_code} {resp.text[:100]}")
+            return resp.status_code in (200, 201, 204)
+        except Exception as e:
+            print(f"  [RESEARCH STORE ERROR] {e}")
+            return False
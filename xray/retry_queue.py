@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Xray Retry Queue
+Durable per-stage retry schedule for stories that failed processing
+
+A failed (story, stage) pair is stored with its error and attempt count
+and becomes due again on an exponential schedule (1m, 2m, 4m ... capped at
+an hour). After MAX_ATTEMPTS failures it moves to the dead-letter state
+and is no longer picked up until requeued by hand. Nothing sleeps: engines
+skip stories that are waiting and pull in the ones that are due.
+
+Environment:
+  XRAY_CACHE_DIR        Directory for retry_queue.sqlite3 (default: xray/cache)
+  XRAY_RETRY_QUEUE=0    Disable the queue (failures are only logged)
+
+Usage:
+  python retry_queue.py                 # Show queue stats
+  python retry_queue.py --dead          # List dead-lettered stories
+  python retry_queue.py --requeue-dead  # Give dead stories a fresh set of attempts
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Set
+
+from research_cache import CACHE_DIR
+
+QUEUE_FILE = 'retry_queue.sqlite3'
+
+MAX_ATTEMPTS = int(os.environ.get('XRAY_RETRY_MAX_ATTEMPTS', '5'))
+BASE_DELAY = 60       # seconds before the first retry
+MAX_DELAY = 3600      # cap on the backoff
+
+PENDING = 'pending'
+DEAD = 'dead'
+
+
+class RetryQueue:
+    """SQLite-backed retry schedule keyed by (story_id, stage)"""
+
+    def __init__(self, path: str = None, max_attempts: int = MAX_ATTEMPTS,
+                 base_delay: float = BASE_DELAY, max_delay: float = MAX_DELAY):
+        if path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            path = os.path.join(CACHE_DIR, QUEUE_FILE)
+        self.path = path
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS retries (
+                story_id        TEXT NOT NULL,
+                stage           TEXT NOT NULL,
+                headline        TEXT,
+                error           TEXT,
+                attempts        INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                status          TEXT NOT NULL DEFAULT 'pending',
+                first_failed_at REAL NOT NULL,
+                updated_at      REAL NOT NULL,
+                PRIMARY KEY (story_id, stage)
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_retries_due ON retries(stage, status, next_attempt_at)')
+        self._conn.commit()
+
+    def backoff(self, attempts: int) -> float:
+        """Delay before the next attempt after `attempts` failures"""
+        return min(self.max_delay, self.base_delay * (2 ** max(0, attempts - 1)))
+
+    def record_failure(self, story_id: str, stage: str, error: str, headline: str = '') -> str:
+        """Schedule the next attempt (or dead-letter the story); returns the new status"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT attempts FROM retries WHERE story_id = ? AND stage = ?',
+                (story_id, stage)
+            ).fetchone()
+            attempts = (row[0] if row else 0) + 1
+            status = DEAD if attempts >= self.max_attempts else PENDING
+            self._conn.execute(
+                'INSERT INTO retries (story_id, stage, headline, error, attempts, next_attempt_at, '
+                'status, first_failed_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(story_id, stage) DO UPDATE SET headline = excluded.headline, '
+                'error = excluded.error, attempts = excluded.attempts, '
+                'next_attempt_at = excluded.next_attempt_at, status = excluded.status, '
+                'updated_at = excluded.updated_at',
+                (story_id, stage, headline[:200], str(error)[:1000], attempts,
+                 now + self.backoff(attempts), status, now, now)
+            )
+            self._conn.commit()
+        if status == DEAD:
+            print(f"  [RETRY] {headline[:50] or story_id} dead-lettered after {attempts} attempts ({stage})")
+        return status
+
+    def resolve(self, story_id: str, stage: str):
+        """Forget a story once the stage succeeds"""
+        with self._lock:
+            self._conn.execute('DELETE FROM retries WHERE story_id = ? AND stage = ?', (story_id, stage))
+            self._conn.commit()
+
+    def due(self, stage: str, limit: int = 50) -> List[str]:
+        """Pending story ids whose next attempt time has passed, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT story_id FROM retries WHERE stage = ? AND status = ? AND next_attempt_at <= ? '
+                'ORDER BY next_attempt_at LIMIT ?',
+                (stage, PENDING, time.time(), limit)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def waiting(self, stage: str) -> Set[str]:
+        """Story ids that must not be attempted now (backing off or dead)"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT story_id FROM retries WHERE stage = ? AND (status = ? OR next_attempt_at > ?)',
+                (stage, DEAD, time.time())
+            ).fetchall()
+        return {r[0] for r in rows}
+
+    def dead_letters(self, stage: str = None) -> List[Dict]:
+        query = 'SELECT story_id, stage, headline, error, attempts, updated_at FROM retries WHERE status = ?'
+        params = [DEAD]
+        if stage:
+            query += ' AND stage = ?'
+            params.append(stage)
+        with self._lock:
+            rows = self._conn.execute(query + ' ORDER BY updated_at DESC', params).fetchall()
+        keys = ('story_id', 'stage', 'headline', 'error', 'attempts', 'updated_at')
+        return [dict(zip(keys, r)) for r in rows]
+
+    def requeue_dead(self) -> int:
+        """Give every dead-lettered story a fresh set of attempts, due now"""
+        with self._lock:
+            cur = self._conn.execute(
+                'UPDATE retries SET status = ?, attempts = 0, next_attempt_at = ? WHERE status = ?',
+                (PENDING, time.time(), DEAD)
+            )
+            self._conn.commit()
+        return cur.rowcount
+
+    def stats(self) -> Dict:
+        """Counts by stage and status, plus how many are due now"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT stage, status, COUNT(*) FROM retries GROUP BY stage, status'
+            ).fetchall()
+            due = self._conn.execute(
+                'SELECT COUNT(*) FROM retries WHERE status = ? AND next_attempt_at <= ?',
+                (PENDING, time.time())
+            ).fetchone()[0]
+        by_stage = {}
+        for stage, status, count in rows:
+            by_stage.setdefault(stage, {})[status] = count
+        return {
+            'pending': sum(c for _, s, c in rows if s == PENDING),
+            'dead': sum(c for _, s, c in rows if s == DEAD),
+            'due': due,
+            'by_stage': by_stage
+        }
+
+
+_DEFAULT_QUEUE = None
+_DEFAULT_QUEUE_LOCK = threading.Lock()
+
+
+def get_default_retry_queue() -> Optional[RetryQueue]:
+    """Shared process-wide queue, or None when disabled"""
+    global _DEFAULT_QUEUE
+    if os.environ.get('XRAY_RETRY_QUEUE', '1') == '0':
+        return None
+    with _DEFAULT_QUEUE_LOCK:
+        if _DEFAULT_QUEUE is None:
+            try:
+                _DEFAULT_QUEUE = RetryQueue()
+            except (OSError, sqlite3.Error) as e:
+                print(f"  [RETRY QUEUE ERROR] {e}")
+                return None
+        return _DEFAULT_QUEUE
+
+
+if __name__ == '__main__':
+    import json
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Xray retry queue')
+    parser.add_argument('--dead', action='store_true', help='List dead-lettered stories')
+    parser.add_argument('--requeue-dead', action='store_true', help='Retry dead-lettered stories again')
+    args = parser.parse_args()
+
+    queue = RetryQueue()
+    if args.requeue_dead:
+        print(f"Requeued {queue.requeue_dead()} dead stories")
+    if args.dead:
+        for entry in queue.dead_letters():
+            print(f"{entry['stage']:<9} {entry['story_id']}  {entry['attempts']}x  "
+                  f"{entry['headline'][:50]}: {entry['error'][:80]}")
+    print(json.dumps(queue.stats(), indent=2))
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Xray Story Scheduler
+Priority ordering of pending stories with deadline and latency tracking
+
+Each pending story gets a priority score from is_breaking, category,
+source reputation, confidence_score, the PinCalculator high-priority
+countries and its age. The score maps to a class (critical/high/normal/low)
+with a deadline measured from ingestion; work is ordered by class, then by
+whichever deadline is closest. Verdict latency (created_at -> score
+written) is recorded per class so p95 can be reported.
+"""
+
+import math
+import threading
+from collections import defaultdict, deque
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from source_reputation import SOURCE_REPUTATION, SourceReputation
+from pin_calculator import HIGH_PRIORITY_COUNTRIES
+
+# Class -> (minimum priority score, deadline from ingestion)
+PRIORITY_CLASSES = [
+    ('critical', 60, timedelta(minutes=5)),
+    ('high', 40, timedelta(minutes=15)),
+    ('normal', 20, timedelta(hours=1)),
+    ('low', 0, timedelta(hours=4)),
+]
+CLASS_RANK = {name: rank for rank, (name, _, _) in enumerate(PRIORITY_CLASSES)}
+
+PRIORITY_CATEGORIES = {'War & Conflict', 'Politics', 'Elections'}
+
+# Stories past this age lose their urgency
+STALE_AFTER = timedelta(hours=24)
+
+# Candidates fetched per slot so the scheduler has something to choose from
+POOL_FACTOR = 5
+MAX_POOL = 500
+
+# Latencies kept per class for the percentiles (a daemon records forever)
+LATENCY_WINDOW = 1000
+
+
+def _parse_ts(value: str) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class StoryScheduler:
+    """Orders pending stories by priority and tracks verdict latency"""
+
+    def __init__(self, reputation: SourceReputation = None,
+                 high_priority_countries=HIGH_PRIORITY_COUNTRIES):
+        self.reputation = reputation or SOURCE_REPUTATION
+        self.high_priority_countries = set(high_priority_countries)
+        self.latencies = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))  # class -> recent seconds
+        self.verdicts = defaultdict(int)     # class -> verdicts recorded
+        self.missed = defaultdict(int)       # class -> deadlines missed
+        self._lock = threading.Lock()
+
+    def priority_score(self, story: Dict, now: datetime = None) -> float:
+        now = now or datetime.now(timezone.utc)
+        score = 0.0
+
+        if story.get('is_breaking'):
+            score += 40
+        if story.get('category') in PRIORITY_CATEGORIES:
+            score += 15
+
+        # Source reputation: tier of the article url, else the feed's score
+        tier = self.reputation.tier(story.get('external_url') or '')
+        if tier == 1:
+            score += 20
+        elif tier == 2:
+            score += 10
+        elif story.get('source_name'):
+            score += max(0, self.reputation.feed_reputation(story['source_name']) - 55) / 3
+
+        score += (story.get('confidence_score') or 0) * 0.15
+
+        if story.get('country_code') in self.high_priority_countries:
+            score += 10
+
+        created = _parse_ts(story.get('created_at') or '')
+        if created and now - created > STALE_AFTER:
+            score /= 2
+        return score
+
+    def classify(self, story: Dict, now: datetime = None) -> Tuple[str, float, Optional[datetime]]:
+        """(class, priority score, deadline) for a story"""
+        score = self.priority_score(story, now)
+        for name, threshold, budget in PRIORITY_CLASSES:
+            if score >= threshold:
+                created = _parse_ts(story.get('created_at') or '')
+                return name, score, (created + budget) if created else None
+        return 'low', score, None
+
+    def order(self, stories: List[Dict], limit: int = None) -> List[Dict]:
+        """Most urgent first: by class, then nearest deadline, then score"""
+        now = datetime.now(timezone.utc)
+        far = now + timedelta(days=365)
+        keyed = []
+        for story in stories:
+            name, score, deadline = self.classify(story, now)
+            keyed.append(((CLASS_RANK[name], deadline or far, -score), story))
+        keyed.sort(key=lambda item: item[0])
+        ordered = [story for _, story in keyed]
+        return ordered[:limit] if limit else ordered
+
+    def record_verdict(self, story: Dict, at: datetime = None):
+        """Track ingestion -> verdict latency for the story's class"""
+        created = _parse_ts(story.get('created_at') or '')
+        if not created:
+            return
+        at = at or datetime.now(timezone.utc)
+        name, _, deadline = self.classify(story, created)
+        with self._lock:
+            self.latencies[name].append((at - created).total_seconds())
+            self.verdicts[name] += 1
+            if deadline and at > deadline:
+                self.missed[name] += 1
+
+    def report(self) -> Dict[str, Dict]:
+        """Per-class count, p50/p95 latency (seconds, over the last
+        LATENCY_WINDOW verdicts) and missed deadlines"""
+        with self._lock:
+            return {
+                name: {
+                    'count': self.verdicts[name],
+                    'p50': percentile(self.latencies[name], 50),
+                    'p95': percentile(self.latencies[name], 95),
+                    'missed': self.missed[name]
+                }
+                for name, _, _ in PRIORITY_CLASSES if self.verdicts[name]
+            }
+
+
+def pool_size(limit: int) -> int:
+    """How many candidates to fetch for `limit` slots"""
+    return min(MAX_POOL, max(limit, limit * POOL_FACTOR))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Xray Source Reputation
+Hostname-indexed source tiers
+
+The hostname is parsed once and tiers are resolved by walking its domain
+suffixes through a hash map (www.bbc.co.uk -> bbc.co.uk -> co.uk -> uk),
+so lookups stay O(labels) however big the table grows and 'ft.com' no
+longer matches 'microsoft.com'.
+
+The table lives in data/source_domains.json and is shared with
+workers/news-gatherer.js (which reads the feed reputations).
+"""
+
+import os
+import json
+from urllib.parse import urlparse
+from typing import Dict, Optional
+
+SOURCE_DOMAINS_PATH = os.environ.get(
+    'XRAY_SOURCE_DOMAINS',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'source_domains.json')
+)
+UNKNOWN_TIER = 4
+
+
+def hostname_of(url: str) -> str:
+    """Lowercase hostname of a url, tolerating scheme-less urls"""
+    url = (url or '').strip()
+    if not url:
+        return ''
+    if '://' not in url and not url.startswith('//'):
+        url = '//' + url
+    try:
+        host = urlparse(url).hostname or ''
+    except ValueError:
+        return ''
+    return host.rstrip('.')
+
+
+class SourceReputation:
+    """Domain -> tier table with suffix-walk lookup"""
+
+    def __init__(self, domains: Dict[str, int], feeds: Dict[str, int] = None):
+        self.domains = {d.lower(): int(t) for d, t in domains.items()}
+        self.feeds = dict(feeds or {})
+
+    @classmethod
+    def from_file(cls, path: str = SOURCE_DOMAINS_PATH) -> 'SourceReputation':
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data.get('domains', {}), data.get('feeds', {}))
+
+    def __len__(self):
+        return len(self.domains)
+
+    def domain_for(self, url: str) -> Optional[str]:
+        """Most specific table entry covering the url's host"""
+        host = hostname_of(url)
+        while host:
+            if host in self.domains:
+                return host
+            if '.' not in host:
+                break
+            host = host.split('.', 1)[1]
+        return None
+
+    def tier(self, url: str) -> int:
+        """Reliability tier for a url (1 best, 4 unknown)"""
+        domain = self.domain_for(url)
+        return self.domains[domain] if domain else UNKNOWN_TIER
+
+    def feed_reputation(self, feed_name: str, default: int = 55) -> int:
+        """Reputation score for a gatherer feed name"""
+        return self.feeds.get(feed_name, default)
+
+
+# Loaded once at import
+SOURCE_REPUTATION = SourceReputation.from_file()
@@ -25,12 +25,14 @@ from datetime import datetime, timedelta
 import hashlib
 import functools
 
+from text_doc import doc_for
+
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
 
 SUPABASE_URL = os.environ.get('SUPABASE_URL', 'https://dkxydhuojaspmbpjfyoz.supabase.co')
-SERVICE_KEY = os.environ.get('SERVICE_ROLE_SUPABASE', '') or os.environ.get('SUPABASE_SERVICE_KEY', ''))
+SERVICE_KEY = os.environ.get('SERVICE_ROLE_SUPABASE', '') or os.environ.get('SUPABASE_SERVICE_KEY', '')
 
 # Retry configuration
 MAX_RETRIES = 3
@@ -69,6 +71,31 @@ PERSON_PATTERNS = [
     r'\b[A-Z][a-z]+\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b',  # Full names
 ]
 
+# Words ignored by keyword extraction
+KEYWORD_STOP_WORDS = {
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'from', 'is', 'are', 'was', 'were', 'be', 'been',
+    'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
+    'could', 'should', 'may', 'might', 'must', 'shall', 'can', 'as', 'it',
+    'its', 'this', 'that', 'these', 'those', 'he', 'she', 'they', 'we',
+    'you', 'i', 'me', 'him', 'her', 'us', 'them', 'my', 'your', 'his',
+    'her', 'their', 'our', 'says', 'said', 'report', 'reports', 'new',
+    'news', 'update', 'updates', 'breaking', 'latest', 'today', 'after',
+    'has', 'have', 'had', 'not', 'no', 'yes', 'over', 'under', 'out', 'up',
+    'down', 'off', 'into', 'more', 'most', 'some', 'any', 'all', 'each',
+    'every', 'both', 'few', 'many', 'other', 'only', 'own', 'same', 'than',
+    'too', 'very', 'just', 'also', 'now', 'here', 'there', 'when', 'where',
+    'what', 'which', 'who', 'whom', 'whose', 'why', 'how'
+}
+
+# Important verbs (action words)
+ACTION_VERBS = {
+    'attack', 'strike', 'launch', 'kill', 'arrest', 'capture', 'seize',
+    'bomb', 'invade', 'defend', 'retreat', 'advance', 'withdraw', 'deploy',
+    'sanction', 'ban', 'block', 'approve', 'reject', 'sign', 'veto',
+    'negotiate', 'agree', 'ceasefire', 'surrender', 'destroy', 'target'
+}
+
 # ============================================================================
 # LOGGING WITH TIMESTAMPS
 # ============================================================================
@@ -162,7 +189,7 @@ def extract_entities(text):
     
     return entities
 
-def extract_keywords_enhanced(text, country_code=None, max_keywords=8):
+def extract_keywords_enhanced(text, country_code=None, max_keywords=8, doc=None):
     """Extract weighted keywords with NER-like entity detection.
     
     Weight hierarchy:
@@ -171,42 +198,23 @@ def extract_keywords_enhanced(text, country_code=None, max_keywords=8):
     - Significant nouns: weight 1.0
     - Important verbs: weight 0.5
     
+    doc is the text's NormalizedDoc when the caller already has one; the
+    result is kept on the doc so repeated calls are free.
+    
     Returns list of (keyword, weight) tuples sorted by weight.
     """
-    if not text:
-        return []
-    
-    # Normalize text
-    text_lower = text.lower()
-    text_clean = re.sub(r'[^\w\s]', ' ', text_lower)
-    
-    # Stop words
-    stop_words = {
-        'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-        'of', 'with', 'by', 'from', 'is', 'are', 'was', 'were', 'be', 'been',
-        'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
-        'could', 'should', 'may', 'might', 'must', 'shall', 'can', 'as', 'it',
-        'its', 'this', 'that', 'these', 'those', 'he', 'she', 'they', 'we',
-        'you', 'i', 'me', 'him', 'her', 'us', 'them', 'my', 'your', 'his',
-        'her', 'their', 'our', 'says', 'said', 'report', 'reports', 'new',
-        'news', 'update', 'updates', 'breaking', 'latest', 'today', 'after',
-        'has', 'have', 'had', 'not', 'no', 'yes', 'over', 'under', 'out', 'up',
-        'down', 'off', 'into', 'more', 'most', 'some', 'any', 'all', 'each',
-        'every', 'both', 'few', 'many', 'other', 'only', 'own', 'same', 'than',
-        'too', 'very', 'just', 'also', 'now', 'here', 'there', 'when', 'where',
-        'what', 'which', 'who', 'whom', 'whose', 'why', 'how'
-    }
-    
-    # Important verbs (action words)
-    action_verbs = {
-        'attack', 'strike', 'launch', 'kill', 'arrest', 'capture', 'seize',
-        'bomb', 'invade', 'defend', 'retreat', 'advance', 'withdraw', 'deploy',
-        'sanction', 'ban', 'block', 'approve', 'reject', 'sign', 'veto',
-        'negotiate', 'agree', 'ceasefire', 'surrender', 'destroy', 'target'
-    }
-    
+    if doc is None:
+        if not text:
+            return []
+        doc = doc_for(text)
+    return doc.derive(f'thread_keywords:{country_code}:{max_keywords}',
+                      lambda: _weigh_keywords(doc, country_code, max_keywords))
+
+def _weigh_keywords(doc, country_code, max_keywords):
+    """Weighted keywords for a NormalizedDoc (see extract_keywords_enhanced)."""
     # Extract named entities
-    entities = extract_entities(text)
+    entities = doc.derive('thread_entities', lambda: extract_entities(doc.text))
+    entity_phrases = entities['locations'] + entities['organizations'] + entities['persons']
     
     # Calculate word weights
     word_weights = {}
@@ -215,7 +223,7 @@ def extract_keywords_enhanced(text, country_code=None, max_keywords=8):
     country_boost = set(COUNTRY_KEYWORD_BOOST.get(country_code, []))
     
     # Split and process words
-    words = [w for w in text_clean.split() if len(w) > 2 and w not in stop_words]
+    words = [w for w in doc.tokens if len(w) > 2 and w not in KEYWORD_STOP_WORDS]
     
     # Count word frequency
     word_count = {}
@@ -233,10 +241,10 @@ def extract_keywords_enhanced(text, country_code=None, max_keywords=8):
         elif word in entities['locations'] or word in entities['organizations'] or word in entities['persons']:
             weight = 2.0
         # Check if it's part of an entity phrase
-        elif any(word in phrase for phrase in entities['locations'] + entities['organizations'] + entities['persons']):
+        elif any(word in phrase for phrase in entity_phrases):
             weight = 1.5
         # Action verbs
-        elif word in action_verbs:
+        elif word in ACTION_VERBS:
             weight = 0.8
         # Numbers are significant
         elif word.isdigit():
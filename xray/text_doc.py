@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Xray Normalized Document
+Tokenize-once text shared by research, generation, threading and briefing
+
+A story's headline and summary used to be lowercased, regex-cleaned and
+tokenized again by every stage that looked at them. NormalizedDoc does it
+once: cleaned headline/summary/text, the lowercase text, the token list
+and set, and (lazily) the gazetteer entity hits. Consumers that derive
+their own values from the text (themes, keyword weights, ...) store them
+with doc.derive so the next stage reuses them.
+
+doc_for(headline, summary) returns the shared document for a story from a
+bounded cache, so stages that only receive strings still get the same
+object the earlier stages built.
+
+Usage:
+  python text_doc.py --bench          # CPU per story, per-stage vs shared doc
+  python text_doc.py --bench -n 2000  # More iterations
+"""
+
+import re
+from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
+from typing import Any, Callable, Dict, List, Tuple
+
+from gazetteer import GAZETTEER
+
+DOC_CACHE_SIZE = 4096
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_IMAGE_URL_RE = re.compile(r'https?://[^\s]+\.(jpg|jpeg|png|gif|webp)', re.IGNORECASE)
+_REDDIT_PREVIEW_RE = re.compile(r'external-preview\.redd\.it[^\s]*')
+_BOILERPLATE_RES = [
+    re.compile(r'\s*[-\|]?\s*Details are still emerging\.?$', re.IGNORECASE),
+    re.compile(r'\s*[-\|]?\s*This is a developing story\.?$', re.IGNORECASE),
+    re.compile(r'^Breaking:\s*', re.IGNORECASE),
+    re.compile(r'^Just in:\s*', re.IGNORECASE),
+    re.compile(r'\s*reports say$', re.IGNORECASE),
+]
+_SPACE_RE = re.compile(r'\s+')
+_TOKEN_RE = re.compile(r'\w+')
+_ENTITIES = [('&amp;', '&'), ('&lt;', '<'), ('&gt;', '>'), ('&quot;', '"'), ('&#39;', "'")]
+
+
+def clean_text(text: str, images: bool = False, entities: bool = True,
+               boilerplate: bool = True) -> str:
+    """Strip HTML tags and collapse whitespace, plus optionally image links,
+    HTML entities and boilerplate phrases.
+    
+    The defaults are analysis_generator_v9's rules; analysis_generator.py
+    keeps its own (LEGACY_CLEANING), so sharing the code changes neither
+    generator's output.
+    """
+    if not text:
+        return ""
+    text = _TAG_RE.sub('', text)
+    if images:
+        text = _IMAGE_URL_RE.sub('', text)
+        text = _REDDIT_PREVIEW_RE.sub('', text)
+    if entities:
+        for entity, char in _ENTITIES:
+            text = text.replace(entity, char)
+    if boilerplate:
+        for pattern in _BOILERPLATE_RES:
+            text = pattern.sub('', text)
+    return _SPACE_RE.sub(' ', text).strip()
+
+
+# analysis_generator.py's cleaning: image links out, entities and boilerplate kept
+LEGACY_CLEANING = {'images': True, 'entities': False, 'boilerplate': False}
+
+
+@dataclass(eq=False)
+class NormalizedDoc:
+    """Cleaned, lowercased and tokenized headline + summary of one story"""
+    headline: str
+    summary: str
+    text: str              # f"{headline} {summary}" after cleaning
+    lower: str
+    headline_lower: str
+    tokens: List[str]      # \w+ runs of lower, in order
+    token_set: frozenset
+    memo: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def build(cls, headline: str, summary: str = '', **cleaning) -> 'NormalizedDoc':
+        headline = clean_text(headline, **cleaning)
+        summary = clean_text(summary, **cleaning)
+        text = f"{headline} {summary}"
+        lower = text.lower()
+        tokens = _TOKEN_RE.findall(lower)
+        return cls(headline, summary, text, lower, headline.lower(), tokens, frozenset(tokens))
+
+    @cached_property
+    def entity_hits(self) -> List[Tuple[str, Dict]]:
+        """Gazetteer (category, entry) hits in order of appearance"""
+        return GAZETTEER.find(self.text)
+
+    def words(self, min_len: int = 4) -> List[str]:
+        """Alphabetic ASCII tokens of at least min_len letters, in order"""
+        return [t for t in self.tokens if len(t) >= min_len and t.isascii() and t.isalpha()]
+
+    def derive(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Compute a per-document value once and keep it in memo"""
+        if key not in self.memo:
+            self.memo[key] = compute()
+        return self.memo[key]
+
+
+@lru_cache(maxsize=DOC_CACHE_SIZE)
+def _cached_doc(headline: str, summary: str, **cleaning) -> NormalizedDoc:
+    return NormalizedDoc.build(headline, summary, **cleaning)
+
+
+def doc_for(headline: str, summary: str = '', **cleaning) -> NormalizedDoc:
+    """Shared NormalizedDoc for a headline/summary pair (cleaning: clean_text
+    options, for consumers with their own rules)"""
+    return _cached_doc(headline or '', summary or '', **cleaning)
+
+
+def doc_for_story(story: Dict) -> NormalizedDoc:
+    return doc_for(story.get('headline', '') or '', story.get('summary', '') or '')
+
+
+def _bench(n: int):
+    """Per-story CPU for the text work of one pass: every stage normalizing
+    on its own vs one shared document"""
+    import time
+    import briefing_generator as briefing
+    from analysis_generator_v9 import NarrativeAnalysisGenerator
+    from research_engine import EnhancedEntityExtractor, ResearchEngine
+    from story_threader import extract_keywords_enhanced
+
+    stories = [
+        ("BREAKING: Iran launches missile attack on Israel after general's assassination",
+         "Tehran fired dozens of missiles at Tel Aviv overnight, officials confirmed. "
+         "The IDF said 40 were intercepted. This is a developing story."),
+        ("Zelenskyy and Trump spoke by phone about a ceasefire, Kyiv says",
+         "<p>The call lasted an hour &amp; covered air defense and sanctions.</p> Details are still emerging."),
+        ("Carney's budget passes the House of Commons 172-160",
+         "The Prime Minister's first budget includes $20 billion for defence and trade support."),
+        ("China warns Taiwan over planned US arms sale",
+         "Beijing's foreign ministry said the $1.1 billion package would harm relations."),
+    ]
+    generator = NarrativeAnalysisGenerator()
+    extractor = EnhancedEntityExtractor()
+    engine = ResearchEngine.__new__(ResearchEngine)
+    research = {'entities': {}, 'sources': [], 'source_count': 0}
+
+    def per_stage(headline, summary):
+        combined = f"{headline} {summary}"
+        extractor.extract(combined)
+        engine._extract_keywords(combined)
+        generator.generate_analysis(headline, summary, research, doc=NormalizedDoc.build(headline, summary))
+        extract_keywords_enhanced(headline, 'IR', doc=NormalizedDoc.build(headline))
+        briefing.classify_theme(headline, doc=NormalizedDoc.build(headline))
+        briefing.classify_theme(headline, doc=NormalizedDoc.build(headline))
+
+    def shared(headline, summary):
+        doc = NormalizedDoc.build(headline, summary)
+        headline_doc = NormalizedDoc.build(headline)
+        extractor.extract(doc.text, doc=doc)
+        engine._extract_keywords(doc.text, doc=doc)
+        generator.generate_analysis(headline, summary, research, doc=doc)
+        extract_keywords_enhanced(headline, 'IR', doc=headline_doc)
+        briefing.classify_theme(headline, doc=headline_doc)
+        briefing.classify_theme(headline, doc=headline_doc)
+
+    for name, fn in (('per stage', per_stage), ('shared doc', shared)):
+        for headline, summary in stories:  # warm regex caches
+            fn(headline, summary)
+        start = time.process_time()
+        for _ in range(n):
+            for headline, summary in stories:
+                fn(headline, summary)
+        per_story = (time.process_time() - start) / (n * len(stories)) * 1e6
+        print(f"{name:<11} {per_story:8.1f} us CPU per story")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Xray normalized document')
+    parser.add_argument('--bench', action='store_true', help='Benchmark CPU per story')
+    parser.add_argument('-n', type=int, default=500, help='Benchmark iterations')
+    args = parser.parse_args()
+
+    if args.bench:
+        _bench(args.n)
+    else:
+        doc = doc_for("BREAKING: Iran launches missiles at <b>Israel</b>", "Officials confirmed the strike.")
+        print(doc.text)
+        print(doc.tokens)
+        print([data.get('name') for _, data in doc.entity_hits])
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Xray Thread Research
+Research shared by every story in a story_thread_id, refreshed incrementally
+
+A thread of 15 stories about the same strike used to run 15 sets of
+Wikipedia, keyword and site searches. In thread mode the thread keeps one
+pool of lookup outcomes: site searches are anchored on the thread's first
+headline, Wikipedia context is fetched once per country, and a member's
+keyword search only runs when its keywords are mostly new to the thread.
+A story joining the thread therefore only runs its deltas. Each member's
+research is assembled from the pool entries standing in for its own
+lookups (a covered keyword search uses the search covering it), with
+sources deduped by URL, so source counts match per-story research.
+Lookups older than THREAD_RESEARCH_HOURS are dropped from the pool and
+re-run on the next member that needs them. Saves merge into the stored
+thread inside one write transaction, so workers sharing the store keep
+each other's lookups and members.
+
+Environment:
+  XRAY_CACHE_DIR               Directory for thread_research.sqlite3 (default: xray/cache)
+  XRAY_THREAD_RESEARCH=1       Enable thread mode (or --thread-research)
+  XRAY_THREAD_RESEARCH_HOURS   Lookup age before a refresh (default: 6)
+
+Usage:
+  python thread_research.py            # Show stored thread stats
+  python thread_research.py --purge    # Drop threads idle for a week
+"""
+
+import os
+import copy
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from research_cache import CACHE_DIR
+from query_planner import normalize_query, query_tokens
+
+STORE_FILE = 'thread_research.sqlite3'
+
+THREAD_RESEARCH_ENABLED = os.environ.get('XRAY_THREAD_RESEARCH', '0') == '1'
+THREAD_RESEARCH_HOURS = float(os.environ.get('XRAY_THREAD_RESEARCH_HOURS', '6'))
+
+# A member's keyword search is skipped when this share of its terms
+# has already been searched for the thread
+COVERED_SHARE = 0.5
+
+# Fresh lookups kept per thread (newest first)
+MAX_THREAD_LOOKUPS = 40
+# Member story ids remembered per thread (newest last)
+MAX_THREAD_MEMBERS = 200
+
+IDLE_PURGE_SECONDS = 7 * 24 * 3600
+
+
+def lookup_key(kind: str, query: str) -> str:
+    return f"{kind}|{normalize_query(query)}"
+
+
+class ThreadResearchStore:
+    """SQLite-backed thread_id -> shared research state"""
+
+    def __init__(self, path: str = None, max_age_hours: float = THREAD_RESEARCH_HOURS):
+        if path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            path = os.path.join(CACHE_DIR, STORE_FILE)
+        self.path = path
+        self.max_age = max_age_hours * 3600
+        self.reused = 0
+        self.run = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS threads (
+                thread_id   TEXT PRIMARY KEY,
+                state       TEXT NOT NULL,
+                updated_at  REAL NOT NULL
+            )
+        ''')
+        self._conn.commit()
+
+    @staticmethod
+    def new_state(anchor: str) -> Dict:
+        return {'anchor': anchor, 'lookups': {}, 'members': []}
+
+    def load(self, thread_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT state FROM threads WHERE thread_id = ?', (thread_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, thread_id: str, state: Dict) -> Dict:
+        """Merge state into the stored thread and prune it, atomically.
+
+        Another worker may have saved the thread since this one loaded it,
+        so the stored row is re-read inside a write transaction: the newer
+        entry of each lookup wins, members are combined and the stored
+        anchor is kept. Returns the merged state.
+        """
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute(
+                    'SELECT state FROM threads WHERE thread_id = ?', (thread_id,)
+                ).fetchone()
+                if row:
+                    state = self.merge(json.loads(row[0]), state)
+                self.prune(state)
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO threads (thread_id, state, updated_at) VALUES (?, ?, ?)',
+                    (thread_id, json.dumps(state), time.time())
+                )
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        return state
+
+    @staticmethod
+    def merge(stored: Dict, state: Dict) -> Dict:
+        lookups = dict(stored['lookups'])
+        for key, entry in state['lookups'].items():
+            if key not in lookups or entry['at'] >= lookups[key]['at']:
+                lookups[key] = entry
+        known = set(stored['members'])
+        members = stored['members'] + [m for m in state['members'] if m not in known]
+        return {'anchor': stored['anchor'], 'lookups': lookups, 'members': members}
+
+    def prune(self, state: Dict):
+        """Drop stale lookups, keep MAX_THREAD_LOOKUPS of them and the
+        newest MAX_THREAD_MEMBERS members"""
+        fresh = [(key, entry) for key, entry in state['lookups'].items() if self.is_fresh(entry)]
+        fresh.sort(key=lambda item: item[1]['at'], reverse=True)
+        state['lookups'] = dict(fresh[:MAX_THREAD_LOOKUPS])
+        state['members'] = state['members'][-MAX_THREAD_MEMBERS:]
+
+    def is_fresh(self, entry: Dict) -> bool:
+        return time.time() - entry.get('at', 0) <= self.max_age
+
+    def count(self, reused: int, run: int):
+        with self._lock:
+            self.reused += reused
+            self.run += run
+
+    def purge(self, idle_seconds: float = IDLE_PURGE_SECONDS) -> int:
+        with self._lock:
+            cur = self._conn.execute('DELETE FROM threads WHERE updated_at < ?', (time.time() - idle_seconds,))
+            self._conn.commit()
+        return cur.rowcount
+
+    def stats(self) -> Dict:
+        with self._lock:
+            threads = self._conn.execute('SELECT COUNT(*) FROM threads').fetchone()[0]
+        return {'threads': threads, 'lookups_reused': self.reused, 'lookups_run': self.run}
+
+
+class ThreadResearchPlanner:
+    """Research thread members from the shared pool, running only deltas"""
+
+    def __init__(self, research_engine, store: ThreadResearchStore):
+        self.engine = research_engine
+        self.store = store
+
+    def _member_lookups(self, state: Dict, headline: str, summary: str) -> Tuple[Dict, List[tuple], List[tuple]]:
+        """The member's entities, its plan and the lookups the thread still needs.
+
+        The plan has one (kind, args, pool key) per lookup the member would
+        have run on its own: its exact entry, or for a keyword search already
+        covered by the thread, the fresh search that covers it best.
+        """
+        entities, lookups = self.engine.plan_lookups(headline, summary)
+        searches = [(key, query_tokens(entry['query'])) for key, entry in state['lookups'].items()
+                    if entry['kind'] == 'search' and self.store.is_fresh(entry)]
+
+        plan, needed = [], []
+        for kind, args in lookups:
+            query = args[0]
+            if kind in ('fact_check', 'official'):
+                # One set of site searches per thread
+                query = query.split(' ', 1)[0] + ' ' + state['anchor']
+            key = lookup_key(kind, query)
+            entry = state['lookups'].get(key)
+            if not (entry and self.store.is_fresh(entry)) and kind == 'search' and searches:
+                tokens = query_tokens(query)
+                overlap, covering = max((len(tokens & other), other_key) for other_key, other in searches)
+                if tokens and overlap / len(tokens) >= COVERED_SHARE:
+                    entry, key = state['lookups'][covering], covering
+            if not (entry and self.store.is_fresh(entry)):
+                needed.append((kind, (query,)))
+            plan.append((kind, args, key))
+        return entities, plan, needed
+
+    def _member_research(self, state: Dict, entities: Dict, plan: List[tuple], skipped: Dict) -> Dict:
+        """Research from the member's own lookups, with sources deduped by URL"""
+        pairs = []
+        seen_urls = set()
+        for kind, args, key in plan:
+            if key in skipped:
+                pairs.append(((kind, args), skipped[key]))
+                continue
+            entry = state['lookups'].get(key)
+            # Copies so per-story consumers can annotate results safely
+            outcome = copy.deepcopy(entry['outcome']) if entry else None
+            if kind != 'wiki' and outcome:
+                unique = []
+                for result in outcome:
+                    url = result.get('url')
+                    if url and url in seen_urls:
+                        continue
+                    seen_urls.add(url)
+                    unique.append(result)
+                outcome = unique
+            pairs.append(((kind, args), outcome))
+        return self.engine.assemble_research(entities, pairs)
+
+    def research_batch(self, stories: List[Dict]) -> Dict[str, Dict]:
+        """Research thread stories keyed by story id; all deltas run in one pass"""
+        # research_engine imports this module, so SkippedLookup is imported late
+        from research_engine import SkippedLookup
+
+        if not stories:
+            return {}
+        states = {}
+        members = []
+        pending = {}
+        requested = 0
+        for story in stories:
+            thread_id = story['story_thread_id']
+            headline = story.get('headline', '')
+            if thread_id not in states:
+                states[thread_id] = self.store.load(thread_id) or self.store.new_state(headline)
+            state = states[thread_id]
+            entities, plan, needed = self._member_lookups(state, headline, story.get('summary', '') or '')
+            requested += len(plan)
+            for kind, args in needed:
+                pending.setdefault(lookup_key(kind, args[0]), (kind, args, set()))[2].add(thread_id)
+            if story['id'] not in state['members']:
+                state['members'].append(story['id'])
+            members.append((story['id'], thread_id, entities, plan))
+
+        lookups = [(kind, args) for kind, args, _ in pending.values()]
+        outcomes = self.engine._run_calls([(self.engine.run_lookup, lookup) for lookup in lookups])
+
+        # Lookups skipped because a backend was down (SkippedLookup) are not
+        # kept in the pool; they only mark this pass's research as partial
+        skipped = {}
+        now = time.time()
+        for (key, (kind, args, thread_ids)), outcome in zip(pending.items(), outcomes):
+            if isinstance(outcome, SkippedLookup):
+                skipped[key] = outcome
+                continue
+            for thread_id in thread_ids:
+                states[thread_id]['lookups'][key] = {'kind': kind, 'query': args[0],
+                                                     'outcome': outcome, 'at': now}
+
+        research = {}
+        for story_id, thread_id, entities, plan in members:
+            research[story_id] = self._member_research(states[thread_id], entities, plan, skipped)
+
+        for thread_id, state in states.items():
+            self.store.save(thread_id, state)
+
+        shared = max(0, requested - len(lookups))
+        self.store.count(shared, len(lookups))
+        print(f"[THREADS] {len(stories)} stories in {len(states)} threads: "
+              f"{requested} lookups -> {len(lookups)} run, {shared} from thread research")
+        return research
+
+
+_DEFAULT_STORE = None
+_DEFAULT_STORE_LOCK = threading.Lock()
+
+
+def get_default_thread_store() -> Optional[ThreadResearchStore]:
+    """Shared process-wide thread store, or None when it can't be opened"""
+    global _DEFAULT_STORE
+    with _DEFAULT_STORE_LOCK:
+        if _DEFAULT_STORE is None:
+            try:
+                _DEFAULT_STORE = ThreadResearchStore()
+            except (OSError, sqlite3.Error) as e:
+                print(f"  [THREAD RESEARCH ERROR] {e}")
+                return None
+        return _DEFAULT_STORE
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Xray thread research store')
+    parser.add_argument('--purge', action='store_true', help='Drop threads idle for a week')
+    args = parser.parse_args()
+
+    store = ThreadResearchStore()
+    if args.purge:
+        print(f"Purged {store.purge()} idle threads")
+    print(json.dumps(store.stats(), indent=2))
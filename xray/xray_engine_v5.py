@@ -11,6 +11,28 @@ Improvements over v4:
 - Fixed stale lockfile handling
 - Added country auto-correction based on content
 - Updated to use narrative journalism generator v9
+- Per-host token-bucket rate limiting (rate_limiter.py)
+- Concurrent research fan-out (XRAY_RESEARCH_WORKERS, default 8)
+- Research persisted per story and shared by truth/analysis (research_store.py)
+- Persistent research cache for Wikipedia/search lookups (research_cache.py)
+- Batch query planner dedupes research lookups across stories (query_planner.py)
+- Wikipedia entity context from a local snapshot (entity_kb.py --build)
+- Related stories from a resident sliding-window index in daemon mode (related_index.py)
+- Circuit breakers on search backends; partial research defers or rescales scoring,
+  and analyses written from it stay queued for regeneration
+- Bounded worker pool so stories are scored/analyzed independently (--workers)
+- run_all streams each story through research -> score -> analyze -> write (pipeline.py)
+- Story updates buffered and flushed in bulk with minimal response bodies
+- --distributed: lease-based story claims so workers on many hosts split the work
+- --daemon: long-running mode with warm state and created_at/id cursor polling
+- Durable SQLite retry queue with scheduled backoff and dead letters (retry_queue.py)
+- --drain: keyset-paginated fetch_iter works through any backlog size in one run
+- Junk stories triaged once (triage_status) and excluded from later batches
+- Priority scheduling of pending stories with per-class p95 latency (scheduler.py)
+- Offline pre-score (prescore.py); only confident-high, non-priority stories skip research for scoring
+- Story text normalized once (text_doc.py) and shared by research, scoring and analysis
+- --thread-research: one incrementally refreshed research pool per story thread (thread_research.py)
+- Analyses whose inputs hash to the stored xray_analysis_input_hash are not regenerated
 
 Usage:
   python xray_engine_v5.py                    # Run all engines
@@ -18,6 +40,13 @@ Usage:
   python xray_engine_v5.py --analysis         # Only analyze stories
   python xray_engine_v5.py --pin              # Only update pinned stories
   python xray_engine_v5.py --limit 20         # Process 20 stories per engine
+  python xray_engine_v5.py --refresh-research # Ignore stored research artifacts
+  python xray_engine_v5.py --workers 4        # Process 4 stories at a time
+  python xray_engine_v5.py --distributed      # Claim stories by lease, no local lockfile
+  python xray_engine_v5.py --daemon           # Keep running, poll for new stories
+  python xray_engine_v5.py --drain            # Process the whole backlog, --limit per batch
+  python xray_engine_v5.py --no-prescore      # Research every story before scoring
+  python xray_engine_v5.py --thread-research  # Share research across each story thread
 """
 
 import os
@@ -25,11 +54,16 @@ import re
 import sys
 import json
 import fcntl
+import hashlib
 import time
+import signal
+import socket
 import logging
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Iterator
 
 # Lockfile to prevent concurrent runs
 LOCKFILE = '/tmp/xray_engine_v5.lock'
@@ -48,7 +82,16 @@ logger = logging.getLogger(__name__)
 
 # Import v5 components
 from research_engine import ResearchEngine
-from analysis_generator_v9 import NarrativeAnalysisGenerator as ProfessionalAnalysisGenerator
+from research_store import ResearchArtifactStore
+from related_index import RelatedStoryIndex
+from pipeline import StoryPipeline
+from retry_queue import get_default_retry_queue
+from scheduler import StoryScheduler, pool_size
+from prescore import PreScorer, PRESCORE_ENABLED
+from thread_research import get_default_thread_store, THREAD_RESEARCH_ENABLED
+from text_doc import doc_for
+from rate_limiter import RATE_LIMITER
+from analysis_generator_v9 import NarrativeAnalysisGenerator as ProfessionalAnalysisGenerator, GENERATOR_VERSION
 from pin_calculator import PinCalculator
 
 # Load environment
@@ -70,11 +113,50 @@ def get_service_key():
 
 SERVICE_KEY = get_service_key()
 
-# Retry queue for failed stories
+# Parallel lookups per research_story call (Wikipedia + search fan-out)
+RESEARCH_WORKERS = int(os.environ.get('XRAY_RESEARCH_WORKERS', '8'))
+# Stories scored/analyzed at once per engine run (1 = one at a time)
+STORY_WORKERS = int(os.environ.get('XRAY_STORY_WORKERS', '1'))
+# Rows per page for SupabaseClient.fetch_iter (--drain)
+FETCH_PAGE_SIZE = int(os.environ.get('XRAY_FETCH_PAGE_SIZE', '200'))
+# Buffered story updates flushed per bulk request (config/migration_bulk_update_stories.sql)
+BULK_UPDATE_SIZE = int(os.environ.get('XRAY_BULK_UPDATE_SIZE', '25'))
+BULK_UPDATE_RPC = {'stories': 'xray_bulk_update_stories'}
+# Distributed mode: stories are claimed with a lease (config/migration_story_leases.sql)
+WORKER_ID = os.environ.get('XRAY_WORKER_ID') or f"{socket.gethostname()}:{os.getpid()}"
+LEASE_SECONDS = int(os.environ.get('XRAY_LEASE_SECONDS', '900'))
+# Claims per batch when stories held back by the retry queue have to be topped up
+CLAIM_ROUNDS = 3
+# Daemon mode: poll for new stories, re-sweep the full backlog and re-pin periodically
+POLL_SECONDS = float(os.environ.get('XRAY_POLL_SECONDS', '15'))
+SWEEP_SECONDS = float(os.environ.get('XRAY_SWEEP_SECONDS', '600'))
+PIN_SECONDS = float(os.environ.get('XRAY_PIN_SECONDS', '300'))
+
+# Written to xray_analysis_version; stories below it are (re)analyzed.
+# Bumping it queues the whole table: run backfill.py for the history.
+# Re-queued stories are only regenerated when their input hash changed, so
+# bump analysis_generator_v9.GENERATOR_VERSION too when the generator changed.
+ANALYSIS_VERSION = 5
+
+# Priority classes that always get full research, whatever the pre-score
+PRESCORE_RESEARCH_CLASSES = {'critical', 'high'}
+
+# Failed stories of this run (for the summary) and the durable retry schedule
 FAILED_STORIES = []
+FAILED_STORIES_LOCK = threading.Lock()
+RETRY_QUEUE = get_default_retry_queue()
 
-def with_retry(func, story, max_retries=3, delay=2):
-    """Execute function with exponential backoff retry"""
+def with_retry(func, story, stage: str = None, max_retries=None, delay=2):
+    """Execute function, handing failures to the retry queue.
+    
+    With RETRY_QUEUE active there is a single attempt by default: a failed
+    story is scheduled for stage (exponential backoff, dead-letter after N
+    attempts) instead of sleeping in the worker. Without a queue (disabled
+    or failed to open) it defaults to 3 inline attempts with exponential
+    backoff, as before the queue existed.
+    """
+    if max_retries is None:
+        max_retries = 1 if RETRY_QUEUE else 3
     story_id = story.get('id', 'unknown')
     headline = story.get('headline', '')[:50]
     
@@ -83,14 +165,17 @@ def with_retry(func, story, max_retries=3, delay=2):
             return func(story)
         except Exception as e:
             if attempt == max_retries - 1:
-                FAILED_STORIES.append({
-                    'id': story_id,
-                    'headline': headline,
-                    'error': str(e),
-                    'timestamp': datetime.now(timezone.utc).isoformat()
-                })
+                with FAILED_STORIES_LOCK:
+                    FAILED_STORIES.append({
+                        'id': story_id,
+                        'headline': headline,
+                        'error': str(e),
+                        'timestamp': datetime.now(timezone.utc).isoformat()
+                    })
                 logger.error(f"Retry failed for {headline}: {e}")
                 print(f"  [RETRY FAILED] {headline}: {e}")
+                if RETRY_QUEUE and stage:
+                    RETRY_QUEUE.record_failure(story_id, stage, str(e), headline)
                 return False
             wait = delay * (2 ** attempt)  # 2, 4, 8 seconds
             logger.warning(f"Retry {attempt+1}/{max_retries} for {headline}, waiting {wait}s")
@@ -99,6 +184,79 @@ def with_retry(func, story, max_retries=3, delay=2):
     return False
 
 
+def process_stories(func, stories: List[Dict], workers: int = 1) -> Dict[str, bool]:
+    """Run func on every story, on a bounded thread pool when workers > 1.
+    
+    Each story succeeds or fails on its own, so one story sleeping through
+    inline retries only hold up its own worker. Returns {story_id: result}.
+    """
+    results = {}
+    if workers <= 1 or len(stories) < 2:
+        for story in stories:
+            results[story['id']] = func(story)
+        return results
+    
+    with ThreadPoolExecutor(max_workers=min(workers, len(stories))) as pool:
+        futures = {pool.submit(func, story): story for story in stories}
+        for future in as_completed(futures):
+            story = futures[future]
+            try:
+                results[story['id']] = future.result()
+            except Exception as e:
+                logger.error(f"Worker failed for {story.get('headline', '')[:50]}: {e}")
+                print(f"  [WORKER ERROR] {story.get('headline', '')[:50]}: {e}")
+                results[story['id']] = False
+    return results
+
+
+def fetch_pending(db, stage: str, select: str, filters: Dict, limit: int,
+                  scheduler: StoryScheduler) -> List[Dict]:
+    """Up to limit stories needing a stage, most urgent first.
+    
+    Stories the retry queue holds back (backing off or dead) never take a
+    slot: plain fetches page past them, and lease claims top the batch up
+    and then release the held-back leases for other workers. Without
+    leases, retries that are due are added on top.
+    """
+    waiting = RETRY_QUEUE.waiting(stage) if RETRY_QUEUE else set()
+    if db.worker_id:
+        # Claimed batches already include due stories; fetching by id would bypass leases
+        stories, held = [], []
+        seen = set()
+        for _ in range(CLAIM_ROUNDS):
+            wanted = limit - len(stories)
+            # The claim counts rows this worker already holds as eligible:
+            # exclude the ones taken this batch so a top-up finds new rows
+            claimed = [s for s in db.claim_stories(stage, select, wanted, exclude=seen)
+                       if s['id'] not in seen]
+            seen.update(s['id'] for s in claimed)
+            stories += [s for s in claimed if s['id'] not in waiting]
+            held += [s['id'] for s in claimed if s['id'] in waiting]
+            if len(claimed) < wanted or len(stories) >= limit:
+                break
+        if held:
+            db.release_stories(held)
+        return scheduler.order(stories)
+    
+    # Fetch a wider pool so priority, not arrival order, decides who gets a slot
+    pool = pool_size(limit)
+    stories = []
+    for story in db.fetch_iter('stories', select=select, filters=filters, page_size=pool):
+        if story['id'] not in waiting:
+            stories.append(story)
+            if len(stories) >= pool:
+                break
+    stories = scheduler.order(stories, limit)
+    if not RETRY_QUEUE:
+        return stories
+    have = {s['id'] for s in stories}
+    due = [sid for sid in RETRY_QUEUE.due(stage, limit) if sid not in have]
+    if due:
+        print(f"[RETRY] {len(due)} {stage} retries due")
+        stories = db.fetch('stories', select=select, filters={'id': f"in.({','.join(due)})"}) + stories
+    return scheduler.order(stories)
+
+
 # Country detection patterns for auto-correction
 COUNTRY_PATTERNS = {
     'CA': {
@@ -129,8 +287,12 @@ COUNTRY_PATTERNS = {
 
 def detect_country_from_content(headline: str, summary: str) -> tuple:
     """Detect proper country from content, return (country_code, country_name) or None"""
-    combined = f"{headline} {summary}".lower()
-    
+    # Triage, scoring and analysis all ask; match once per story
+    doc = doc_for(headline, summary)
+    return doc.derive('country', lambda: _match_country(doc.lower))
+
+
+def _match_country(combined: str) -> tuple:
     for code, data in COUNTRY_PATTERNS.items():
         # Check patterns
         for pattern in data['patterns']:
@@ -171,7 +333,7 @@ def acquire_lock():
 class SupabaseClient:
     """Lightweight Supabase REST client"""
     
-    def __init__(self, url: str, key: str):
+    def __init__(self, url: str, key: str, bulk_size: int = BULK_UPDATE_SIZE):
         self.url = url
         self.key = key
         self.headers = {
@@ -180,6 +342,14 @@ class SupabaseClient:
             'Content-Type': 'application/json',
             'Prefer': 'return=representation'
         }
+        # Writes never need the row echoed back (it includes xray_analysis)
+        self.write_headers = dict(self.headers, Prefer='return=minimal')
+        self.bulk_size = max(1, bulk_size)
+        self._pending = {}  # table -> {id: merged fields}
+        self._pending_lock = threading.Lock()
+        self._bulk_rpc_enabled = True
+        # Set to claim work through leases instead of plain fetches (--distributed)
+        self.worker_id = None
     
     def fetch(self, table: str, select: str = '*', filters: Dict = None,
               order: str = None, limit: int = None) -> List[Dict]:
@@ -193,41 +363,243 @@ class SupabaseClient:
             params['limit'] = str(limit)
         
         url = f"{self.url}/rest/v1/{table}"
-        resp = requests.get(url, headers=self.headers, params=params)
+        resp = RATE_LIMITER.request('GET', url, headers=self.headers, params=params)
         
         if resp.status_code != 200:
             raise Exception(f"Fetch failed: {resp.status_code} {resp.text}")
         return resp.json()
     
+    def fetch_iter(self, table: str, select: str = '*', filters: Dict = None,
+                   page_size: int = FETCH_PAGE_SIZE, descending: bool = True,
+                   start: tuple = None) -> Iterator[Dict]:
+        """Stream rows page by page, keyset-paginated on (created_at, id).
+        
+        Filters work as in fetch(); 'or'/'and' filters are combined with the
+        keyset condition under one 'and'. Only one page is held in memory and
+        every page is an index range scan instead of an OFFSET. start resumes
+        after a (created_at, id) cursor.
+        """
+        fields = select.split(',')
+        if select != '*':
+            fields += [col for col in ('id', 'created_at') if col not in fields]
+        op, direction = ('lt', 'desc') if descending else ('gt', 'asc')
+        base = dict(filters or {})
+        conditions = []
+        if 'or' in base:
+            conditions.append('or' + base.pop('or'))
+        if 'and' in base:
+            conditions.append(base.pop('and')[1:-1])
+        
+        cursor = start
+        while True:
+            params = dict(base)
+            keyset = list(conditions)
+            if cursor:
+                created_at, id = cursor
+                keyset.append(f'or(created_at.{op}."{created_at}",'
+                              f'and(created_at.eq."{created_at}",id.{op}.{id}))')
+            if keyset:
+                params['and'] = '(' + ','.join(keyset) + ')'
+            page = self.fetch(table, select=','.join(fields), filters=params,
+                              order=f'created_at.{direction},id.{direction}', limit=page_size)
+            yield from page
+            if len(page) < page_size:
+                return
+            cursor = (page[-1]['created_at'], page[-1]['id'])
+    
+    def claim_stories(self, stage: str, select: str, limit: int,
+                      lease_seconds: int = LEASE_SECONDS, exclude: List[str] = None) -> List[Dict]:
+        """Lease up to limit stories needing a stage ('truth' or 'analysis'),
+        skipping the ids in exclude (e.g. stories this worker already holds)"""
+        resp = RATE_LIMITER.request(
+            'POST', f"{self.url}/rest/v1/rpc/xray_claim_stories",
+            headers=self.headers,
+            params={'select': select},
+            json={
+                'worker': self.worker_id,
+                'stage': stage,
+                'batch_size': limit,
+                'lease_seconds': lease_seconds,
+                'exclude_ids': list(exclude or []),
+                'min_version': ANALYSIS_VERSION
+            },
+            timeout=30
+        )
+        if resp.status_code != 200:
+            raise Exception(f"Claim failed: {resp.status_code} {resp.text}")
+        return resp.json()
+    
+    def release_stories(self, ids: List[str]) -> int:
+        """Release this worker's leases so other workers can pick the stories up"""
+        if not self.worker_id or not ids:
+            return 0
+        try:
+            resp = RATE_LIMITER.request(
+                'POST', f"{self.url}/rest/v1/rpc/xray_release_stories",
+                headers=self.headers,
+                json={'worker': self.worker_id, 'story_ids': list(ids)},
+                timeout=30
+            )
+            if resp.status_code == 200:
+                return resp.json() or 0
+            print(f"  [LEASE] Release failed: {resp.status_code} {resp.text[:100]}")
+        except Exception as e:
+            print(f"  [LEASE] Release failed: {e}")
+        return 0
+    
     def update(self, table: str, id: str, data: Dict) -> bool:
         url = f"{self.url}/rest/v1/{table}?id=eq.{id}"
-        resp = requests.patch(url, headers=self.headers, json=data)
+        resp = RATE_LIMITER.request('PATCH', url, headers=self.write_headers, json=data)
         return resp.status_code in [200, 204]
+    
+    def update_many(self, table: str, ids: List[str], data: Dict) -> bool:
+        """Apply the same update to many rows in one PATCH"""
+        if not ids:
+            return True
+        url = f"{self.url}/rest/v1/{table}"
+        resp = RATE_LIMITER.request(
+            'PATCH', url, headers=self.write_headers,
+            params={'id': f"in.({','.join(ids)})"}, json=data
+        )
+        return resp.status_code in [200, 204]
+    
+    def queue_update(self, table: str, id: str, data: Dict) -> Optional[List[Dict]]:
+        """Buffer an update, merging it with any pending fields for the row.
+        
+        Flushes the table once bulk_size rows are pending. Returns None while
+        buffering, or the failed rows ([{'id', 'error'}]) of the flush it
+        triggered (every other row pending for the table was written).
+        """
+        with self._pending_lock:
+            rows = self._pending.setdefault(table, {})
+            rows.setdefault(id, {}).update(data)
+            if len(rows) < self.bulk_size:
+                return None
+        return self.flush_updates(table)
+    
+    def pending_updates(self, table: str = None) -> int:
+        with self._pending_lock:
+            if table:
+                return len(self._pending.get(table, {}))
+            return sum(len(rows) for rows in self._pending.values())
+    
+    def flush_updates(self, table: str = None) -> List[Dict]:
+        """Write all buffered updates (for one table or all) and return the
+        rows that failed as [{'id', 'error'}]"""
+        with self._pending_lock:
+            tables = [table] if table else list(self._pending)
+            batches = {t: self._pending.pop(t, {}) for t in tables}
+        
+        failed = []
+        for t, rows in batches.items():
+            items = list(rows.items())
+            for i in range(0, len(items), self.bulk_size):
+                failed.extend(self._write_batch(t, dict(items[i:i + self.bulk_size])))
+        return failed
+    
+    def _write_batch(self, table: str, rows: Dict[str, Dict]) -> List[Dict]:
+        """One bulk RPC for the batch, per-row PATCH when the RPC is missing"""
+        rpc = BULK_UPDATE_RPC.get(table)
+        if rpc and self._bulk_rpc_enabled:
+            payload = {'updates': [{'id': id, 'fields': fields} for id, fields in rows.items()]}
+            try:
+                resp = RATE_LIMITER.request(
+                    'POST', f"{self.url}/rest/v1/rpc/{rpc}",
+                    headers=self.headers, json=payload, timeout=60
+                )
+            except Exception as e:
+                return [{'id': id, 'error': str(e)} for id in rows]
+            if resp.status_code == 200:
+                return resp.json() or []
+            if resp.status_code == 404:
+                # Function not deployed yet: fall back for the rest of the run
+                print(f"  [DB] {rpc} not found, falling back to per-row updates")
+                self._bulk_rpc_enabled = False
+            else:
+                error = f"{resp.status_code} {resp.text[:200]}"
+                return [{'id': id, 'error': error} for id in rows]
+        
+        failed = []
+        for id, fields in rows.items():
+            try:
+                if not self.update(table, id, fields):
+                    failed.append({'id': id, 'error': 'update rejected'})
+            except Exception as e:
+                failed.append({'id': id, 'error': str(e)})
+        return failed
 
 
 class TruthEngineV5:
     """Truth Engine v5 - Enhanced scoring with retry and logging"""
     
-    def __init__(self, db: SupabaseClient):
+    def __init__(self, db: SupabaseClient, research_engine: ResearchEngine = None,
+                 workers: int = STORY_WORKERS, scheduler: StoryScheduler = None,
+                 prescorer: PreScorer = None):
         self.db = db
-        self.research_engine = ResearchEngine()
+        self.research_engine = research_engine or ResearchEngine(concurrent=True, max_workers=RESEARCH_WORKERS)
+        self.workers = workers
+        self.scheduler = scheduler or StoryScheduler()
+        self.prescorer = prescorer  # None: research every story
+        self.prescored = 0
+        self._prescored_lock = threading.Lock()
+        self.last_results = {}  # story_id -> scored ok, for the latest run
+    
+    # source_type lets rejection_reason drop social posts without a country
+    # before scoring, as the analysis stage (which always selected it) does
+    SELECT = ('id,headline,summary,country_name,country_code,category,external_url,story_thread_id,'
+              'source_type,xray_analysis_version,xray_analysis_input_hash,created_at,is_breaking,'
+              'confidence_score,source_name,source_count,full_text')
+    UNSCORED = {'and': '(or(xray_score.is.null,xray_score.eq.0),'
+                       'or(triage_status.is.null,triage_status.neq.rejected))'}
     
     def fetch_unscored(self, limit: int = 50) -> List[Dict]:
-        return self.db.fetch(
-            'stories',
-            select='id,headline,summary,country_name,country_code,category,external_url',
-            filters={'or': '(xray_score.is.null,xray_score.eq.0)'},
-            order='created_at.desc',
-            limit=limit
-        )
+        """Most urgent unscored stories first (see scheduler.py)"""
+        return fetch_pending(self.db, 'truth', self.SELECT, self.UNSCORED, limit, self.scheduler)
     
-    def calculate_score(self, story: Dict) -> tuple:
-        """Calculate truth score with enhanced research"""
-        headline = story.get('headline', '')
-        summary = story.get('summary', '')
+    def iter_unscored(self, page_size: int = FETCH_PAGE_SIZE) -> Iterator[Dict]:
+        """Every unscored story, newest first, streamed page by page"""
+        return self.db.fetch_iter('stories', select=self.SELECT, filters=self.UNSCORED, page_size=page_size)
+    
+    def quick_score(self, story: Dict) -> Optional[Dict]:
+        """Offline pre-score when it can stand on its own, else None.
+        
+        Only confident-high pre-scores stand; stories in or below the
+        ambiguous band, or in a high priority class, need full research.
+        """
+        if not self.prescorer:
+            return None
+        prescore = self.prescorer.score(story)
+        if not self.prescorer.is_confident(prescore):
+            return None
+        if self.scheduler.classify(story)[0] in PRESCORE_RESEARCH_CLASSES:
+            return None
+        return prescore
+    
+    def calculate_score(self, story: Dict, research: Dict = None) -> tuple:
+        """Calculate truth score with enhanced research.
+        
+        Without research at hand, a confident offline pre-score is used
+        as is (research is then None). Returns (None, 'DEFERRED', research)
+        when no web search could run (search backends down), so the story
+        stays unscored for a later run.
+        """
+        if research is None:
+            quick = self.quick_score(story)
+            if quick:
+                with self._prescored_lock:
+                    self.prescored += 1
+                print(f"  [PRESCORE] {quick['score']} {quick['verdict']} (no research needed)")
+                return quick['score'], quick['verdict'], None
+            # Get research data (persisted per story, reused by the analysis stage)
+            research = self.research_engine.research_for_story(story)
+        
+        # Partial research: scale count thresholds by the share of searches that ran
+        coverage = research.get('search_coverage', 1.0) if research.get('partial') else 1.0
+        if coverage <= 0:
+            return None, 'DEFERRED', research
         
-        # Get research data
-        research = self.research_engine.research_story(headline, summary)
+        def threshold(n: int) -> int:
+            return max(1, round(n * coverage))
         
         # Base score
         score = 40
@@ -235,7 +607,7 @@ class TruthEngineV5:
         
         # Source quality bonus
         tier1 = research.get('tier1_count', 0)
-        if tier1 >= 3:
+        if tier1 >= threshold(3):
             score += 25
         elif tier1 >= 1:
             score += 15
@@ -250,9 +622,9 @@ class TruthEngineV5:
         
         # Source volume bonus
         total_sources = research.get('source_count', 0)
-        if total_sources >= 10:
+        if total_sources >= threshold(10):
             score += 10
-        elif total_sources >= 5:
+        elif total_sources >= threshold(5):
             score += 5
         
         # Determine verdict
@@ -289,25 +661,21 @@ class TruthEngineV5:
         r'worth.*buying', r'should.*buy', r'review.*my', r'rate my',
         r'is it.*worth',
     ]
-    NON_NEWS_COMPILED = None
+    # All patterns in one alternation: a single scan per story
+    NON_NEWS_RE = re.compile('|'.join(map('(?:{})'.format, NON_NEWS_PATTERNS)), re.IGNORECASE)
 
-    def is_quality_story(self, story: Dict) -> bool:
-        """Filter out low-quality/junk stories"""
+    def rejection_reason(self, story: Dict) -> Optional[str]:
+        """Why a story is junk, or None if it is news"""
         headline = story.get('headline', '') or ''
         summary = story.get('summary', '') or ''
         combined = (headline + ' ' + summary).lower()
 
-        if self.__class__.NON_NEWS_COMPILED is None:
-            self.__class__.NON_NEWS_COMPILED = [
-                re.compile(p, re.IGNORECASE) for p in self.__class__.NON_NEWS_PATTERNS
-            ]
-
         if len(headline) < 15:
-            return False
+            return 'headline too short'
 
-        for pattern in self.__class__.NON_NEWS_COMPILED:
-            if pattern.search(combined):
-                return False
+        match = self.NON_NEWS_RE.search(combined)
+        if match:
+            return f'non-news: {match.group(0)[:40]}'
 
         source_type = story.get('source_type', 'legacy')
         country = story.get('country_name', '') or ''
@@ -315,18 +683,52 @@ class TruthEngineV5:
             # But check if content suggests a country
             detected = detect_country_from_content(headline, summary)
             if detected:
-                return True  # Keep it, we can fix the country
-            return False
+                return None  # Keep it, we can fix the country
+            return 'social post without a country'
 
-        return True
+        return None
 
-    def _do_score_story(self, story: Dict) -> bool:
-        """Internal scoring logic"""
+    def is_quality_story(self, story: Dict) -> bool:
+        """Filter out low-quality/junk stories"""
+        return self.rejection_reason(story) is None
+
+    def triage(self, stories: List[Dict]) -> List[Dict]:
+        """Mark junk stories as rejected in one write and return the rest.
+        
+        Rejected stories (triage_status = 'rejected') are excluded by the
+        unscored/unanalyzed queries, so they stop taking up each run's limit.
+        """
+        kept = []
+        rejected = {}
+        for story in stories:
+            reason = self.rejection_reason(story)
+            if reason:
+                rejected.setdefault(reason.split(':')[0], []).append(story['id'])
+                print(f"[TRIAGE] Rejected ({reason}): {story.get('headline', '')[:50]}")
+            else:
+                kept.append(story)
+        for reason, ids in rejected.items():
+            if not self.db.update_many('stories', ids, {
+                'triage_status': 'rejected',
+                'triage_reason': reason,
+                'triaged_at': datetime.now(timezone.utc).isoformat()
+            }):
+                logger.warning(f"Could not mark {len(ids)} stories as rejected")
+        if rejected:
+            logger.info(f"Triage rejected {sum(len(ids) for ids in rejected.values())} stories")
+        return kept
+
+    def build_score_update(self, story: Dict, research: Dict = None) -> Optional[Dict]:
+        """Score a story and return its column update (None when deferred)"""
         story_id = story['id']
         headline = story.get('headline', '')
         summary = story.get('summary', '')
         
-        score, verdict, research = self.calculate_score(story)
+        score, verdict, research = self.calculate_score(story, research)
+        if score is None:
+            print("  [DEFERRED] Search backends unavailable, leaving unscored")
+            logger.warning(f"Deferred scoring for {story_id}: research skipped {research.get('skipped')}")
+            return None
         
         # Also fix country if detected
         current_country = story.get('country_code', '')
@@ -344,10 +746,22 @@ class TruthEngineV5:
             update_data['country_name'] = name
             print(f"  [COUNTRY] Auto-corrected to {name} ({code})")
         
-        success = self.db.update('stories', story_id, update_data)
+        return update_data
+    
+    def _do_score_story(self, story: Dict) -> bool:
+        """Internal scoring logic.
+        
+        Written directly rather than through queue_update: with_retry needs
+        this story's own write result (run_all batches through the pipeline).
+        """
+        update_data = self.build_score_update(story)
+        if update_data is None:
+            return False
+        
+        success = self.db.update('stories', story['id'], update_data)
         
         if success:
-            logger.info(f"Scored story {story_id}: {score} - {verdict}")
+            logger.info(f"Scored story {story['id']}: {update_data['xray_score']} - {update_data['xray_verdict']}")
         
         return success
     
@@ -364,7 +778,12 @@ class TruthEngineV5:
         print(f"[TRUTH] Scoring: {headline[:50]}...")
         logger.info(f"Scoring story: {headline[:50]}")
         
-        return with_retry(self._do_score_story, story)
+        success = with_retry(self._do_score_story, story, 'truth')
+        if success:
+            self.scheduler.record_verdict(story)
+            if RETRY_QUEUE:
+                RETRY_QUEUE.resolve(story_id, 'truth')
+        return success
     
     def run(self, limit: int = 20, verbose: bool = True) -> int:
         """Run truth engine on unscored stories"""
@@ -379,10 +798,16 @@ class TruthEngineV5:
         if verbose:
             print(f"\nFound {len(stories)} unscored stories")
         
-        scored = 0
-        for story in stories:
-            if self.score_story(story):
-                scored += 1
+        # Mark junk once so it drops out of future batches
+        candidates = self.triage(stories)
+        
+        # Plan research for the whole batch so shared queries run once;
+        # confidently pre-scored stories skip it
+        self.research_engine.research_batch([s for s in candidates if self.quick_score(s) is None])
+        
+        self.last_results = process_stories(self.score_story, candidates, self.workers)
+        scored = sum(1 for ok in self.last_results.values() if ok)
+        self.db.release_stories([s['id'] for s in stories])
         
         if verbose:
             print(f"\nScored: {scored} stories")
@@ -391,29 +816,77 @@ class TruthEngineV5:
         return scored
 
 
+def analysis_input_hash(inputs: Dict) -> str:
+    """SHA-256 of the generate_analysis inputs plus the generator version.
+    
+    Related stories are left out: they come from a window relative to now,
+    so they would change the hash of every story as it ages.
+    """
+    stable = {k: v for k, v in inputs.items() if k != 'related_stories'}
+    payload = json.dumps({'generator': GENERATOR_VERSION, **stable}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def analysis_columns(analysis: str, input_hash: str, partial: bool = False) -> Dict:
+    """Story columns written with a freshly generated analysis.
+    
+    An analysis from partial research (some searches skipped) is written
+    unversioned and without its hash, so the story stays queued and is
+    regenerated once full research is possible.
+    """
+    return {
+        'xray_analysis': analysis,
+        'xray_analysis_version': 0 if partial else ANALYSIS_VERSION,
+        'xray_analysis_input_hash': None if partial else input_hash,
+        'xray_analysis_at': datetime.now(timezone.utc).isoformat()
+    }
+
+
 class AnalysisEngineV5:
     """Analysis Engine v5 - Human-like analysis with fixed filter"""
     
-    def __init__(self, db: SupabaseClient):
+    def __init__(self, db: SupabaseClient, research_engine: ResearchEngine = None,
+                 workers: int = STORY_WORKERS, scheduler: StoryScheduler = None):
         self.db = db
-        self.research_engine = ResearchEngine()
+        self.research_engine = research_engine or ResearchEngine(concurrent=True, max_workers=RESEARCH_WORKERS)
+        self.workers = workers
+        self.scheduler = scheduler or StoryScheduler()
+        self.last_results = {}  # story_id -> analyzed ok, for the latest run
         self.analysis_generator = ProfessionalAnalysisGenerator()
+        self.unchanged = 0  # analyses kept because their inputs hadn't changed
+        self._unchanged_lock = threading.Lock()
+    
+    SELECT = ('id,headline,summary,country_name,country_code,category,source_type,story_thread_id,'
+              'external_url,created_at,is_breaking,confidence_score,source_name,'
+              'xray_analysis_version,xray_analysis_input_hash')
+    # FIXED: Changed xray_analysis.eq. to xray_analysis.eq."" (proper PostgREST syntax)
+    UNANALYZED = {'and': f'(or(xray_analysis.is.null,xray_analysis.eq."",xray_analysis_version.lt.{ANALYSIS_VERSION}),'
+                         'or(triage_status.is.null,triage_status.neq.rejected))'}
     
     def fetch_unanalyzed(self, limit: int = 10) -> List[Dict]:
-        # FIXED: Changed xray_analysis.eq. to xray_analysis.eq."" (proper PostgREST syntax)
-        return self.db.fetch(
-            'stories',
-            select='id,headline,summary,country_name,country_code,category,source_type',
-            filters={'or': '(xray_analysis.is.null,xray_analysis.eq."",xray_analysis_version.lt.5)'},
-            order='created_at.desc',
-            limit=limit
-        )
+        """Most urgent stories needing analysis first (see scheduler.py)"""
+        return fetch_pending(self.db, 'analysis', self.SELECT, self.UNANALYZED, limit, self.scheduler)
     
-    def _do_analyze_story(self, story: Dict) -> bool:
-        """Internal analysis logic"""
+    @staticmethod
+    def is_outdated(story: Dict) -> bool:
+        """Never analyzed, or analyzed below ANALYSIS_VERSION"""
+        return (story.get('xray_analysis_version') or 0) < ANALYSIS_VERSION
+    
+    def iter_unanalyzed(self, page_size: int = FETCH_PAGE_SIZE) -> Iterator[Dict]:
+        """Every story needing analysis, newest first, streamed page by page"""
+        return self.db.fetch_iter('stories', select=self.SELECT, filters=self.UNANALYZED, page_size=page_size)
+    
+    def analysis_inputs(self, story: Dict, research: Dict = None) -> tuple:
+        """Everything generation needs besides the generator itself.
+        
+        Returns (update_data, generate_analysis kwargs). The I/O happens
+        here (research, related stories) so generation can run elsewhere,
+        e.g. in backfill.py's process pool.
+        """
         story_id = story['id']
         headline = story.get('headline', '')
         summary = story.get('summary', '')
+        update_data = {}
         
         # Auto-correct country if detected from content
         current_country = story.get('country_code', '')
@@ -421,38 +894,68 @@ class AnalysisEngineV5:
         
         if detected and current_country in ['', 'XX', 'World', None]:
             code, name = detected
-            self.db.update('stories', story_id, {
-                'country_code': code,
-                'country_name': name
-            })
+            update_data['country_code'] = code
+            update_data['country_name'] = name
             print(f"  [COUNTRY] Corrected to {name} ({code})")
         
-        # Get research
-        research = self.research_engine.research_story(headline, summary)
+        # Get research (reuses the artifact stored by the truth stage)
+        if research is None:
+            research = self.research_engine.research_for_story(story)
         
         # Find related stories
         related = self.research_engine.find_related_stories(
             story_id,
-            research.get('entities', {})
+            research.get('entities', {}),
+            headline=headline
         )
         
-        # Generate analysis
+        return update_data, {
+            'headline': headline,
+            'summary': summary,
+            'research': research,
+            'related_stories': related
+        }
+    
+    def unchanged_update(self, story: Dict, update_data: Dict, input_hash: str) -> Optional[Dict]:
+        """The update for a story whose stored analysis came from the same
+        inputs (only the version is bumped), or None when it must be generated"""
+        if input_hash != story.get('xray_analysis_input_hash'):
+            return None
+        with self._unchanged_lock:
+            self.unchanged += 1
+        print("  [UNCHANGED] Inputs match the stored analysis, not regenerating")
+        if (story.get('xray_analysis_version') or 0) < ANALYSIS_VERSION:
+            update_data = dict(update_data, xray_analysis_version=ANALYSIS_VERSION)
+        return update_data
+    
+    def build_analysis_update(self, story: Dict, research: Dict = None) -> Dict:
+        """Generate a story's analysis and return its column update.
+        
+        The update has no xray_analysis (and may be empty) when the inputs
+        are unchanged since the stored analysis.
+        """
+        update_data, inputs = self.analysis_inputs(story, research)
+        input_hash = analysis_input_hash(inputs)
+        unchanged = self.unchanged_update(story, update_data, input_hash)
+        if unchanged is not None:
+            return unchanged
+        
+        # Generate analysis (same normalized text research used)
         analysis = self.analysis_generator.generate_analysis(
-            headline=headline,
-            summary=summary,
-            research=research,
-            related_stories=related
+            **inputs, doc=doc_for(inputs['headline'], inputs['summary'])
         )
+        update_data.update(analysis_columns(analysis, input_hash, inputs['research'].get('partial')))
+        return update_data
+    
+    def _do_analyze_story(self, story: Dict) -> bool:
+        """Internal analysis logic (written directly, see _do_score_story)"""
+        update_data = self.build_analysis_update(story)
+        if not update_data:
+            return True
+        success = self.db.update('stories', story['id'], update_data)
         
-        # Update database
-        success = self.db.update('stories', story_id, {
-            'xray_analysis': analysis,
-            'xray_analysis_version': 5,
-            'xray_analysis_at': datetime.now(timezone.utc).isoformat()
-        })
-        
-        if success:
-            logger.info(f"Analyzed story {story_id}")
+        if success and 'xray_analysis' in update_data:
+            logger.info(f"Analyzed story {story['id']}")
         
         return success
     
@@ -464,7 +967,10 @@ class AnalysisEngineV5:
         print(f"[ANALYSIS] Analyzing: {headline[:50]}...")
         logger.info(f"Analyzing story: {headline[:50]}")
         
-        return with_retry(self._do_analyze_story, story)
+        success = with_retry(self._do_analyze_story, story, 'analysis')
+        if success and RETRY_QUEUE:
+            RETRY_QUEUE.resolve(story_id, 'analysis')
+        return success
     
     def run(self, limit: int = 10, verbose: bool = True) -> int:
         """Run analysis engine on unanalyzed stories"""
@@ -479,25 +985,47 @@ class AnalysisEngineV5:
         if verbose:
             print(f"\nFound {len(stories)} stories needing analysis")
         
-        analyzed = 0
-        for story in stories:
-            if self.analyze_story(story):
-                analyzed += 1
+        self.research_engine.research_batch(stories)
+        
+        unchanged_before = self.unchanged
+        self.last_results = process_stories(self.analyze_story, stories, self.workers)
+        unchanged = self.unchanged - unchanged_before
+        analyzed = sum(1 for ok in self.last_results.values() if ok) - unchanged
+        self.db.release_stories([s['id'] for s in stories])
         
         if verbose:
-            print(f"\nAnalyzed: {analyzed} stories")
+            print(f"\nAnalyzed: {analyzed} stories ({unchanged} unchanged, not regenerated)")
         
-        logger.info(f"Analysis Engine v5 completed - analyzed={analyzed}")
+        logger.info(f"Analysis Engine v5 completed - analyzed={analyzed}, unchanged={unchanged}")
         return analyzed
 
 
 class XrayEngineV5:
     """Main orchestrator for Xray v5"""
     
-    def __init__(self):
+    def __init__(self, research_max_age_hours: float = None, refresh_research: bool = False,
+                 workers: int = STORY_WORKERS, distributed: bool = False,
+                 prescore: bool = PRESCORE_ENABLED, thread_research: bool = THREAD_RESEARCH_ENABLED):
         self.db = SupabaseClient(SUPABASE_URL, SERVICE_KEY)
-        self.truth_engine = TruthEngineV5(self.db)
-        self.analysis_engine = AnalysisEngineV5(self.db)
+        if distributed:
+            self.db.worker_id = WORKER_ID
+            print(f"[LEASE] Claiming stories as {WORKER_ID} ({LEASE_SECONDS}s leases)")
+        
+        # One research engine and artifact store shared by both stages
+        store = ResearchArtifactStore(
+            SUPABASE_URL, SERVICE_KEY,
+            max_age_hours=research_max_age_hours,
+            refresh_before=datetime.now(timezone.utc) if refresh_research else None
+        )
+        self.research_engine = ResearchEngine(
+            concurrent=True, max_workers=RESEARCH_WORKERS, store=store,
+            thread_store=get_default_thread_store() if thread_research else None
+        )
+        self.workers = workers
+        self.scheduler = StoryScheduler()
+        self.truth_engine = TruthEngineV5(self.db, self.research_engine, workers, self.scheduler,
+                                          PreScorer() if prescore else None)
+        self.analysis_engine = AnalysisEngineV5(self.db, self.research_engine, workers, self.scheduler)
         self.pin_calculator = PinCalculator()
     
     def run_all(self, limit: int = 20, verbose: bool = True):
@@ -517,11 +1045,12 @@ class XrayEngineV5:
             'failed': 0
         }
         
-        # Run Truth Engine
-        results['scored'] = self.truth_engine.run(limit=limit, verbose=verbose)
-        
-        # Run Analysis Engine
-        results['analyzed'] = self.analysis_engine.run(limit=limit, verbose=verbose)
+        # Stream stories through score -> analyze -> write
+        to_score = self.truth_engine.fetch_unscored(limit)
+        to_analyze = self.analysis_engine.fetch_unanalyzed(limit)
+        if verbose:
+            print(f"\nFound {len(to_score)} unscored and {len(to_analyze)} unanalyzed stories")
+        results.update(self.process(to_score, to_analyze))
         
         # Update pinned stories
         results['pinned'] = self.pin_calculator.run(top_n=3, verbose=verbose)
@@ -535,20 +1064,254 @@ class XrayEngineV5:
                 for fs in FAILED_STORIES:
                     print(f"   - {fs['headline']}: {fs['error']}")
         
+        # Scores that needed no web research
+        results['prescored'] = self.truth_engine.prescored
+        
+        # Analyses skipped because their inputs hadn't changed
+        results['analysis_unchanged'] = self.analysis_engine.unchanged
+        
+        # Verdict latency by priority class
+        results['latency'] = self.scheduler.report()
+        
+        # Durable retry schedule
+        if RETRY_QUEUE:
+            retry_stats = RETRY_QUEUE.stats()
+            results['retry_pending'] = retry_stats['pending']
+            results['retry_dead'] = retry_stats['dead']
+        
+        # Research cache effectiveness
+        cache = self.research_engine.cache
+        if cache:
+            stats = cache.stats()
+            results['cache_hits'] = stats['hits']
+            results['cache_misses'] = stats['misses']
+            logger.info(f"Research cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries")
+        
+        # Lookups answered from shared thread research
+        thread_store = self.research_engine.thread_store
+        if thread_store:
+            stats = thread_store.stats()
+            results['thread_lookups_reused'] = stats['lookups_reused']
+            results['thread_lookups_run'] = stats['lookups_run']
+        
         if verbose:
             print("\n" + "="*60)
             print("RESULTS SUMMARY")
             print("="*60)
             print(f"Stories scored: {results['scored']}")
+            if results['prescored']:
+                print(f"  of which pre-scored without research: {results['prescored']}")
             print(f"Stories analyzed: {results['analyzed']}")
+            if results['analysis_unchanged']:
+                print(f"  unchanged inputs, not regenerated: {results['analysis_unchanged']}")
+            if results.get('deferred'):
+                print(f"Stories deferred: {results['deferred']}")
             print(f"Stories pinned: {results['pinned']}")
             if results['failed']:
                 print(f"Stories failed: {results['failed']}")
+            if 'cache_hits' in results:
+                print(f"Research cache: {results['cache_hits']} hits / {results['cache_misses']} misses")
+            if 'thread_lookups_reused' in results:
+                print(f"Thread research: {results['thread_lookups_reused']} lookups shared / "
+                      f"{results['thread_lookups_run']} run")
+            for name, stats in results['latency'].items():
+                print(f"Verdict latency [{name}]: p95 {stats['p95']:.0f}s over {stats['count']} "
+                      f"({stats['missed']} past deadline)")
+            if results.get('retry_pending') or results.get('retry_dead'):
+                print(f"Retry queue: {results['retry_pending']} pending / {results['retry_dead']} dead")
         
         logger.info(f"Xray Engine v5 completed - scored={results['scored']}, analyzed={results['analyzed']}, pinned={results['pinned']}, failed={results['failed']}")
         
         return results
     
+    def process(self, to_score: List[Dict], to_analyze: List[Dict]) -> Dict[str, int]:
+        """Triage, stream stories through the pipeline and release their leases"""
+        claimed = {s['id'] for s in to_score + to_analyze}
+        unique = {s['id']: s for s in to_score + to_analyze}
+        kept = {s['id'] for s in self.truth_engine.triage(list(unique.values()))}
+        # Most urgent first within the batch
+        to_score = self.scheduler.order([s for s in to_score if s['id'] in kept])
+        to_analyze = self.scheduler.order([s for s in to_analyze if s['id'] in kept])
+        pipeline = StoryPipeline(
+            self.truth_engine, self.analysis_engine, with_retry,
+            workers=self.workers, retry_queue=RETRY_QUEUE
+        )
+        try:
+            counts = pipeline.run(to_score, to_analyze)
+        finally:
+            self.db.release_stories(claimed)
+        with FAILED_STORIES_LOCK:
+            for fw in pipeline.failed_writes:
+                FAILED_STORIES.append(dict(fw, timestamp=datetime.now(timezone.utc).isoformat()))
+        results = {'scored': counts['scored'], 'analyzed': counts['analyzed']}
+        if counts.get('deferred'):
+            results['deferred'] = counts['deferred']
+        return results
+    
+    def run_drain(self, batch_size: int = 20, page_size: int = FETCH_PAGE_SIZE,
+                  verbose: bool = True) -> Dict[str, int]:
+        """Work through the entire backlog in batches of batch_size.
+        
+        Unscored stories are streamed with keyset pagination and pushed
+        through the pipeline a batch at a time (also analyzing them), then
+        whatever still needs analysis. Memory stays at one page plus one batch.
+        """
+        if verbose:
+            print("\n" + "="*60)
+            print("XRAY ENGINE v5 - DRAIN BACKLOG")
+            print(f"Time: {datetime.now().isoformat()}")
+            print("="*60)
+        logger.info(f"Drain started - batch={batch_size}, page={page_size}")
+        
+        totals = {'scored': 0, 'analyzed': 0, 'deferred': 0, 'batches': 0}
+        
+        def flush(stage: str, batch: List[Dict]):
+            counts = self.process(batch, []) if stage == 'truth' else self.process([], batch)
+            totals['batches'] += 1
+            for key in ('scored', 'analyzed', 'deferred'):
+                totals[key] += counts.get(key, 0)
+            print(f"[DRAIN] Batch {totals['batches']} ({stage}): "
+                  f"{totals['scored']} scored, {totals['analyzed']} analyzed so far")
+        
+        for stage, rows in (('truth', self.truth_engine.iter_unscored(page_size)),
+                            ('analysis', self.analysis_engine.iter_unanalyzed(page_size))):
+            waiting = RETRY_QUEUE.waiting(stage) if RETRY_QUEUE else set()
+            batch = []
+            for story in rows:
+                if story['id'] in waiting:
+                    continue
+                batch.append(story)
+                if len(batch) >= batch_size:
+                    flush(stage, batch)
+                    batch = []
+            if batch:
+                flush(stage, batch)
+        
+        totals['pinned'] = self.pin_calculator.run(top_n=3, verbose=verbose)
+        totals['unchanged'] = self.analysis_engine.unchanged
+        logger.info(f"Drain completed - scored={totals['scored']}, analyzed={totals['analyzed']}")
+        if verbose:
+            print(f"\n[DRAIN] Done: {totals['scored']} scored, {totals['analyzed']} analyzed "
+                  f"({totals['unchanged']} unchanged), {totals['deferred']} deferred in {totals['batches']} batches")
+        return totals
+    
+    def fetch_new(self, cursor: tuple, limit: int) -> List[Dict]:
+        """Stories created after the (created_at, id) cursor, oldest first"""
+        created_at, story_id = cursor
+        if story_id:
+            # Quoted like fetch_iter's keyset: timestamps carry ':' and '+'
+            filters = {'or': f'(created_at.gt."{created_at}",'
+                             f'and(created_at.eq."{created_at}",id.gt.{story_id}))'}
+        else:
+            # Cursor seeded from the clock (empty table): no id to break ties on
+            filters = {'created_at': f'gt.{created_at}'}
+        return self.db.fetch(
+            'stories',
+            select=TruthEngineV5.SELECT + ',xray_score',
+            filters=filters,
+            order='created_at.asc,id.asc',
+            limit=limit
+        )
+    
+    def latest_cursor(self) -> tuple:
+        """(created_at, id) of the newest story, or (current time, None) if none"""
+        rows = self.db.fetch('stories', select='id,created_at', order='created_at.desc,id.desc', limit=1)
+        if rows:
+            return rows[0]['created_at'], rows[0]['id']
+        return datetime.now(timezone.utc).isoformat(), None
+    
+    def run_daemon(self, limit: int = 20, poll_seconds: float = POLL_SECONDS,
+                   sweep_seconds: float = SWEEP_SECONDS, pin_seconds: float = PIN_SECONDS,
+                   lock=None):
+        """Keep processing until SIGTERM/SIGINT.
+        
+        New stories are picked up from a created_at/id cursor every
+        poll_seconds; the full unscored/unanalyzed filters are swept every
+        sweep_seconds to catch retries and deferred stories. In distributed
+        mode every poll is a lease claim instead. Research engine, caches,
+        HTTP session, compiled matchers and the related-story index stay
+        warm between polls. A signal lets the current batch finish and
+        flush before exiting.
+        """
+        stop = threading.Event()
+        if self.research_engine.related_index is None:
+            self.research_engine.related_index = RelatedStoryIndex(
+                SUPABASE_URL, SERVICE_KEY, self.research_engine.entity_extractor
+            )
+        
+        def request_stop(signum, frame):
+            print(f"\n[DAEMON] Received signal {signum}, finishing current batch...")
+            logger.info(f"Daemon stop requested (signal {signum})")
+            stop.set()
+        
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+        
+        print(f"[DAEMON] Started - poll {poll_seconds:g}s, sweep {sweep_seconds:g}s, pin {pin_seconds:g}s")
+        logger.info(f"Daemon started - limit={limit}")
+        
+        cursor = None if self.db.worker_id else self.latest_cursor()
+        last_sweep = last_pin = 0.0
+        totals = {'scored': 0, 'analyzed': 0}
+        
+        while not stop.is_set():
+            started = time.time()
+            to_score, to_analyze = [], []
+            # Go again without waiting only if a batch came back full and the
+            # iteration got somewhere (a batch that is all deferred would
+            # otherwise be re-claimed straight away, spinning on the DB)
+            full = progressed = False
+            if lock:
+                # Keep the lockfile fresh so acquire_lock never treats it as stale
+                os.utime(LOCKFILE, None)
+            
+            try:
+                if self.db.worker_id or started - last_sweep >= sweep_seconds:
+                    to_score = self.truth_engine.fetch_unscored(limit)
+                    to_analyze = self.analysis_engine.fetch_unanalyzed(limit)
+                    last_sweep = started
+                    full = len(to_score) >= limit or len(to_analyze) >= limit
+                else:
+                    new = self.fetch_new(cursor, limit)
+                    if new:
+                        cursor = (new[-1]['created_at'], new[-1]['id'])
+                    # The cursor moved past these rows whatever happens to them
+                    full = progressed = len(new) >= limit
+                    to_score = [s for s in new if not s.get('xray_score')]
+                    to_analyze = [s for s in new if s.get('xray_score')
+                                  and self.analysis_engine.is_outdated(s)]
+                
+                if to_score or to_analyze:
+                    print(f"\n[DAEMON] {len(to_score)} to score, {len(to_analyze)} to analyze")
+                    counts = self.process(to_score, to_analyze)
+                    for key in totals:
+                        totals[key] += counts[key]
+                    progressed = progressed or counts['scored'] + counts['analyzed'] > 0
+                    logger.info(f"Daemon batch - scored={counts['scored']}, analyzed={counts['analyzed']}")
+                
+                if started - last_pin >= pin_seconds:
+                    self.pin_calculator.run(top_n=3, verbose=False)
+                    last_pin = started
+                    for name, stats in self.scheduler.report().items():
+                        logger.info(f"Verdict latency [{name}]: p95={stats['p95']:.0f}s "
+                                    f"count={stats['count']} missed={stats['missed']}")
+                
+                with FAILED_STORIES_LOCK:
+                    for fs in FAILED_STORIES:
+                        logger.warning(f"Failed story {fs['id']}: {fs['error']}")
+                    FAILED_STORIES.clear()
+            except Exception as e:
+                logger.error(f"Daemon iteration failed: {e}")
+                print(f"[DAEMON ERROR] {e}")
+            
+            if not (full and progressed):
+                stop.wait(poll_seconds)
+        
+        self.db.flush_updates()
+        print(f"[DAEMON] Stopped - scored {totals['scored']}, analyzed {totals['analyzed']}")
+        logger.info(f"Daemon stopped - scored={totals['scored']}, analyzed={totals['analyzed']}")
+        return totals
+    
     def run_truth_only(self, limit: int = 20, verbose: bool = True):
         return self.truth_engine.run(limit=limit, verbose=verbose)
     
@@ -568,20 +1331,53 @@ if __name__ == '__main__':
     parser.add_argument('--pin', action='store_true', help='Run only Pin Calculator')
     parser.add_argument('--limit', type=int, default=10, help='Max stories per engine')
     parser.add_argument('--quiet', action='store_true', help='Less output')
+    parser.add_argument('--research-max-age', type=float, default=None,
+                        help='Redo stored research older than N hours (default: reuse forever)')
+    parser.add_argument('--refresh-research', action='store_true',
+                        help='Redo research for every story processed in this run')
+    parser.add_argument('--workers', type=int, default=STORY_WORKERS,
+                        help='Stories to score/analyze concurrently (default: XRAY_STORY_WORKERS or 1)')
+    parser.add_argument('--distributed', action='store_true',
+                        help='Claim stories with database leases instead of the local lockfile')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Run continuously, picking up new stories as they arrive (stop with SIGTERM)')
+    parser.add_argument('--poll', type=float, default=POLL_SECONDS,
+                        help='Seconds between polls in daemon mode')
+    parser.add_argument('--drain', action='store_true',
+                        help='Process the entire backlog in batches of --limit')
+    parser.add_argument('--page-size', type=int, default=FETCH_PAGE_SIZE,
+                        help='Rows per keyset page when draining')
+    parser.add_argument('--no-prescore', action='store_true',
+                        help='Research every story instead of trusting confident offline pre-scores')
+    parser.add_argument('--thread-research', action='store_true',
+                        help='Research each story thread once and refresh it as stories join')
     
     args = parser.parse_args()
+    if args.drain and args.distributed:
+        parser.error('--drain pages through the table directly; distributed workers drain with --daemon')
     
-    # Acquire lock
-    lock = acquire_lock()
-    if not lock:
+    # Acquire lock (distributed workers coordinate through leases instead)
+    lock = None if args.distributed else acquire_lock()
+    if not lock and not args.distributed:
         print("Another instance is already running. Exiting.")
         logger.warning("Attempted to start but another instance already running")
         sys.exit(1)
     
     try:
-        engine = XrayEngineV5()
+        engine = XrayEngineV5(
+            research_max_age_hours=args.research_max_age,
+            refresh_research=args.refresh_research,
+            workers=args.workers,
+            distributed=args.distributed,
+            prescore=PRESCORE_ENABLED and not args.no_prescore,
+            thread_research=THREAD_RESEARCH_ENABLED or args.thread_research
+        )
         
-        if args.truth:
+        if args.drain:
+            engine.run_drain(batch_size=args.limit, page_size=args.page_size, verbose=not args.quiet)
+        elif args.daemon:
+            engine.run_daemon(limit=args.limit, poll_seconds=args.poll, lock=lock)
+        elif args.truth:
             engine.run_truth_only(limit=args.limit, verbose=not args.quiet)
         elif args.analysis:
             engine.run_analysis_only(limit=args.limit, verbose=not args.quiet)